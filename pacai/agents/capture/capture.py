@@ -4,6 +4,11 @@ from pacai.agents.base import BaseAgent
 from pacai.core import distanceCalculator
 from pacai.util import util
 
+# The most time to spend on maze distances in registerInitialState
+# (well under `pacai.bin.capture.CaptureRules.getMaxStartupTime`).
+# Any distances that are left are computed a little each turn (see CaptureAgent.timeForComputing).
+STARTUP_TIME_FOR_COMPUTING = 10.0
+
 class CaptureAgent(BaseAgent):
     """
     A base class for capture agents.
@@ -25,6 +30,9 @@ class CaptureAgent(BaseAgent):
         # Maze distance calculator
         self.distancer = None
 
+        # The junctions and corridors of the layout (see `CaptureAgent.getJunctionGraph`)
+        self.junctionGraph = None
+
         # A history of observations
         self.observationHistory = []
 
@@ -39,8 +47,12 @@ class CaptureAgent(BaseAgent):
 
         self.red = gameState.isOnRedTeam(self.index)
         self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout())
+        self.junctionGraph = gameState.getInitialLayout().getJunctionGraph()
 
-        self.distancer.getMazeDistances()
+        # On very large layouts, this may not finish.
+        # Then, maze distances fall back to manhattan distances until they are done
+        # (every agent on the layout keeps working on the same distances).
+        self.distancer.getMazeDistances(STARTUP_TIME_FOR_COMPUTING)
 
     def final(self, gameState):
         self.observationHistory = []
@@ -64,6 +76,9 @@ class CaptureAgent(BaseAgent):
 
         self.observationHistory.append(gameState)
 
+        if (not self.distancer.isReadyForMazeDistance()):
+            self.distancer.getMazeDistances(self.timeForComputing)
+
         myState = gameState.getAgentState(self.index)
         myPos = myState.getPosition()
 
@@ -153,6 +168,26 @@ class CaptureAgent(BaseAgent):
         else:
             return gameState.getScore() * -1
 
+    def getJunctionGraph(self):
+        """
+        Returns the `pacai.core.junctionGraph.JunctionGraph` of the layout:
+        the junctions (where there is a choice of where to go) joined by corridors.
+        Agents can plan over this graph instead of every cell,
+        e.g. only deciding where to go when reaching a decision point
+        (see `CaptureAgent.isDecisionPoint`).
+        """
+
+        return self.junctionGraph
+
+    def isDecisionPoint(self, pos):
+        """
+        Returns true if a position is an open cell with more than two ways to go
+        (i.e. it is not in a corridor or at a dead end).
+        """
+
+        graph = self.junctionGraph
+        return graph.isJunction(pos) and len(graph.getExits(pos)) > 2
+
     def getMazeDistance(self, pos1, pos2):
         """
         Returns the distance between two points using the builtin distancer.
@@ -160,6 +195,22 @@ class CaptureAgent(BaseAgent):
 
         return self.distancer.getDistance(pos1, pos2)
 
+    def getMazeDistancesFrom(self, pos, targets):
+        """
+        Returns the distances from a point to each of the targets using the builtin distancer.
+        This is faster than calling `CaptureAgent.getMazeDistance` for each target.
+        """
+
+        return self.distancer.getDistancesFrom(pos, targets)
+
+    def getNearest(self, pos, targets):
+        """
+        Returns the closest target (by maze distance) to a point, and its distance.
+        See `pacai.core.distanceCalculator.Distancer.getNearest`.
+        """
+
+        return self.distancer.getNearest(pos, targets)
+
     def getPreviousObservation(self):
         """
         Returns the `pacai.core.gamestate.AbstractGameState` object corresponding to
@@ -77,6 +77,9 @@ class SearchAgent(BaseAgent):
 
         logging.info('Search nodes expanded: %d' % problem.getExpandedCount())
 
+        if (problem.getSearchStats() is not None):
+            logging.info('Search stats: %s' % (problem.getSearchStats()))
+
     def getAction(self, state):
         """
         Returns the next action in the path chosen earlier (in registerInitialState).
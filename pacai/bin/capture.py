@@ -15,10 +15,9 @@ from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
-from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
+from pacai.core.grid import BitGrid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
 from pacai.ui.capture.null import CaptureNullView
@@ -27,9 +26,13 @@ from pacai.util import reflection
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
 from pacai.util.mazeGenerator import generateMaze
-from pacai.util.util import nearestPoint
 
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill
+CONSUME_TOLERANCE = 0.9  # How close Pacman must be to a point to eat what is there.
+
+# The tolerances in fixed point, where every distance is a whole number of half steps.
+FIXED_COLLISION_TOLERANCE = int(COLLISION_TOLERANCE * Actions.FIXED_POINT_SCALE)
+FIXED_CONSUME_TOLERANCE = int(CONSUME_TOLERANCE * Actions.FIXED_POINT_SCALE)
 
 KILL_POINTS = 0
 FOOD_POINTS = 1  # Points for eating food.
@@ -43,6 +46,11 @@ class CaptureGameState(AbstractGameState):
     A game state specific to capture.
     """
 
+    _UNDO_FIELDS = AbstractGameState._UNDO_FIELDS + (
+        '_timeleft', '_redCapsules', '_blueCapsules',
+        '_redFood', '_blueFood', '_numRedFood', '_numBlueFood',
+    )
+
     def __init__(self, layout, timeleft):
         super().__init__(layout)
 
@@ -67,29 +75,15 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueTeam.append(agentIndex)
 
-        # Build some denormalized structures for fast access.
-
-        self._redCapsules = []
-        self._blueCapsules = []
-
-        for capsule in self.getCapsules():
-            if (self.isOnRedSide(capsule)):
-                self._redCapsules.append(capsule)
-            else:
-                self._blueCapsules.append(capsule)
-
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        # Food grids are bitmasks with cell (x, y) at bit (x * height + y),
+        # so the red side (the left half of the board) is just the low bits.
+        height = self._food.getHeight()
+        numCells = self._food.getWidth() * height
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
+        self._redSideMask = (1 << (int(self._layout.width / 2) * height)) - 1
+        self._blueSideMask = ((1 << numCells) - 1) ^ self._redSideMask
 
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        self._splitSides()
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -124,16 +118,17 @@ class CaptureGameState(AbstractGameState):
 
     # Override
     def eatFood(self, x, y):
-        if (not self._foodCopied):
-            self._redFood = self._redFood.copy()
-            self._blueFood = self._blueFood.copy()
-
-        super().eatFood(x, y)
+        if (not super().eatFood(x, y)):
+            return False
 
         if (self.isOnRedSide((x, y))):
-            self._redFood[x][y] = False
+            self._numRedFood -= 1
+            self._redFood = None
         else:
-            self._blueFood[x][y] = False
+            self._numBlueFood -= 1
+            self._blueFood = None
+
+        return True
 
     def getBlueCapsules(self):
         """
@@ -151,6 +146,9 @@ class CaptureGameState(AbstractGameState):
         The caller should not modify the grid.
         """
 
+        if (self._blueFood is None):
+            self._blueFood = self._buildSideFood(self._blueSideMask)
+
         return self._blueFood
 
     def getBlueTeamIndices(self):
@@ -161,6 +159,20 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueTeam
 
+    def getNumBlueFood(self):
+        """
+        Get the amount of food left on the blue side.
+        """
+
+        return self._numBlueFood
+
+    def getNumRedFood(self):
+        """
+        Get the amount of food left on the red side.
+        """
+
+        return self._numRedFood
+
     def getRedCapsules(self):
         """
         Get a list of remaining capsules on the red side.
@@ -177,6 +189,9 @@ class CaptureGameState(AbstractGameState):
         The caller should not modify the grid.
         """
 
+        if (self._redFood is None):
+            self._redFood = self._buildSideFood(self._redSideMask)
+
         return self._redFood
 
     def getRedTeamIndices(self):
@@ -224,21 +239,54 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    def _applySuccessorAction(self, agentIndex, action, validate = True):
         """
         Apply the action to the context state (self).
+        Trusted callers that already know the action is legal may skip validation.
         """
 
         # Find appropriate rules for the agent.
-        AgentRules.applyAction(self, action, agentIndex)
+        AgentRules.applyAction(self, action, agentIndex, validate = validate)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
         self._timeleft -= 1
 
-        self._hash = None
+    def _buildSideFood(self, sideMask):
+        return BitGrid.fromBits(self._food.getWidth(), self._food.getHeight(),
+                self._food.getBits() & sideMask)
+
+    # Override
+    def _loadFromSimulator(self, foodBits, numFood, capsules, score, gameover, win,
+            lastAgentMoved, agents):
+        super()._loadFromSimulator(foodBits, numFood, capsules, score, gameover, win,
+                lastAgentMoved, agents)
+
+        self._splitSides()
+
+    def _splitSides(self):
+        """
+        Build the per-side (denormalized) food and capsule structures from the full ones.
+        """
+
+        self._redCapsules = []
+        self._blueCapsules = []
+
+        for capsule in self._capsules:
+            if (self.isOnRedSide(capsule)):
+                self._redCapsules.append(capsule)
+            else:
+                self._blueCapsules.append(capsule)
+
+        # The per-team food grids are built (from the side masks) on demand.
+        self._redFood = None
+        self._blueFood = None
+
+        foodBits = self._food.getBits()
+        self._numRedFood = bin(foodBits & self._redSideMask).count('1')
+        self._numBlueFood = bin(foodBits & self._blueSideMask).count('1')
 
 class CaptureRules:
     """
@@ -255,8 +303,8 @@ class CaptureRules:
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getNumBlueFood()
+        self._totalRedFood = initState.getNumRedFood()
 
         return game
 
@@ -279,10 +327,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getNumRedFood() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getNumBlueFood() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -342,36 +390,36 @@ class AgentRules:
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return list(state.getInitialLayout().getFixedPossibleActions(
+                agentState.getFixedPosition(), agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action, agentIndex):
+    def applyAction(state, action, agentIndex, validate = True):
         """
         Edits the state to reflect the results of the action.
+        If validate is false, the caller guarantees that the action is legal.
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
-        if (action not in legal):
+        if (validate and action not in AgentRules.getLegalActions(state, agentIndex)):
             raise ValueError('Illegal action: ' + str(action))
 
-        agentState = state.getAgentState(agentIndex)
+        agentState = state.getMutableAgentState(agentIndex)
 
         # Update position.
-        vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
-        agentState.updatePosition(vector)
+        vector = Actions.directionToFixedVector(action, AgentRules.AGENT_SPEED)
+        agentState.updateFixedPosition(vector)
 
         # Eat.
-        nextPosition = agentState.getPosition()
-        nearest = nearestPoint(nextPosition)
-        if (agentState.isPacman() and manhattan(nearest, nextPosition) <= 0.9):
+        nearest = agentState.getNearestPosition()
+        if (agentState.isPacman()
+                and Actions.fixedManhattan(Actions.toFixed(nearest), agentState.getFixedPosition())
+                    <= FIXED_CONSUME_TOLERANCE):
             AgentRules.consume(nearest, state, state.isOnRedTeam(agentIndex))
 
         # Potentially change agent type.
-        if (nextPosition == nearest):
+        if (agentState.isOnGridPoint()):
             # Agents are pacmen when they are not on their own side.
-            position = agentState.getPosition()
-            agentState.setIsPacman(state.isOnRedTeam(agentIndex) != state.isOnRedSide(position))
+            agentState.setIsPacman(state.isOnRedTeam(agentIndex) != state.isOnRedSide(nearest))
 
     @staticmethod
     def consume(position, state, isRed):
@@ -392,8 +440,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getNumBlueFood() <= MIN_FOOD)
+                    or (not isRed and state.getNumRedFood() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -414,7 +462,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state.getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -444,21 +492,22 @@ class AgentRules:
             if (agentState.isPacman() == otherAgentState.isPacman()):
                 continue
 
-            otherPosition = otherAgentState.getPosition()
+            otherPosition = otherAgentState.getFixedPosition()
 
             # Ignore other agents that are too far away.
             if (otherPosition is None
-                    or manhattan(otherPosition, agentState.getPosition()) > COLLISION_TOLERANCE):
+                    or (Actions.fixedManhattan(otherPosition, agentState.getFixedPosition())
+                        > FIXED_COLLISION_TOLERANCE)):
                 continue
 
             # If we are a brave ghost or they are a scared ghost, then we will eat them.
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state.getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
-                agentState.respawn()
+                state.getMutableAgentState(agentIndex).respawn()
 
 #############################
 # FRAMEWORK TO START A GAME #
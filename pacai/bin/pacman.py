@@ -18,7 +18,6 @@ from pacai.agents.ghost.random import RandomGhost
 from pacai.agents.greedy import GreedyAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
@@ -27,12 +26,16 @@ from pacai.ui.pacman.null import PacmanNullView
 from pacai.ui.pacman.text import PacmanTextView
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
-from pacai.util.util import nearestPoint
 
 PACMAN_AGENT_INDEX = 0
 
 SCARED_TIME = 40  # The number of moves that ghosts are scared for.
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill.
+CONSUME_TOLERANCE = 0.5  # How close Pacman must be to a point to eat what is there.
+
+# The tolerances in fixed point, where every distance is a whole number of half steps.
+FIXED_COLLISION_TOLERANCE = int(COLLISION_TOLERANCE * Actions.FIXED_POINT_SCALE)
+FIXED_CONSUME_TOLERANCE = int(CONSUME_TOLERANCE * Actions.FIXED_POINT_SCALE)
 
 TIME_PENALTY = 1  # Number of points lost each round.
 FOOD_POINTS = 10  # Points for eating food.
@@ -118,23 +121,24 @@ class PacmanGameState(AbstractGameState):
 
         return self._agentStates[PACMAN_AGENT_INDEX]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    def _applySuccessorAction(self, agentIndex, action, validate = True):
         """
         Apply the action to the context state (self).
+        Trusted callers that already know the action is legal may skip validation.
         """
 
         # Let the agent's logic deal with its action's effects on the board.
         if (agentIndex == PACMAN_AGENT_INDEX):
-            PacmanRules.applyAction(self, action)
+            PacmanRules.applyAction(self, action, validate = validate)
         else:
-            GhostRules.applyAction(self, action, agentIndex)
+            GhostRules.applyAction(self, action, agentIndex, validate = validate)
 
         # Time passes.
         if (agentIndex == PACMAN_AGENT_INDEX):
             # Penalty for waiting around.
             self.addScore(-TIME_PENALTY)
         else:
-            GhostRules.decrementTimer(self.getAgentState(agentIndex))
+            GhostRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects.
         GhostRules.checkDeath(self, agentIndex)
@@ -142,8 +146,6 @@ class PacmanGameState(AbstractGameState):
         # Book keeping.
         self._lastAgentMoved = agentIndex
 
-        self._hash = None
-
 class ClassicGameRules(object):
     """
     These game rules manage the control flow of a game, deciding when
@@ -217,29 +219,29 @@ class PacmanRules:
         """
 
         agentState = state.getPacmanState()
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return list(state.getInitialLayout().getFixedPossibleActions(
+                agentState.getFixedPosition(), agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action):
+    def applyAction(state, action, validate = True):
         """
         Edits the state to reflect the results of the action.
+        If validate is false, the caller guarantees that the action is legal.
         """
 
-        legal = PacmanRules.getLegalActions(state)
-        if (action not in legal):
+        if (validate and action not in PacmanRules.getLegalActions(state)):
             raise ValueError('Illegal pacman action: ' + str(action))
 
-        pacmanState = state.getPacmanState()
+        pacmanState = state.getMutableAgentState(PACMAN_AGENT_INDEX)
 
         # Update position.
-        vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
-        pacmanState.updatePosition(vector)
+        vector = Actions.directionToFixedVector(action, PacmanRules.PACMAN_SPEED)
+        pacmanState.updateFixedPosition(vector)
 
         # Eat.
-        nextPosition = pacmanState.getPosition()
-        nearest = nearestPoint(nextPosition)
-        if (manhattan(nearest, nextPosition) <= 0.5):
+        nearest = pacmanState.getNearestPosition()
+        if (Actions.fixedManhattan(Actions.toFixed(nearest), pacmanState.getFixedPosition())
+                <= FIXED_CONSUME_TOLERANCE):
             # Remove food
             PacmanRules.consume(nearest, state)
 
@@ -260,8 +262,8 @@ class PacmanRules:
             state.eatCapsule(x, y)
 
             # Reset all ghosts' scared timers.
-            for ghostState in state.getGhostStates():
-                ghostState.setScaredTimer(SCARED_TIME)
+            for ghostIndex in state.getGhostIndexes():
+                state.getMutableAgentState(ghostIndex).setScaredTimer(SCARED_TIME)
 
 class GhostRules:
     """
@@ -278,31 +280,26 @@ class GhostRules:
         """
 
         agentState = state.getGhostState(ghostIndex)
-        possibleActions = Actions.getPossibleActions(agentState.getPosition(),
-                agentState.getDirection(), state.getWalls())
-        reverse = Actions.reverseDirection(agentState.getDirection())
-
-        if (Directions.STOP in possibleActions):
-            possibleActions.remove(Directions.STOP)
-
-        if (reverse in possibleActions and len(possibleActions) > 1):
-            possibleActions.remove(reverse)
-
-        return possibleActions
+        return list(state.getInitialLayout().getFixedGhostPossibleActions(
+                agentState.getFixedPosition(), agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action, ghostIndex):
-        legal = GhostRules.getLegalActions(state, ghostIndex)
-        if (action not in legal):
+    def applyAction(state, action, ghostIndex, validate = True):
+        """
+        Edits the state to reflect the results of the action.
+        If validate is false, the caller guarantees that the action is legal.
+        """
+
+        if (validate and action not in GhostRules.getLegalActions(state, ghostIndex)):
             raise ValueError('Illegal ghost action: ' + str(action))
 
-        ghostState = state.getGhostState(ghostIndex)
+        ghostState = state.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if (ghostState.isScared()):
             speed /= 2.0
 
-        vector = Actions.directionToVector(action, speed)
-        ghostState.updatePosition(vector)
+        vector = Actions.directionToFixedVector(action, speed)
+        ghostState.updateFixedPosition(vector)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -316,24 +313,24 @@ class GhostRules:
 
     @staticmethod
     def checkDeath(state, agentIndex):
-        pacmanPosition = state.getPacmanPosition()
+        pacmanPosition = state.getPacmanState().getFixedPosition()
 
         # Did pacman just move?
         if (agentIndex == PACMAN_AGENT_INDEX):
             # See if a ghost can kill pacman.
             for index in state.getGhostIndexes():
                 ghostState = state.getGhostState(index)
-                ghostPosition = ghostState.getPosition()
+                ghostPosition = ghostState.getFixedPosition()
 
-                if (GhostRules.canKill(pacmanPosition, ghostPosition)):
+                if (GhostRules._canKillFixed(pacmanPosition, ghostPosition)):
                     GhostRules.collide(state, ghostState, index)
 
             return
         else:
             # A ghost just moved.
             ghostState = state.getGhostState(agentIndex)
-            ghostPosition = ghostState.getPosition()
-            if (GhostRules.canKill(pacmanPosition, ghostPosition)):
+            ghostPosition = ghostState.getFixedPosition()
+            if (GhostRules._canKillFixed(pacmanPosition, ghostPosition)):
                 GhostRules.collide(state, ghostState, agentIndex)
 
     @staticmethod
@@ -341,7 +338,7 @@ class GhostRules:
         if (ghostState.isScared()):
             # Pacman ate a ghost.
             state.addScore(GHOST_POINTS)
-            ghostState.respawn()
+            state.getMutableAgentState(agentIndex).respawn()
         elif (not state.isOver()):
             # A ghost ate pacman.
             state.addScore(LOSE_POINTS)
@@ -351,6 +348,14 @@ class GhostRules:
     def canKill(pacmanPosition, ghostPosition):
         return manhattan(ghostPosition, pacmanPosition) <= COLLISION_TOLERANCE
 
+    @staticmethod
+    def _canKillFixed(pacmanPosition, ghostPosition):
+        """
+        The same as `GhostRules.canKill`, but for fixed point positions.
+        """
+
+        return Actions.fixedManhattan(ghostPosition, pacmanPosition) <= FIXED_COLLISION_TOLERANCE
+
 #############################
 # FRAMEWORK TO START A GAME #
 #############################
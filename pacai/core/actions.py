@@ -19,6 +19,11 @@ class Actions:
 
     TOLERANCE = 0.001
 
+    # Internally, agent positions are kept in fixed point as integer numbers of half steps.
+    # Every speed used by the rules (1 and 1/2) is a whole number of half steps,
+    # so fixed point positions are exact and never need rounding.
+    FIXED_POINT_SCALE = 2
+
     @staticmethod
     def reverseDirection(action):
         if (action == Directions.NORTH):
@@ -51,6 +56,63 @@ class Actions:
         dx, dy = Actions._directions[direction]
         return (dx * speed, dy * speed)
 
+    @staticmethod
+    def directionToFixedVector(direction, speed = 1.0):
+        """
+        Like `Actions.directionToVector`, but in fixed point (half steps).
+        """
+
+        dx, dy = Actions._directions[direction]
+        steps = int(round(speed * Actions.FIXED_POINT_SCALE))
+        return (dx * steps, dy * steps)
+
+    @staticmethod
+    def toFixed(position):
+        """
+        Convert a (float or int) position or vector into fixed point.
+        """
+
+        if (position is None):
+            return None
+
+        x, y = position
+        scale = Actions.FIXED_POINT_SCALE
+        return (int(round(x * scale)), int(round(y * scale)))
+
+    @staticmethod
+    def fromFixed(fixedPosition):
+        """
+        Convert a fixed point position back into a regular position.
+        Positions on a grid point come back as ints, positions between points as floats.
+        """
+
+        if (fixedPosition is None):
+            return None
+
+        fx, fy = fixedPosition
+        if (not ((fx | fy) & 1)):
+            return (fx >> 1, fy >> 1)
+
+        return (fx / Actions.FIXED_POINT_SCALE, fy / Actions.FIXED_POINT_SCALE)
+
+    @staticmethod
+    def fixedManhattan(fixedPosition1, fixedPosition2):
+        """
+        The manhattan distance (in half steps) between two fixed point positions.
+        """
+
+        return (abs(fixedPosition1[0] - fixedPosition2[0])
+                + abs(fixedPosition1[1] - fixedPosition2[1]))
+
+    @staticmethod
+    def fixedNearestPoint(fixedPosition):
+        """
+        The grid point (as a regular int position) nearest to a fixed point position.
+        Ties round up, the same as `pacai.util.util.nearestPoint`.
+        """
+
+        return ((fixedPosition[0] + 1) >> 1, (fixedPosition[1] + 1) >> 1)
+
     @staticmethod
     def getPossibleActions(position, direction, walls):
         x, y = position
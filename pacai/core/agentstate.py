@@ -9,8 +9,17 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Positions are tracked internally in fixed point (see `Actions.FIXED_POINT_SCALE`),
+    the regular (possibly float) position is kept alongside for the public API.
     """
 
+    # Game states create (and copy) a lot of agent states, so keep them compact.
+    __slots__ = (
+        '_startPosition', '_startDirection', '_startIsPacman',
+        '_position', '_fixedPosition', '_direction', '_isPacman', '_scaredTimer',
+    )
+
     def __init__(self, position, direction, isPacman):
         # Save the starting information for later use.
         self._startPosition = position
@@ -18,6 +27,7 @@ class AgentState:
         self._startIsPacman = isPacman
 
         self._position = position
+        self._fixedPosition = Actions.toFixed(position)
         self._direction = direction
 
         self._isPacman = isPacman
@@ -28,6 +38,7 @@ class AgentState:
 
         state._isPacman = self._isPacman
         state._position = self._position
+        state._fixedPosition = self._fixedPosition
         state._direction = self._direction
         state._scaredTimer = self._scaredTimer
 
@@ -39,11 +50,18 @@ class AgentState:
     def getDirection(self):
         return self._direction
 
+    def getFixedPosition(self):
+        """
+        Get this agent's position in fixed point (integer half steps).
+        """
+
+        return self._fixedPosition
+
     def getPosition(self):
         return self._position
 
     def getNearestPosition(self):
-        return util.nearestPoint(self._position)
+        return Actions.fixedNearestPoint(self._fixedPosition)
 
     def getScaredTimer(self):
         return self._scaredTimer
@@ -55,6 +73,13 @@ class AgentState:
 
         return (self.isGhost() and not self.isScared())
 
+    def isOnGridPoint(self):
+        """
+        Is this agent exactly on a grid point (and not between two points)?
+        """
+
+        return not ((self._fixedPosition[0] | self._fixedPosition[1]) & 1)
+
     def isGhost(self):
         return not self.isPacman()
 
@@ -67,6 +92,16 @@ class AgentState:
     def isScaredGhost(self):
         return (self.isGhost() and self.isScared())
 
+    def setDirection(self, direction):
+        self._direction = direction
+
+    def setFixedPosition(self, fixedPosition):
+        """
+        Move this agent to the given fixed point position (see `AgentState.getFixedPosition`).
+        """
+
+        self._setFixedPosition(fixedPosition)
+
     def setIsPacman(self, isPacman):
         self._isPacman = isPacman
 
@@ -78,14 +113,14 @@ class AgentState:
         Move the agent to the nearest point to its current location.
         """
 
-        self._position = util.nearestPoint(self._position)
+        self._setFixedPosition(Actions.toFixed(self.getNearestPosition()))
 
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
+        self._setFixedPosition(Actions.toFixed(self._startPosition))
         self._direction = self._startDirection
         self._isPacman = self._startIsPacman
         self._scaredTimer = 0
@@ -95,27 +130,40 @@ class AgentState:
         Update the position and direction with the given movement vector.
         """
 
-        x, y = self._position
-        dx, dy = vector
+        self.updateFixedPosition(Actions.toFixed(vector))
 
-        self._position = (x + dx, y + dy)
+    def updateFixedPosition(self, fixedVector):
+        """
+        Update the position and direction with the given fixed point movement vector
+        (see `Actions.directionToFixedVector`).
+        """
+
+        fx, fy = self._fixedPosition
+        dx, dy = fixedVector
 
-        direction = Actions.vectorToDirection(vector)
+        self._setFixedPosition((fx + dx, fy + dy))
+
+        direction = Actions.vectorToDirection(fixedVector)
         if (direction != Directions.STOP):
             # If this is a zero vector, face the same direction as before.
             self._direction = direction
 
+    def _setFixedPosition(self, fixedPosition):
+        self._fixedPosition = fixedPosition
+        self._position = Actions.fromFixed(fixedPosition)
+
     def __eq__(self, other):
         if (other is None):
             return False
 
-        return (self._position == other._position
+        return (self._fixedPosition == other._fixedPosition
                 and self._direction == other._direction
                 and self._isPacman == other._isPacman
                 and self._scaredTimer == other._scaredTimer)
 
     def __hash__(self):
-        return util.buildHash(self._position, self._direction, self._isPacman, self._scaredTimer)
+        return util.buildHash(self._fixedPosition, self._direction,
+                self._isPacman, self._scaredTimer)
 
     def __str__(self):
         typeString = 'Ghost'
@@ -1,6 +1,3 @@
-from pacai.core.search.position import PositionSearchProblem
-from pacai.student import search
-
 def manhattan(position1, position2):
     """
     Manhattan distance between two position tuples (x, y).
@@ -17,14 +14,19 @@ def euclidean(position1, position2):
 
 def maze(position1, position2, gameState):
     """
-    Returns the maze distance between any two positions,
-    using the search functions you have already built.
+    Returns the maze distance between any two positions.
 
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    Distances are shared between calls for the same layout (see
+    `pacai.core.distanceCalculator.getLazyDistances`), a BFS is only run the first time
+    a position is seen.
+    Positions that can not reach each other are sys.maxsize apart.
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
 
+    # Delay import, the distance calculator depends on this module.
+    from pacai.core import distanceCalculator
+
     x1, y1 = position1
     x2, y2 = position2
 
@@ -36,6 +38,6 @@ def maze(position1, position2, gameState):
     if (walls[x2][y2]):
         raise ValueError('Position2 is a wall: ' + str(position2))
 
-    prob = PositionSearchProblem(gameState, start = position1, goal = position2)
+    distances = distanceCalculator.getLazyDistances(gameState.getInitialLayout())
 
-    return len(search.breadthFirstSearch(prob))
+    return distances.getDistance((x1, y1), (x2, y2))
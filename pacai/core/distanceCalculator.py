@@ -1,7 +1,23 @@
+import abc
+import array
+import collections
+import logging
+import mmap
+import os
+import struct
 import sys
+import tempfile
+import threading
+import time
 
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
+
+# NumPy is optional, it only speeds up large many-to-many queries.
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 DEFAULT_DISTANCE = 10000
 
@@ -14,25 +30,108 @@ class Distancer(object):
     distancer = Distancer(gameState.getInitialLayout())
     distancer.getDistance((1, 1), (10, 10))
     ```
+
+    By default, all the distances for the layout are computed at once (and shared, see
+    `getDistances`), unless the full matrix would take more than MAX_MATRIX_BYTES.
+    Then (or if lazy is true) rows are computed as they are needed instead,
+    keeping at most rowCacheBytes of them (see `LazyMazeDistances`).
+
+    Full distances can also be computed a slice at a time by passing a time limit to
+    `Distancer.getMazeDistances` (and calling it again until `Distancer.isReadyForMazeDistance`).
+    In the meantime, sources that are done give exact distances and the rest fall back to
+    manhattan distances (see `IncrementalMazeDistances`).
+    The unfinished distances are shared too (see `getIncrementalDistances`),
+    so distancers for the same layout (e.g. teammates) split the work.
+
+    If junctions is true, nothing is computed ahead of time,
+    and each distance is searched for over the layout's junctions instead
+    (see `JunctionMazeDistances`).
     """
 
-    def __init__(self, layout):
+    def __init__(self, layout, lazy = None, rowCacheBytes = None, background = False,
+            junctions = False):
         self._distances = None
+        self._lazy = lazy
+        self._junctions = junctions
+        self._rowCacheBytes = rowCacheBytes
+        self._background = background
+
         self.dc = DistanceCalculator(layout, self)
 
-    def getMazeDistances(self):
-        self.dc.run()
+    def getMazeDistances(self, timeLimit = None):
+        """
+        Compute the maze distances.
+        If a time limit (in seconds) is given, stop after about that long and pick up
+        from there on the next call.
+        Returns True once all the distances are ready.
+        """
+
+        self.dc.run(timeLimit)
+        return self.isReadyForMazeDistance()
 
     def getDistance(self, pos1, pos2):
         """
         The only function you will need after you create the object.
         """
 
-        if (self._distances is None):
+        distances = self._distances
+        if (distances is None):
             return manhattan(pos1, pos2)
 
-        if isInt(pos1) and isInt(pos2):
-            return self.getDistanceOnGrid(pos1, pos2)
+        x1, y1 = pos1
+        x2, y2 = pos2
+
+        if (x1 == int(x1) and y1 == int(y1) and x2 == int(x2) and y2 == int(y2)):
+            return distances.getDistance(pos1, pos2)
+
+        return self._getFractionalDistance(pos1, pos2)
+
+    def _getFractionalDistance(self, pos1, pos2):
+        """
+        Get the distance between positions where at least one is between cells.
+        A position between two cells is the best of going through either one,
+        so this takes at most four grid distances (see `getSnaps`).
+        """
+
+        snaps1 = getSnaps(pos1)
+        snaps2 = getSnaps(pos2)
+
+        if (snaps1 is None or snaps2 is None):
+            return self._getGridsDistance(pos1, pos2)
+
+        cell1, snapDistance1, otherCell1, otherSnapDistance1 = snaps1
+        cell2, snapDistance2, otherCell2, otherSnapDistance2 = snaps2
+        getDistance = self._distances.getDistance
+
+        bestDistance = DEFAULT_DISTANCE
+
+        distance = getDistance(cell1, cell2) + snapDistance1 + snapDistance2
+        if (distance < bestDistance):
+            bestDistance = distance
+
+        if (otherCell1 is not None):
+            distance = getDistance(otherCell1, cell2) + otherSnapDistance1 + snapDistance2
+            if (distance < bestDistance):
+                bestDistance = distance
+
+        if (otherCell2 is not None):
+            distance = getDistance(cell1, otherCell2) + snapDistance1 + otherSnapDistance2
+            if (distance < bestDistance):
+                bestDistance = distance
+
+            if (otherCell1 is not None):
+                distance = (getDistance(otherCell1, otherCell2)
+                        + otherSnapDistance1 + otherSnapDistance2)
+                if (distance < bestDistance):
+                    bestDistance = distance
+
+        return bestDistance
+
+    def _getGridsDistance(self, pos1, pos2):
+        """
+        Get the distance between any two positions,
+        by trying every combination of the cells around each position.
+        """
 
         pos1Grids = getGrids2D(pos1)
         pos2Grids = getGrids2D(pos2)
@@ -47,20 +146,159 @@ class Distancer(object):
 
         return bestDistance
 
+    def getDistanceMatrix(self, sources, targets):
+        """
+        Get the distances from each source to each target,
+        as a list (one per source) of lists (one distance per target).
+        This gives the same distances as `Distancer.getDistance`, but reads rows in bulk
+        (with NumPy if it is installed).
+        """
+
+        distances = self._distances
+
+        sourceIndexes = self._getIndexes(sources)
+        targetIndexes = self._getIndexes(targets)
+
+        if (sourceIndexes is None or targetIndexes is None):
+            return [self.getDistancesFrom(source, targets) for source in sources]
+
+        unreachable = distances.getUnreachable()
+
+        if (numpy is None):
+            return [self._readRow(distances.getRow(source), targetIndexes, unreachable)
+                    for source in sourceIndexes]
+
+        targetIndexes = numpy.array(targetIndexes, dtype = numpy.intp)
+
+        matrix = numpy.empty((len(sourceIndexes), len(targetIndexes)), dtype = numpy.int64)
+        for (i, source) in enumerate(sourceIndexes):
+            matrix[i] = numpy.asarray(distances.getRow(source))[targetIndexes]
+
+        matrix[matrix == unreachable] = sys.maxsize
+
+        return matrix.tolist()
+
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        """
+        Get the maze distance between two grid (int) positions.
+        Raises an exception if either position is not an open cell,
+        and returns sys.maxsize if the cells can not reach each other.
+        """
+
+        return self._getComputedDistances().getDistance(pos1, pos2)
+
+    def getDistancesFrom(self, pos, targets):
+        """
+        Get the distances from one position to each target (in order).
+        This gives the same distances as `Distancer.getDistance`,
+        but (for grid positions) only looks up a single row.
+        """
 
-        raise Exception("Position not in grid: " + str(key))
+        indexes = self._getIndexes([pos])
+        targetIndexes = self._getIndexes(targets)
+
+        if (indexes is None or targetIndexes is None):
+            return [self.getDistance(pos, target) for target in targets]
+
+        distances = self._distances
+        return self._readRow(distances.getRow(indexes[0]), targetIndexes,
+                distances.getUnreachable())
+
+    def getNextAction(self, src, dst):
+        """
+        Get the first action on a shortest path from src to dst (both grid positions).
+        See `AbstractMazeDistances.getNextAction`.
+        The maze distances must already be computed.
+        """
+
+        return self._getComputedDistances().getNextAction(src, dst)
+
+    def getPath(self, src, dst):
+        """
+        Get the actions of a shortest path from src to dst (both grid positions).
+        See `AbstractMazeDistances.getPath`.
+        The maze distances must already be computed.
+        """
+
+        return self._getComputedDistances().getPath(src, dst)
+
+    def getNearest(self, pos, targets):
+        """
+        Get the target closest to a position, and its distance: (target, distance).
+        Ties go to the earliest target.
+        Returns (None, None) if there are no targets.
+        """
+
+        if (len(targets) == 0):
+            return (None, None)
+
+        distances = self.getDistancesFrom(pos, targets)
+
+        bestDistance = min(distances)
+        return (targets[distances.index(bestDistance)], bestDistance)
 
     def isReadyForMazeDistance(self):
-        return (self._distances is not None)
+        return (self._distances is not None
+                and not isinstance(self._distances, IncrementalMazeDistances))
+
+    def _getComputedDistances(self):
+        if (self._distances is None):
+            raise RuntimeError('Maze distances have not been computed (see getMazeDistances).')
+
+        return self._distances
+
+    def _getIndexes(self, positions):
+        """
+        Get the cell indexes for some positions,
+        or None if there are no distances yet or any position is not a cell (e.g. between cells).
+        """
+
+        if (self._distances is None or isinstance(self._distances, IncrementalMazeDistances)):
+            return None
+
+        indexes = [self._distances.getIndex(position) for position in positions]
+        if (None in indexes):
+            return None
+
+        return indexes
+
+    @staticmethod
+    def _readRow(row, indexes, unreachable):
+        values = [row[index] for index in indexes]
+
+        if (unreachable in values):
+            values = [sys.maxsize if value == unreachable else value for value in values]
+
+        return values
 
 def isInt(pos):
     x, y = pos
     return x == int(x) and y == int(y)
 
+def getSnaps(pos):
+    """
+    Get the cells a position can snap to (and how far away they are), without building lists:
+    (cell, snapDistance, otherCell, otherSnapDistance).
+    A position on a cell has no other cell (None),
+    and a position between two cells (only one coordinate is not an int) has both cells.
+    Returns None for positions with two non-int coordinates.
+    """
+
+    x, y = pos
+    intX = int(x)
+    intY = int(y)
+
+    if (x == intX):
+        if (y == intY):
+            return (pos, 0, None, 0)
+
+        return ((intX, intY), y - intY, (intX, intY + 1), intY + 1 - y)
+
+    if (y == intY):
+        return ((intX, intY), x - intX, (intX + 1, intY), intX + 1 - x)
+
+    return None
+
 def getGrids2D(pos):
     grids = []
     for x, xDistance in getGrids1D(pos[0]):
@@ -78,75 +316,896 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
-distanceMap = {}
+# Maze distances only depend on a layout's walls,
+# so they are shared by every distancer in the process (keyed by layout fingerprint).
+# The least recently used layouts are evicted once there are more than MAX_CACHED_LAYOUTS.
+MAX_CACHED_LAYOUTS = 16
+
+_cache = collections.OrderedDict()
+_cacheLock = threading.Lock()
+
+# Lazy distances (see getLazyDistances) are shared the same way,
+# and so are distances that are still being computed (see getIncrementalDistances).
+_lazyCache = collections.OrderedDict()
+_incrementalCache = collections.OrderedDict()
+
+# Distances can also be saved to disk (one file per layout fingerprint) so other processes
+# can load them instead of computing them again.
+# The disk cache is off unless this environment variable is set to a directory,
+# e.g. a private one like ~/.cache/pacai/distances (it is created with only user permissions).
+CACHE_DIR_ENV = 'PACAI_DISTANCE_CACHE_DIR'
+
+# Once the disk cache has more files (or bytes) than this,
+# the least recently used files are removed.
+MAX_CACHE_FILES = 32
+MAX_CACHE_DIR_BYTES = 256 * 1024 * 1024
+
+# Cache files are a fixed size header followed by the raw (native byte order) distance matrix.
+# Header: magic, byte order, matrix typecode, padding, number of cells.
+CACHE_FILE_MAGIC = b'PACAIMD1'
+CACHE_FILE_HEADER = struct.Struct('<8scc2xI')
+CACHE_FILE_EXTENSION = '.dist'
+
+# Boards whose full distance matrix would be larger than this use lazy rows instead
+# (see LazyMazeDistances), and keep at most DEFAULT_ROW_CACHE_BYTES of rows by default.
+MAX_MATRIX_BYTES = 64 * 1024 * 1024
+DEFAULT_ROW_CACHE_BYTES = 16 * 1024 * 1024
 
 class DistanceCalculator:
     def __init__(self, layout, distancer):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
 
-    def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+    def run(self, timeLimit = None):
+        distancer = self.distancer
+
+        if (distancer.isReadyForMazeDistance()):
+            return
+
+        if (distancer._junctions):
+            distancer._distances = JunctionMazeDistances(self.layout)
+            return
+
+        lazy = distancer._lazy
+        if (lazy is None):
+            lazy = (getMatrixBytes(self.layout.walls.count(False)) > MAX_MATRIX_BYTES)
 
-        self.distancer._distances = self.cache[self.layout.walls]
+        if (not lazy):
+            if (timeLimit is None):
+                distancer._distances = getDistances(self.layout)
+            else:
+                self._runIncremental(timeLimit)
+
+            return
+
+        rowCacheBytes = distancer._rowCacheBytes
+        if (rowCacheBytes is None):
+            rowCacheBytes = DEFAULT_ROW_CACHE_BYTES
+
+        distancer._distances = LazyMazeDistances(self.layout, rowCacheBytes,
+                distancer._background)
+
+    def _runIncremental(self, timeLimit):
+        distancer = self.distancer
+
+        # Another distancer (e.g. a teammate) may have already finished these distances.
+        distances = getDistances(self.layout, compute = False)
+        if (distances is not None):
+            distancer._distances = distances
+            return
+
+        # Every distancer for the layout works on the same rows.
+        if (distancer._distances is None):
+            distancer._distances = getIncrementalDistances(self.layout)
+
+        if (distancer._distances.compute(timeLimit)):
+            distances = distancer._distances
+            distancer._distances = addDistances(self.layout, distances.toMazeDistances())
+
+            with _cacheLock:
+                if (_incrementalCache.get(self.layout.getFingerprint()) is distances):
+                    del _incrementalCache[self.layout.getFingerprint()]
+
+def clearCache():
+    """
+    Forget all the shared maze distances.
+    """
+
+    with _cacheLock:
+        _cache.clear()
+        _lazyCache.clear()
+        _incrementalCache.clear()
+
+def addDistances(layout, distances):
+    """
+    Add distances computed elsewhere (e.g. by `IncrementalMazeDistances`) to the shared cache
+    (and the disk cache).
+    If the cache already has distances for this layout, those are kept and returned instead.
+    """
+
+    key = layout.getFingerprint()
+
+    with _cacheLock:
+        cached = _cache.get(key)
+        if (cached is not None):
+            _cache.move_to_end(key)
+            return cached
+
+    _saveDistances(distances, key)
+    _cacheDistances(key, distances)
+
+    return distances
+
+def getDistances(layout, compute = True):
+    """
+    Get the maze distances for a layout from the shared cache,
+    computing (and caching) them if they are not already there.
+    If compute is false, return None instead of computing the distances.
+    """
+
+    key = layout.getFingerprint()
+
+    with _cacheLock:
+        distances = _cache.get(key)
+        if (distances is not None):
+            _cache.move_to_end(key)
+            return distances
+
+    # Compute outside the lock, so other layouts are not held up.
+    # At worst, two threads compute the same distances and one result is kept.
+    distances = _loadDistances(layout, key)
+    if (distances is None):
+        if (not compute):
+            return None
+
+        distances = computeDistances(layout)
+        _saveDistances(distances, key)
+
+    _cacheDistances(key, distances)
+
+    return distances
+
+def getLazyDistances(layout):
+    """
+    Get shared maze distances for a layout that compute each row as it is first needed
+    (see `LazyMazeDistances`).
+    If the full distances for the layout are already in the shared cache, those are used instead.
+    """
+
+    key = layout.getFingerprint()
+
+    with _cacheLock:
+        for cache in (_cache, _lazyCache):
+            distances = cache.get(key)
+            if (distances is not None):
+                cache.move_to_end(key)
+                return distances
+
+        distances = LazyMazeDistances(layout)
+
+        _lazyCache[key] = distances
+        while (len(_lazyCache) > MAX_CACHED_LAYOUTS):
+            _lazyCache.popitem(last = False)
+
+    return distances
+
+def getIncrementalDistances(layout):
+    """
+    Get shared maze distances for a layout that are computed a slice at a time
+    (see `IncrementalMazeDistances`).
+    Everyone that gets the same (unfinished) distances continues the same computation,
+    so no row is computed twice.
+    """
+
+    key = layout.getFingerprint()
+
+    with _cacheLock:
+        distances = _incrementalCache.get(key)
+        if (distances is not None):
+            _incrementalCache.move_to_end(key)
+            return distances
+
+        distances = IncrementalMazeDistances(layout)
+
+        _incrementalCache[key] = distances
+        while (len(_incrementalCache) > MAX_CACHED_LAYOUTS):
+            _incrementalCache.popitem(last = False)
+
+    return distances
+
+def getMatrixBytes(numCells):
+    """
+    Get the size of a full distance matrix over this many cells.
+    """
+
+    typecode, unreachable = AbstractMazeDistances._getMatrixType(numCells)
+    return numCells * numCells * array.array(typecode).itemsize
+
+def getCacheDir():
+    """
+    Get the directory for the on-disk distance cache (see CACHE_DIR_ENV),
+    or None if the disk cache is off.
+    """
+
+    path = os.environ.get(CACHE_DIR_ENV, '')
+    if (path == ''):
+        return None
+
+    return path
+
+def _cacheDistances(key, distances):
+    with _cacheLock:
+        _cache[key] = distances
+        _cache.move_to_end(key)
+
+        while (len(_cache) > MAX_CACHED_LAYOUTS):
+            _cache.popitem(last = False)
+
+def _getCachePath(key):
+    cacheDir = getCacheDir()
+    if (cacheDir is None):
+        return None
+
+    return os.path.join(cacheDir, key + CACHE_FILE_EXTENSION)
+
+def _loadDistances(layout, key):
+    """
+    Load distances from the disk cache (by memory mapping the matrix, not parsing it).
+    Returns None if there is no usable cache file.
+    """
+
+    path = _getCachePath(key)
+    if (path is None or not os.path.isfile(path)):
+        return None
+
+    try:
+        with open(path, 'rb') as file:
+            # Only trust files that we wrote.
+            if (hasattr(os, 'getuid') and os.fstat(file.fileno()).st_uid != os.getuid()):
+                logging.debug('Ignoring distance cache file owned by another user: %s' % (path))
+                return None
+
+            buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        # Mark the file as recently used (see _pruneCacheDir).
+        os.utime(path)
+    except (OSError, ValueError) as ex:
+        logging.debug('Could not read distance cache file (%s): %s' % (path, ex))
+        return None
+
+    distances = MazeDistances.load(layout, buffer)
+    if (distances is None):
+        # The file does not match the layout (or is corrupt), it will be replaced.
+        logging.debug('Ignoring invalid distance cache file: %s' % (path))
+        buffer.close()
+
+    return distances
+
+def _saveDistances(distances, key):
+    """
+    Write distances to the disk cache.
+    The file is written to a temp file and then moved into place,
+    so other processes only ever see complete files.
+    """
+
+    path = _getCachePath(key)
+    if (path is None):
+        return
+
+    cacheDir = os.path.dirname(path)
+    tempPath = None
+
+    try:
+        os.makedirs(cacheDir, mode = 0o700, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = cacheDir, suffix = '.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            distances.write(file)
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.debug('Could not write distance cache file (%s): %s' % (path, ex))
+
+        if (tempPath is not None and os.path.exists(tempPath)):
+            os.remove(tempPath)
+
+        return
+
+    _pruneCacheDir(cacheDir)
+
+def _pruneCacheDir(cacheDir):
+    """
+    Remove the least recently used cache files
+    until the disk cache is within MAX_CACHE_FILES and MAX_CACHE_DIR_BYTES.
+    """
+
+    try:
+        files = []
+        for entry in os.scandir(cacheDir):
+            if (entry.is_file() and entry.name.endswith(CACHE_FILE_EXTENSION)):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError as ex:
+        logging.debug('Could not list distance cache directory (%s): %s' % (cacheDir, ex))
+        return
+
+    # Newest first.
+    files.sort(reverse = True)
+
+    totalBytes = 0
+    for (count, (mtime, size, path)) in enumerate(files):
+        totalBytes += size
+        if (count < MAX_CACHE_FILES and totalBytes <= MAX_CACHE_DIR_BYTES):
+            continue
+
+        try:
+            os.remove(path)
+        except OSError as ex:
+            logging.debug('Could not remove distance cache file (%s): %s' % (path, ex))
 
 def computeDistances(layout):
     """
-    Runs UCS to all other positions from each position.
+    Runs BFS to all other positions from each position.
+    """
+
+    return MazeDistances(layout)
+
+class AbstractMazeDistances(abc.ABC):
+    """
+    The maze distances between every pair of open cells in a layout.
+
+    Open cells are numbered (in `pacai.core.grid.BitGrid.asList` order),
+    and the distances from a cell (a row) are kept in an array of unsigned ints indexed by
+    those numbers.
+    Distances to unreachable cells are sys.maxsize.
+
+    For compatibility, this can also be read like a dict keyed by (position, position) pairs.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    def __init__(self, layout):
+        self._cells = layout.walls.asList(False)
+        self._indexes = {cell: index for (index, cell) in enumerate(self._cells)}
+
+        self._typecode, self._unreachable = AbstractMazeDistances._getMatrixType(len(self._cells))
+
+        # Built on first use, see AbstractMazeDistances._getMoves.
+        self._moves = None
+
+    @abc.abstractmethod
+    def getRow(self, index):
+        """
+        Get the distances from the cell with the given index to every cell (in index order).
+        Unreachable cells hold the value from `AbstractMazeDistances.getUnreachable`.
+        The caller should not modify the row.
+        """
+
+        pass
+
+    def get(self, key, default = None):
+        if (key not in self):
+            return default
+
+        return self[key]
+
+    def getCells(self):
+        """
+        Get the open cells, in index order.
+        The caller should not modify the list.
+        """
+
+        return self._cells
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two (int) positions.
+        Raises an exception if either position is not an open cell,
+        and returns sys.maxsize if the cells can not reach each other.
+        """
+
+        index1 = self._indexes.get(pos1)
+        index2 = self._indexes.get(pos2)
+
+        if (index1 is None or index2 is None):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        distance = self._getRawDistance(index1, index2)
+        if (distance == self._unreachable):
+            return sys.maxsize
+
+        return distance
+
+    def getIndex(self, position):
+        """
+        Get the index of an open cell, or None if the position is not an open cell.
+        """
+
+        return self._indexes.get(position)
+
+    def getNextAction(self, pos1, pos2):
+        """
+        Get the first action on a shortest path from pos1 to pos2 (both grid positions).
+        Returns Directions.STOP if the positions are the same,
+        and None if pos2 can not be reached from pos1.
+
+        Instead of storing a table of next actions, this reads the distance row for pos2:
+        the next action goes to whichever neighbor of pos1 is one step closer to pos2
+        (ties go to the first of north, south, east, and west).
+        """
+
+        index1, index2 = self._getIndexPair(pos1, pos2)
+        return self._getNextMove(self.getRow(index2), index1)[1]
+
+    def getNumCells(self):
+        return len(self._cells)
+
+    def getPath(self, pos1, pos2):
+        """
+        Get the actions of a shortest path from pos1 to pos2 (both grid positions),
+        by following `AbstractMazeDistances.getNextAction`.
+        Returns None if pos2 can not be reached from pos1.
+        """
+
+        index1, index2 = self._getIndexPair(pos1, pos2)
+        row = self.getRow(index2)
+
+        if (row[index1] == self._unreachable):
+            return None
+
+        path = []
+        while (index1 != index2):
+            index1, action = self._getNextMove(row, index1)
+            path.append(action)
+
+        return path
+
+    def getUnreachable(self):
+        """
+        Get the value that marks unreachable cells in rows.
+        """
+
+        return self._unreachable
+
+    def _bfs(self, neighbors, source):
+        """
+        Get the row of distances from a source cell.
+        Edges all have unit cost, so a plain BFS (one frontier at a time) gives shortest paths.
+        """
+
+        unreachable = self._unreachable
+
+        row = [unreachable] * len(self._cells)
+        row[source] = 0
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+        frontier = [source]
+        distance = 0
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+        while (len(frontier) > 0):
+            distance += 1
+            nextFrontier = []
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+            for node in frontier:
+                for neighbor in neighbors[node]:
+                    if (row[neighbor] == unreachable):
+                        row[neighbor] = distance
+                        nextFrontier.append(neighbor)
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+            frontier = nextFrontier
 
-            closed[node] = True
-            nodeDist = dist[node]
+        return row
+
+    def _buildNeighbors(self):
+        """
+        Get the indexes of the open neighbors of each open cell.
+        """
+
+        neighbors = []
+
+        for (x, y) in self._cells:
             adjacent = []
-            x, y = node
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+            for position in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                index = self._indexes.get(position)
+                if (index is not None):
+                    adjacent.append(index)
+
+            neighbors.append(adjacent)
+
+        return neighbors
+
+    def _getIndexPair(self, pos1, pos2):
+        index1 = self._indexes.get(pos1)
+        index2 = self._indexes.get(pos2)
+
+        if (index1 is None or index2 is None):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        return index1, index2
+
+    def _getMoves(self):
+        """
+        Get the (neighbor index, action) pairs for the open neighbors of each open cell.
+        """
+
+        if (self._moves is None):
+            actions = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)
+            self._moves = []
+
+            for (x, y) in self._cells:
+                positions = ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+                self._moves.append([(self._indexes[position], action)
+                        for (position, action) in zip(positions, actions)
+                        if position in self._indexes])
+
+        return self._moves
+
+    def _getNextMove(self, row, index):
+        """
+        Get the (neighbor index, action) pair one step closer to the target of a row,
+        (index, Directions.STOP) at the target, or (index, None) if the target is unreachable.
+        """
+
+        distance = row[index]
+
+        if (distance == 0):
+            return (index, Directions.STOP)
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+        if (distance == self._unreachable):
+            return (index, None)
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+        for move in self._getMoves()[index]:
+            if (row[move[0]] == distance - 1):
+                return move
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+        raise ValueError('Distances are not shortest paths at cell %d.' % (index))
 
-            for other in adjacent:
-                if other not in dist:
+    def _getRawDistance(self, index1, index2):
+        return self.getRow(index1)[index2]
+
+    @staticmethod
+    def _getMatrixType(numCells):
+        """
+        Get the typecode and unreachable marker for distances over this many cells.
+        The largest possible distance is (numCells - 1), so the largest value can mark
+        unreachable cells.
+        """
+
+        if (numCells < 0xFFFF):
+            return ('H', 0xFFFF)
+
+        return ('I', 0xFFFFFFFF)
+
+    def __contains__(self, key):
+        pos1, pos2 = key
+        return (pos1 in self._indexes and pos2 in self._indexes)
+
+    def __getitem__(self, key):
+        if (key not in self):
+            raise KeyError(key)
+
+        return self.getDistance(*key)
+
+    def __len__(self):
+        return len(self._cells) ** 2
+
+class MazeDistances(AbstractMazeDistances):
+    """
+    All the maze distances, computed up front and kept in a dense, row-major matrix.
+
+    If a matrix is given (e.g. one loaded with `MazeDistances.load`),
+    it is used as-is instead of computing the distances.
+    """
+
+    def __init__(self, layout, matrix = None):
+        super().__init__(layout)
+
+        if (matrix is not None):
+            self._matrix = matrix
+            return
+
+        self._matrix = array.array(self._typecode)
+
+        neighbors = self._buildNeighbors()
+        for source in range(len(self._cells)):
+            self._matrix.extend(self._bfs(neighbors, source))
+
+    # Override
+    def getRow(self, index):
+        numCells = len(self._cells)
+        return memoryview(self._matrix)[index * numCells:(index + 1) * numCells]
+
+    def write(self, file):
+        """
+        Write these distances to a binary file (see `MazeDistances.load`).
+        """
+
+        file.write(CACHE_FILE_HEADER.pack(CACHE_FILE_MAGIC, sys.byteorder[0].encode(),
+                self._typecode.encode(), len(self._cells)))
+        file.write(memoryview(self._matrix).cast('B'))
+
+    # Override
+    def _getRawDistance(self, index1, index2):
+        return self._matrix[index1 * len(self._cells) + index2]
+
+    @staticmethod
+    def load(layout, buffer):
+        """
+        Get the distances for a layout from a buffer holding a file written by
+        `MazeDistances.write` (usually a memory map of the file).
+        The matrix is read straight out of the buffer, without parsing or copying.
+        Returns None if the buffer does not hold distances for this layout.
+        """
+
+        numCells = layout.walls.count(False)
+        typecode, unreachable = AbstractMazeDistances._getMatrixType(numCells)
+
+        expected = (CACHE_FILE_MAGIC, sys.byteorder[0].encode(), typecode.encode(), numCells)
+        expectedSize = CACHE_FILE_HEADER.size + getMatrixBytes(numCells)
+
+        if (len(buffer) != expectedSize or CACHE_FILE_HEADER.unpack_from(buffer) != expected):
+            return None
+
+        matrix = memoryview(buffer)[CACHE_FILE_HEADER.size:].cast(typecode)
+        return MazeDistances(layout, matrix = matrix)
+
+class LazyMazeDistances(AbstractMazeDistances):
+    """
+    Maze distances for boards too big for a full matrix.
+
+    A row (the distances from one cell) is computed with a BFS the first time it is needed,
+    and rows are kept in an LRU cache that holds at most maxBytes worth of rows.
+    Since distances are symmetric, a cached row for either end of a query will do.
+
+    If background is true, a daemon thread precomputes rows (in index order)
+    until the cache is full.
+    """
+
+    def __init__(self, layout, maxBytes = DEFAULT_ROW_CACHE_BYTES, background = False):
+        super().__init__(layout)
+
+        self._neighbors = self._buildNeighbors()
+
+        rowBytes = len(self._cells) * array.array(self._typecode).itemsize
+        self._maxRows = max(1, maxBytes // max(1, rowBytes))
+
+        self._rows = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self._thread = None
+        self._stopBackground = False
+
+        if (background):
+            self.startBackground()
+
+    def getNumCachedRows(self):
+        with self._lock:
+            return len(self._rows)
+
+    # Override
+    def getRow(self, index):
+        with self._lock:
+            row = self._rows.get(index)
+            if (row is not None):
+                self._rows.move_to_end(index)
+                return row
+
+        # Compute outside the lock, so the background thread is not held up.
+        row = array.array(self._typecode, self._bfs(self._neighbors, index))
+        self._addRow(index, row)
+
+        return row
+
+    def startBackground(self):
+        """
+        Start precomputing rows in a background thread (if one is not already running).
+        """
+
+        if (self._thread is not None and self._thread.is_alive()):
+            return
+
+        self._stopBackground = False
+        self._thread = threading.Thread(target = self._precompute, daemon = True)
+        self._thread.start()
+
+    def stopBackground(self):
+        """
+        Stop precomputing rows, and wait for the background thread to finish.
+        """
+
+        self._stopBackground = True
+
+        if (self._thread is not None):
+            self._thread.join()
+            self._thread = None
+
+    def _addRow(self, index, row):
+        with self._lock:
+            self._rows[index] = row
+            self._rows.move_to_end(index)
+
+            while (len(self._rows) > self._maxRows):
+                self._rows.popitem(last = False)
+
+    # Override
+    def _getRawDistance(self, index1, index2):
+        with self._lock:
+            row = self._rows.get(index1)
+            if (row is not None):
+                self._rows.move_to_end(index1)
+                return row[index2]
+
+            row = self._rows.get(index2)
+            if (row is not None):
+                self._rows.move_to_end(index2)
+                return row[index1]
+
+        return self.getRow(index1)[index2]
+
+    def _precompute(self):
+        for index in range(len(self._cells)):
+            if (self._stopBackground):
+                return
+
+            with self._lock:
+                if (len(self._rows) >= self._maxRows):
+                    return
+
+                if (index in self._rows):
                     continue
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+            self._addRow(index, array.array(self._typecode, self._bfs(self._neighbors, index)))
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+class IncrementalMazeDistances(AbstractMazeDistances):
+    """
+    Full maze distances that are computed a few sources (rows) at a time,
+    see `IncrementalMazeDistances.compute`.
 
-    return distances
+    Queries where either end is a finished source give exact distances,
+    the rest fall back to manhattan distances.
+    Once every row is done, `IncrementalMazeDistances.toMazeDistances` gives the full matrix.
+    """
+
+    def __init__(self, layout):
+        super().__init__(layout)
+
+        numCells = len(self._cells)
+
+        self._layout = layout
+        self._neighbors = self._buildNeighbors()
+        self._matrix = array.array(self._typecode, [self._unreachable]) * (numCells * numCells)
+        self._finished = bytearray(numCells)
+        self._numFinished = 0
+        self._nextSource = 0
+
+        # These distances may be shared (see getIncrementalDistances).
+        self._lock = threading.Lock()
+
+    def compute(self, timeLimit):
+        """
+        Compute rows until about timeLimit seconds have passed (always at least one row).
+        Returns True once all the rows are done.
+        """
+
+        endTime = time.time() + timeLimit
+        numCells = len(self._cells)
+
+        with self._lock:
+            while (self._nextSource < numCells):
+                source = self._nextSource
+                self._nextSource += 1
+
+                if (self._finished[source]):
+                    continue
+
+                self._computeRow(source)
+
+                if (time.time() >= endTime):
+                    break
+
+        return self.isComplete()
+
+    # Override
+    def getDistance(self, pos1, pos2):
+        index1 = self._indexes.get(pos1)
+        index2 = self._indexes.get(pos2)
+
+        if (index1 is None or index2 is None):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        if (self._finished[index1]):
+            distance = self._matrix[index1 * len(self._cells) + index2]
+        elif (self._finished[index2]):
+            distance = self._matrix[index2 * len(self._cells) + index1]
+        else:
+            return manhattan(pos1, pos2)
+
+        if (distance == self._unreachable):
+            return sys.maxsize
+
+        return distance
+
+    def getNumFinished(self):
+        return self._numFinished
+
+    # Override
+    def getRow(self, index):
+        """
+        Get a row, computing it now if it is not done yet.
+        """
+
+        if (not self._finished[index]):
+            with self._lock:
+                if (not self._finished[index]):
+                    self._computeRow(index)
+
+        numCells = len(self._cells)
+        return memoryview(self._matrix)[index * numCells:(index + 1) * numCells]
+
+    def isComplete(self):
+        return self._numFinished == len(self._cells)
+
+    def toMazeDistances(self):
+        """
+        Get the full (dense) distances.
+        All the rows must be done.
+        """
+
+        if (not self.isComplete()):
+            raise ValueError('Distances are not done, %d of %d rows are finished.'
+                    % (self._numFinished, len(self._cells)))
+
+        return MazeDistances(self._layout, matrix = self._matrix)
+
+    def _computeRow(self, source):
+        numCells = len(self._cells)
+        start = source * numCells
+
+        self._matrix[start:(start + numCells)] = array.array(self._typecode,
+                self._bfs(self._neighbors, source))
+
+        self._finished[source] = 1
+        self._numFinished += 1
+
+class JunctionMazeDistances(AbstractMazeDistances):
+    """
+    Maze distances that are not stored at all,
+    but searched for over the layout's junctions when they are asked for
+    (see `pacai.core.layout.Layout.getJunctionGraph`).
+
+    This takes almost no memory (or setup time), but each query is a (small) search,
+    so it suits boards that are too large for other modes and only need a few distances.
+    """
+
+    def __init__(self, layout):
+        super().__init__(layout)
+
+        self._graph = layout.getJunctionGraph()
+
+    # Override
+    def getDistance(self, pos1, pos2):
+        if (pos1 not in self._indexes or pos2 not in self._indexes):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        return self._graph.getDistance(pos1, pos2)
+
+    # Override
+    def getRow(self, index):
+        """
+        Get a row, computing it from the junction graph (rows are not kept).
+        """
+
+        cellDistances = self._graph.getCellDistances(self._cells[index])
+
+        unreachable = self._unreachable
+        return array.array(self._typecode,
+                [cellDistances.get(cell, unreachable) for cell in self._cells])
+
+    # Override
+    def _getRawDistance(self, index1, index2):
+        distance = self._graph.getDistance(self._cells[index1], self._cells[index2])
+        if (distance == sys.maxsize):
+            return self._unreachable
+
+        return distance
 
 def getDistanceOnGrid(distances, pos1, pos2):
     key = (pos1, pos2)
@@ -54,6 +54,11 @@ class Game:
             try:
                 agent.observationFunction(self.state)
                 action = agent.getAction(self.state)
+
+                # Agents share the game's (read-only) agent states,
+                # make sure they did not modify them.
+                if (__debug__):
+                    self.state.checkHash()
             except Exception as ex:
                 if (not self.catchExceptions):
                     raise ex
@@ -1,9 +1,27 @@
 import abc
-import copy
 
+from pacai.core import zobrist
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
-from pacai.util import util
+from pacai.core.grid import BitGrid
+
+class UndoRecord(object):
+    """
+    Everything needed to revert a single `AbstractGameState.applyAction`.
+    Callers should treat this as opaque, other than the agent index and action.
+    """
+
+    __slots__ = ('agentIndex', 'action', '_values', '_agentStates')
+
+    def __init__(self, agentIndex, action, values):
+        self.agentIndex = agentIndex
+        self.action = action
+
+        # Values for each of the state's undo fields (in order).
+        self._values = values
+
+        # (index, agent state) pairs for the agents that were replaced during the action.
+        self._agentStates = []
 
 class AbstractGameState(abc.ABC):
     """
@@ -15,6 +33,15 @@ class AbstractGameState(abc.ABC):
     Only use the accessor methods to get data about the game state.
     """
 
+    # The fields that an action may reassign, and therefore need to be restored on undo.
+    # Children with more fields should extend this.
+    _UNDO_FIELDS = (
+        '_score', '_gameover', '_win', '_lastAgentMoved',
+        '_food', '_foodCopied', '_lastFoodEaten', '_numFood',
+        '_capsules', '_capsulesCopied', '_lastCapsuleEaten',
+        '_hash', '_dirtyAgents', '_ownedAgents',
+    )
+
     def __init__(self, layout):
         self._lastAgentMoved = None
         self._gameover = False
@@ -22,10 +49,6 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
-        # Any children should be sure to clear the hash when modifications are made.
-        self._hash = None
-
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
 
@@ -33,6 +56,9 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Keep a running count so we never need to scan the food grid.
+        self._numFood = self._food.count()
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
@@ -45,8 +71,25 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # Like food and capsules, agent states are copied on write.
+        # This is a bitmask of the agents that this state has its own copy of.
+        self._ownedAgents = (1 << len(self._agentStates)) - 1
+
         self._score = 0
 
+        # The hash is a Zobrist key that is kept up-to-date as the state is modified,
+        # so successors never need to rehash the whole board.
+        # Modifications should go through the methods of this class (e.g. eatFood(), addScore(),
+        # and getMutableAgentState()) so the key can be updated.
+        self._zobrist = zobrist.getTable(layout.width, layout.height)
+        self._hash = self._computeHash()
+
+        # A bitmask of agents that may be modified and whose key is currently not in the hash.
+        self._dirtyAgents = 0
+
+        # The record of the in-place action currently being applied (if any).
+        self._undoRecord = None
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -64,9 +107,80 @@ class AbstractGameState(abc.ABC):
 
         pass
 
+    def generateSuccessors(self, agentIndex):
+        """
+        Returns a list of (action, successor) pairs, one for each legal action of the agent.
+        This is equivalent to calling `AbstractGameState.generateSuccessor` for every action in
+        `AbstractGameState.getLegalActions`, but legal actions are only computed once
+        and the work shared by all the successors is only done once.
+        """
+
+        # Check that successors exist.
+        if (self.isOver()):
+            raise RuntimeError("Can't generate successors of a terminal state.")
+
+        # Bring the hash up-to-date now, instead of separately in each successor.
+        self.__hash__()
+
+        successors = []
+        for action in self.getLegalActions(agentIndex):
+            successor = self._initSuccessor()
+
+            # The action is known to be legal, so the rules don't need to check it again.
+            successor._applySuccessorAction(agentIndex, action, validate = False)
+
+            successors.append((action, successor))
+
+        return successors
+
     def addScore(self, score):
-        self._hash = None
-        self._score += score
+        self._setScore(self._score + score)
+
+    def applyAction(self, agentIndex, action):
+        """
+        Apply an action to this state in place (instead of creating a successor).
+        This follows the exact same rules as `AbstractGameState.generateSuccessor`,
+        but does not allocate a new state.
+
+        Returns an `UndoRecord` that can be passed to `AbstractGameState.undoAction`
+        to restore the state to how it was before the action.
+        Actions must be undone in the reverse order that they were applied.
+        """
+
+        # Check that successors exist.
+        if (self.isOver()):
+            raise RuntimeError("Can't apply actions to a terminal state.")
+
+        record = UndoRecord(agentIndex, action,
+                [getattr(self, name) for name in self._UNDO_FIELDS])
+
+        # Force food, capsules, and agents to be copied on write,
+        # so the saved versions stay intact.
+        self._foodCopied = False
+        self._capsulesCopied = False
+        self._ownedAgents = 0
+
+        self._undoRecord = record
+        try:
+            self._applySuccessorAction(agentIndex, action)
+        except Exception:
+            self._undoRecord = None
+            self.undoAction(record)
+            raise
+
+        self._undoRecord = None
+        return record
+
+    def checkHash(self):
+        """
+        Raise a RuntimeError if this state no longer matches its (incrementally kept) hash.
+        This happens when the state was changed without going through this class,
+        e.g. by modifying an agent state from `AbstractGameState.getAgentState`.
+        """
+
+        if (self.__hash__() != self._computeHash()):
+            raise RuntimeError('Game state was modified outside of the game rules'
+                    + ' (agent states from getAgentState() are read-only).')
 
     def eatCapsule(self, x, y):
         """
@@ -83,7 +197,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
-        self._hash = None
+        self._hash ^= self._zobrist.capsuleKey(x, y)
         return True
 
     def eatFood(self, x, y):
@@ -100,15 +214,18 @@ class AbstractGameState(abc.ABC):
 
         self._food[x][y] = False
         self._lastFoodEaten = (x, y)
+        self._numFood -= 1
 
-        self._hash = None
+        self._hash ^= self._zobrist.foodKey(x, y)
         return True
 
     def endGame(self, win):
+        self._hash ^= self._zobrist.flagsKey(self._gameover, self._win)
+
         self._gameover = True
         self._win = win
 
-        self._hash = None
+        self._hash ^= self._zobrist.flagsKey(self._gameover, self._win)
 
     def getAgentPosition(self, index):
         """
@@ -117,17 +234,31 @@ class AbstractGameState(abc.ABC):
         (like if it just died and is respawning).
         """
 
-        position = self._agentStates[index].getPosition()
-        if (position is None):
+        fixedPosition = self._agentStates[index].getFixedPosition()
+        if (fixedPosition is None):
             return None
 
-        # Ensure positions are ints.
-        return tuple(int(pos) for pos in position)
+        # Ensure positions are ints (truncating, like int() on the regular position).
+        return (fixedPosition[0] >> 1, fixedPosition[1] >> 1)
 
     def getAgentState(self, index):
+        """
+        Get the state of an agent.
+        The result is READ-ONLY: agent states are shared (copy-on-write) between a state
+        and its successors, so modifying one would also change other states
+        (and leave this state's hash out of date).
+        Rules that need to change an agent must use `AbstractGameState.getMutableAgentState`.
+        See also `AbstractGameState.checkHash`.
+        """
+
         return self._agentStates[index]
 
     def getAgentStates(self):
+        """
+        Get the states of all the agents.
+        Like `AbstractGameState.getAgentState`, the list and its agent states are read-only.
+        """
+
         return self._agentStates
 
     def getCapsules(self):
@@ -173,6 +304,33 @@ class AbstractGameState(abc.ABC):
     def getLastFoodEaten(self):
         return self._lastFoodEaten
 
+    def getMutableAgentState(self, index):
+        """
+        Get an agent state that is about to be modified.
+        Rules that change an agent (move it, scare it, respawn it, etc) must fetch
+        the agent through this method instead of `AbstractGameState.getAgentState`,
+        so that the agent can be copied (if it is shared with another state)
+        and the state's hash can follow the change.
+        """
+
+        agentState = self._agentStates[index]
+
+        if (not (self._ownedAgents >> index) & 1):
+            if (self._undoRecord is not None):
+                # Keep the original agent for undo.
+                self._undoRecord._agentStates.append((index, agentState))
+
+            agentState = agentState.copy()
+            self._agentStates[index] = agentState
+            self._ownedAgents |= (1 << index)
+
+        if (not (self._dirtyAgents >> index) & 1):
+            # Take the agent's current key out of the hash, its new key gets added back lazily.
+            self._hash ^= zobrist.agentKey(index, agentState)
+            self._dirtyAgents |= (1 << index)
+
+        return agentState
+
     def getNumAgents(self):
         return len(self._agentStates)
 
@@ -188,7 +346,7 @@ class AbstractGameState(abc.ABC):
         Get the amount of food left on the board.
         """
 
-        return self._food.count()
+        return self._numFood
 
     def getScore(self):
         return self._score
@@ -239,8 +397,42 @@ class AbstractGameState(abc.ABC):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        self._setScore(score)
+
+    def undoAction(self, record):
+        """
+        Revert an action applied with `AbstractGameState.applyAction`.
+        """
+
+        for (index, agentState) in reversed(record._agentStates):
+            self._agentStates[index] = agentState
+
+        for (name, value) in zip(self._UNDO_FIELDS, record._values):
+            setattr(self, name, value)
+
+    def _computeHash(self):
+        """
+        Compute the full Zobrist key of this state from scratch.
+        """
+
+        key = hash(self._layout) & zobrist.KEY_MASK
+        key ^= zobrist.scoreKey(self._score)
+        key ^= self._zobrist.flagsKey(self._gameover, self._win)
+
+        for (x, y) in self._food.asList():
+            key ^= self._zobrist.foodKey(x, y)
+
+        for (x, y) in self._capsules:
+            key ^= self._zobrist.capsuleKey(x, y)
+
+        for index in range(len(self._agentStates)):
+            key ^= zobrist.agentKey(index, self._agentStates[index])
+
+        return key
+
+    def _setScore(self, score):
+        self._hash ^= zobrist.scoreKey(self._score) ^ zobrist.scoreKey(score)
         self._score = score
-        self._hash = None
 
     def _initSuccessor(self):
         """
@@ -248,19 +440,57 @@ class AbstractGameState(abc.ABC):
         Initialize the successor to look like this state.
         """
 
-        # Start with a shallow copy.
-        successor = copy.copy(self)
-        successor._hash = None
+        # Start with a shallow copy (without going through the more general copy.copy()).
+        # The hash is carried over as-is and will be updated as the successor is modified.
+        successor = self.__class__.__new__(self.__class__)
+        successor.__dict__.update(self.__dict__)
 
-        # Leave food and capsules as a shallow copy, but mark them to be copied on write.
+        # Leave food, capsules, and agent states as a shallow copy,
+        # but mark them to be copied on write.
         successor._foodCopied = False
         successor._capsulesCopied = False
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        successor._agentStates = self._agentStates.copy()
+        successor._ownedAgents = 0
 
         return successor
 
+    def _loadFromSimulator(self, foodBits, numFood, capsules, score, gameover, win,
+            lastAgentMoved, agents):
+        """
+        Load a position from a `pacai.core.simulator.base.AbstractSimulator`
+        into this state (which must be fresh, i.e. not yet share anything with another state).
+
+        Args:
+            foodBits: The food bitboard (in the same bit order as `pacai.core.grid.BitGrid`).
+            numFood: The number of bits set in foodBits.
+            capsules: A list of the remaining capsule positions.
+            agents: A (fixedPosition, direction, isPacman, scaredTimer) tuple for each agent.
+        """
+
+        self._food = BitGrid.fromBits(self._layout.width, self._layout.height, foodBits)
+        self._foodCopied = True
+        self._numFood = numFood
+
+        self._capsules = capsules
+        self._capsulesCopied = True
+
+        self._score = score
+        self._gameover = gameover
+        self._win = win
+        self._lastAgentMoved = lastAgentMoved
+
+        for (index, (fixedPosition, direction, isPacman, scaredTimer)) in enumerate(agents):
+            agentState = self._agentStates[index]
+            agentState.setFixedPosition(fixedPosition)
+            agentState.setDirection(direction)
+            agentState.setIsPacman(isPacman)
+            agentState.setScaredTimer(scaredTimer)
+
+        # Everything was replaced at once, so rebuild the hash from scratch.
+        self._hash = self._computeHash()
+        self._dirtyAgents = 0
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -276,6 +506,9 @@ class AbstractGameState(abc.ABC):
         # not is they got to this confiruation in the same way.
 
         # Check simple fields first.
+        if (hash(self) != hash(other)):
+            return False
+
         if (self._score != other._score
                 or self._gameover != other._gameover
                 or self._win != other._win):
@@ -288,8 +521,17 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
-        if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+        # Add back the keys of any agents that have been modified.
+        dirtyAgents = self._dirtyAgents
+        index = 0
+
+        while (dirtyAgents):
+            if (dirtyAgents & 1):
+                self._hash ^= zobrist.agentKey(index, self._agentStates[index])
+
+            dirtyAgents >>= 1
+            index += 1
+
+        self._dirtyAgents = 0
 
         return self._hash
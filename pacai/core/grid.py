@@ -55,6 +55,9 @@ class Grid:
         if (other is None):
             return False
 
+        if (not isinstance(other, Grid)):
+            return NotImplemented
+
         return self._data == other._data
 
     def __getitem__(self, i):
@@ -82,3 +85,206 @@ class Grid:
         out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class BitGrid:
+    """
+    A 2-dimensional array of booleans backed by a single integer bitmask.
+    Data is accessed via grid[x][y] just like `Grid`.
+
+    The cell at (x, y) is stored in bit (x * height + y).
+    Since Python integers are immutable, copies are O(1) and can never alias each other.
+    Counting, hashing, and equality all operate on the whole mask at once.
+
+    Columns are materialized lazily the first time they are indexed,
+    so repeated reads (e.g. of walls) cost the same as a list lookup.
+    """
+
+    def __init__(self, width, height, initialValue = False):
+        if (not isinstance(initialValue, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        self._width = width
+        self._height = height
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = (1 << (width * height)) - 1
+
+        # Cached column views, built on demand.
+        self._columns = None
+
+    @staticmethod
+    def fromBits(width, height, bits):
+        """
+        Build a grid directly from a bitmask (see `BitGrid.getBits`).
+        """
+
+        grid = BitGrid(width, height)
+        grid._bits = bits
+        return grid
+
+    @staticmethod
+    def fromGrid(grid):
+        """
+        Build a BitGrid with the same contents as any grid that supports `asList()`.
+        """
+
+        bitGrid = BitGrid(grid.getWidth(), grid.getHeight())
+
+        for (x, y) in grid.asList():
+            bitGrid._bits |= 1 << (x * bitGrid._height + y)
+
+        return bitGrid
+
+    def asList(self, key = True):
+        bits = self._bits
+        if (not key):
+            bits = ~bits & ((1 << (self._width * self._height)) - 1)
+
+        values = []
+        height = self._height
+
+        # Walk the binary string (least significant bit first) so the scan happens in C.
+        digits = bin(bits)[:1:-1]
+        index = digits.find('1')
+        while (index != -1):
+            values.append((index // height, index % height))
+            index = digits.find('1', index + 1)
+
+        return values
+
+    def copy(self):
+        return BitGrid.fromBits(self._width, self._height, self._bits)
+
+    def count(self, item = True):
+        setCount = bin(self._bits).count('1')
+        if (item):
+            return setCount
+
+        return self._width * self._height - setCount
+
+    def deepCopy(self):
+        return self.copy()
+
+    def getBits(self):
+        """
+        Get the integer bitmask backing this grid.
+        """
+
+        return self._bits
+
+    def getHeight(self):
+        return self._height
+
+    def getWidth(self):
+        return self._width
+
+    def setBits(self, bits):
+        """
+        Replace the entire contents of this grid with a bitmask (see `BitGrid.getBits`).
+        """
+
+        self._bits = bits
+        self._columns = None
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def __eq__(self, other):
+        if (other is None):
+            return False
+
+        if (isinstance(other, Grid)):
+            other = BitGrid.fromGrid(other)
+        elif (not isinstance(other, BitGrid)):
+            return NotImplemented
+
+        return (self._bits == other._bits
+                and self._width == other._width
+                and self._height == other._height)
+
+    def __getitem__(self, x):
+        columns = self._columns
+        if (columns is None):
+            columns = [None] * self._width
+            self._columns = columns
+
+        column = columns[x]
+        if (column is None):
+            if (x < 0):
+                x += self._width
+
+            column = _BitGridColumn(self, x)
+            columns[x] = column
+
+        return column
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_columns'] = None
+        return state
+
+    def __hash__(self):
+        return hash(self._bits)
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __setitem__(self, x, column):
+        if (x < 0):
+            x += self._width
+
+        offset = x * self._height
+        bits = self._bits & ~(((1 << self._height) - 1) << offset)
+
+        for y, value in enumerate(column):
+            if (value):
+                bits |= 1 << (offset + y)
+
+        self.setBits(bits)
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self._width)] for y in range(self._height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+class _BitGridColumn(list):
+    """
+    A materialized column of a `BitGrid`.
+    Reads are plain list reads, writes (of cells or same-sized slices) go through to
+    the owning grid's bitmask.
+    """
+
+    def __init__(self, grid, x):
+        offset = x * grid._height
+        bits = grid._bits >> offset
+
+        super().__init__([((bits >> y) & 1) == 1 for y in range(grid._height)])
+
+        self._grid = grid
+        self._offset = offset
+
+    def __setitem__(self, y, value):
+        if (isinstance(y, slice)):
+            # Like a list, but the column can not change size.
+            indexes = range(*y.indices(len(self)))
+            values = list(value)
+
+            if (len(values) != len(indexes)):
+                raise ValueError('Can not assign %d values to a slice of %d cells in a grid column.'
+                        % (len(values), len(indexes)))
+
+            for (index, cellValue) in zip(indexes, values):
+                self[index] = cellValue
+
+            return
+
+        super().__setitem__(y, bool(value))
+
+        if (y < 0):
+            y += len(self)
+
+        if (value):
+            self._grid._bits |= 1 << (self._offset + y)
+        else:
+            self._grid._bits &= ~(1 << (self._offset + y))
@@ -0,0 +1,336 @@
+"""
+A compressed view of a layout where corridors are collapsed into weighted edges.
+
+Most open cells in a maze are corridor cells (cells with exactly two open neighbors).
+A `JunctionGraph` only keeps the other cells (junctions and dead ends) as nodes,
+and joins them with `Corridor` edges that remember the cells (and moves) along the way.
+Searching (or computing distances) over this graph touches far fewer nodes than
+searching over cells
+(see `pacai.core.distanceCalculator.JunctionMazeDistances`
+and `pacai.core.search.junction.JunctionSearchProblem`).
+"""
+
+import heapq
+import sys
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+class Corridor(object):
+    """
+    A path between two junctions (possibly the same junction) through corridor cells.
+    The cells (and actions) are in order from the start junction to the end junction.
+    """
+
+    def __init__(self, start, end, cells, actions):
+        self._start = start
+        self._end = end
+        self._cells = tuple(cells)
+        self._actions = tuple(actions)
+
+    def getActions(self, fromStart = True):
+        """
+        Get the actions that walk this corridor, from the start to the end (or the reverse).
+        """
+
+        if (fromStart):
+            return self._actions
+
+        return tuple(Actions.reverseDirection(action) for action in reversed(self._actions))
+
+    def getCells(self):
+        """
+        Get the corridor cells (not including the junctions at either end).
+        """
+
+        return self._cells
+
+    def getEnd(self):
+        return self._end
+
+    def getLength(self):
+        """
+        Get the number of moves from one end of the corridor to the other.
+        """
+
+        return len(self._actions)
+
+    def getStart(self):
+        return self._start
+
+    def __repr__(self):
+        return 'Corridor(%s -> %s, %d)' % (self._start, self._end, self.getLength())
+
+class JunctionGraph(object):
+    """
+    The junctions of a layout (open cells that do not have exactly two open neighbors)
+    joined by corridors.
+    A loop of corridor cells with no junction on it gets one of its cells as a junction.
+
+    Usually, get the graph for a layout with `pacai.core.layout.Layout.getJunctionGraph`.
+    """
+
+    def __init__(self, layout):
+        self._junctions = []
+        self._corridors = []
+
+        # {junction: [(corridor index, whether the corridor leaves from its start), ...]}
+        self._edges = {}
+
+        # {corridor cell: (corridor index, offset from the corridor's start)}
+        self._corridorCells = {}
+
+        self._build(layout)
+
+    def getCellDistances(self, position):
+        """
+        Get the maze distance from an open cell to every cell it can reach,
+        {cell: distance}.
+        This searches over junctions once, and then fills in the corridors.
+        """
+
+        distances = self._getJunctionDistances(self._getEnds(position))
+
+        cellDistances = dict(distances)
+        for corridor in self._corridors:
+            startDistance = distances.get(corridor.getStart(), sys.maxsize)
+            endDistance = distances.get(corridor.getEnd(), sys.maxsize)
+            length = corridor.getLength()
+
+            if (startDistance == sys.maxsize and endDistance == sys.maxsize):
+                continue
+
+            for (offset, cell) in enumerate(corridor.getCells(), 1):
+                cellDistances[cell] = min(startDistance + offset, endDistance + length - offset)
+
+        # Cells on the same corridor can also go straight along it.
+        corridor, offset = self.getCorridor(position)
+        if (corridor is not None):
+            for (otherOffset, cell) in enumerate(corridor.getCells(), 1):
+                cellDistances[cell] = min(cellDistances[cell], abs(offset - otherOffset))
+
+        return cellDistances
+
+    def getCorridor(self, position):
+        """
+        Get the corridor a cell is on and how many moves it is from the corridor's start,
+        (corridor, offset).
+        Junctions (and walls) are not on a corridor, (None, None).
+        """
+
+        location = self._corridorCells.get(position)
+        if (location is None):
+            return (None, None)
+
+        return (self._corridors[location[0]], location[1])
+
+    def getCorridors(self):
+        return self._corridors
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two open cells, by searching over junctions.
+        Cells that can not reach each other are sys.maxsize apart.
+        """
+
+        if (pos1 == pos2):
+            return 0
+
+        starts = self._getEnds(pos1)
+        goals = self._getEnds(pos2)
+
+        bestDistance = sys.maxsize
+
+        # Two cells on the same corridor can also go straight along it.
+        location1 = self._corridorCells.get(pos1)
+        location2 = self._corridorCells.get(pos2)
+        if (location1 is not None and location2 is not None and location1[0] == location2[0]):
+            bestDistance = abs(location1[1] - location2[1])
+
+        distances = dict(starts)
+        heap = [(distance, junction) for (junction, distance) in starts.items()]
+        heapq.heapify(heap)
+
+        while (len(heap) > 0):
+            distance, junction = heapq.heappop(heap)
+
+            if (distance >= bestDistance):
+                break
+
+            if (distance > distances[junction]):
+                continue
+
+            if (junction in goals):
+                bestDistance = min(bestDistance, distance + goals[junction])
+
+            for (neighbor, length, action) in self.getNeighbors(junction):
+                neighborDistance = distance + length
+                if (neighborDistance < distances.get(neighbor, sys.maxsize)):
+                    distances[neighbor] = neighborDistance
+                    heapq.heappush(heap, (neighborDistance, neighbor))
+
+        return bestDistance
+
+    def getExits(self, junction):
+        """
+        Get the corridors leaving a junction,
+        as a list of (corridor, whether the corridor leaves from its start) tuples.
+        A corridor that loops back to the junction leaves both ways.
+        """
+
+        return [(self._corridors[corridorIndex], fromStart)
+                for (corridorIndex, fromStart) in self._edges[junction]]
+
+    def getJunctions(self):
+        return self._junctions
+
+    def getNeighbors(self, junction):
+        """
+        Get the junctions one corridor away from a junction,
+        as a list of (neighbor, corridor length, first action) tuples.
+        """
+
+        neighbors = []
+
+        for (corridorIndex, fromStart) in self._edges[junction]:
+            corridor = self._corridors[corridorIndex]
+
+            if (fromStart):
+                neighbors.append((corridor.getEnd(), corridor.getLength(),
+                        corridor.getActions()[0]))
+            else:
+                neighbors.append((corridor.getStart(), corridor.getLength(),
+                        Actions.reverseDirection(corridor.getActions()[-1])))
+
+        return neighbors
+
+    def getNumCorridors(self):
+        return len(self._corridors)
+
+    def getNumJunctions(self):
+        return len(self._junctions)
+
+    def isJunction(self, position):
+        return position in self._edges
+
+    def _build(self, layout):
+        cellMoves = {}
+        for (x, y) in layout.walls.asList(False):
+            cellMoves[(x, y)] = [action
+                    for action in layout.getPossibleActions((x, y), Directions.STOP)
+                    if action != Directions.STOP]
+
+        for (cell, moves) in cellMoves.items():
+            if (len(moves) != 2):
+                self._addJunction(cell)
+
+        for junction in list(self._junctions):
+            self._walkCorridors(junction, cellMoves)
+
+        # Any corridor cells that were not reached are on loops without junctions.
+        for cell in cellMoves:
+            if (cell not in self._edges and cell not in self._corridorCells):
+                self._addJunction(cell)
+                self._walkCorridors(cell, cellMoves)
+
+    def _addJunction(self, cell):
+        self._junctions.append(cell)
+        self._edges[cell] = []
+
+    def _getEnds(self, position):
+        """
+        Get the junctions at either end of a cell's corridor and how far away they are,
+        {junction: distance}.
+        A junction is just itself.
+        """
+
+        if (position in self._edges):
+            return {position: 0}
+
+        location = self._corridorCells.get(position)
+        if (location is None):
+            raise ValueError('Position is not an open cell: ' + str(position))
+
+        corridor = self._corridors[location[0]]
+        offset = location[1]
+
+        ends = {corridor.getStart(): offset}
+        ends[corridor.getEnd()] = min(ends.get(corridor.getEnd(), sys.maxsize),
+                corridor.getLength() - offset)
+
+        return ends
+
+    def _getJunctionDistances(self, starts):
+        """
+        Get the distance to every junction that can be reached from the given
+        {junction: distance} starts, {junction: distance}.
+        """
+
+        distances = dict(starts)
+        heap = [(distance, junction) for (junction, distance) in starts.items()]
+        heapq.heapify(heap)
+
+        while (len(heap) > 0):
+            distance, junction = heapq.heappop(heap)
+
+            if (distance > distances[junction]):
+                continue
+
+            for (neighbor, length, action) in self.getNeighbors(junction):
+                neighborDistance = distance + length
+                if (neighborDistance < distances.get(neighbor, sys.maxsize)):
+                    distances[neighbor] = neighborDistance
+                    heapq.heappush(heap, (neighborDistance, neighbor))
+
+        return distances
+
+    def _walkCorridors(self, junction, cellMoves):
+        """
+        Walk every corridor leaving a junction that has not already been walked
+        (from its other end).
+        """
+
+        walked = set()
+        for (corridorIndex, fromStart) in self._edges[junction]:
+            corridor = self._corridors[corridorIndex]
+
+            if (fromStart):
+                walked.add(corridor.getActions()[0])
+            else:
+                walked.add(Actions.reverseDirection(corridor.getActions()[-1]))
+
+        for firstAction in cellMoves[junction]:
+            if (firstAction in walked):
+                continue
+
+            cells = []
+            actions = [firstAction]
+            position = self._move(junction, firstAction)
+
+            while (position not in self._edges):
+                cells.append(position)
+
+                # Corridor cells have exactly two moves, take the one that does not go back.
+                reverse = Actions.reverseDirection(actions[-1])
+                action = [move for move in cellMoves[position] if move != reverse][0]
+
+                actions.append(action)
+                position = self._move(position, action)
+
+            corridorIndex = len(self._corridors)
+            self._corridors.append(Corridor(junction, position, cells, actions))
+
+            for (offset, cell) in enumerate(cells):
+                self._corridorCells[cell] = (corridorIndex, offset + 1)
+
+            self._edges[junction].append((corridorIndex, True))
+            self._edges[position].append((corridorIndex, False))
+
+            # A corridor that loops back to this junction also comes in through another move.
+            if (position == junction):
+                walked.add(Actions.reverseDirection(actions[-1]))
+
+    @staticmethod
+    def _move(position, action):
+        dx, dy = Actions.directionToVector(action)
+        return (int(position[0] + dx), int(position[1] + dy))
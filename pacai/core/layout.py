@@ -1,8 +1,12 @@
+import hashlib
 import os
 import random
 
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
-from pacai.core.grid import Grid
+from pacai.core.grid import BitGrid
+from pacai.core.junctionGraph import JunctionGraph
 
 # By default, the layout directory is adjacent to this file.
 DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'layouts')
@@ -17,15 +21,112 @@ class Layout(object):
     def __init__(self, layoutText, maxGhosts = None):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
-        self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
+        self.walls = BitGrid(self.width, self.height, initialValue = False)
+        self.food = BitGrid(self.width, self.height, initialValue = False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.layoutText = layoutText
+        self._fingerprint = None
+        self._junctionGraph = None
 
         self.processLayoutText(layoutText, maxGhosts)
 
+        # Legal moves never change for a layout, so build them once.
+        self._buildLegalActions()
+
+    def getGhostPossibleActions(self, position, direction):
+        """
+        Get the actions a ghost at the given position that is moving in the given direction
+        can take (see `pacai.bin.pacman.GhostRules.getLegalActions`).
+        Ghosts cannot stop, and cannot turn around unless they reach a dead end.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        x, y = position
+        x_int, y_int = int(x + 0.5), int(y + 0.5)
+
+        # In between grid points, all agents must continue straight.
+        if (abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE):
+            if (direction == Directions.STOP):
+                return ()
+
+            return (direction,)
+
+        return self._ghostLegalActions[x_int * self.height + y_int][direction]
+
+    def getGhostLegalActionTable(self):
+        """
+        Get the table behind `Layout.getGhostPossibleActions`:
+        for every cell (indexed by x * height + y), a dict of the direction a ghost is moving in
+        to the actions it can take (walls have an empty dict).
+
+        The table is shared and must not be modified.
+        """
+
+        return self._ghostLegalActions
+
+    def getFixedGhostPossibleActions(self, fixedPosition, direction):
+        """
+        The same as `Layout.getGhostPossibleActions`,
+        but for a fixed point position (see `pacai.core.actions.Actions.FIXED_POINT_SCALE`).
+        """
+
+        fx, fy = fixedPosition
+
+        # In between grid points, all agents must continue straight.
+        if ((fx | fy) & 1):
+            if (direction == Directions.STOP):
+                return ()
+
+            return (direction,)
+
+        return self._ghostLegalActions[(fx >> 1) * self.height + (fy >> 1)][direction]
+
+    def getFixedPossibleActions(self, fixedPosition, direction):
+        """
+        The same as `Layout.getPossibleActions`,
+        but for a fixed point position (see `pacai.core.actions.Actions.FIXED_POINT_SCALE`).
+        """
+
+        fx, fy = fixedPosition
+
+        # In between grid points, all agents must continue straight.
+        if ((fx | fy) & 1):
+            return (direction,)
+
+        return self._legalActions[(fx >> 1) * self.height + (fy >> 1)]
+
+    def getFingerprint(self):
+        """
+        Get a stable identifier for this layout's board (its size and walls).
+        Layouts with the same fingerprint have the same maze distances and legal moves,
+        even if they have different food, capsules, or agents.
+        """
+
+        # Walls never change for a layout, so the fingerprint is only computed once.
+        if (self._fingerprint is None):
+            walls = self.walls.getBits()
+            data = b'%d,%d,' % (self.width, self.height)
+            data += walls.to_bytes((walls.bit_length() + 7) // 8, 'little')
+
+            self._fingerprint = hashlib.sha1(data).hexdigest()
+
+        return self._fingerprint
+
+    def getJunctionGraph(self):
+        """
+        Get this layout's board with its corridors collapsed into weighted edges between
+        junctions (see `pacai.core.junctionGraph.JunctionGraph`).
+        The graph is built the first time it is asked for.
+        """
+
+        if (self._junctionGraph is None):
+            self._junctionGraph = JunctionGraph(self)
+
+        return self._junctionGraph
+
     def getNumGhosts(self):
         return self.numGhosts
 
@@ -36,6 +137,36 @@ class Layout(object):
     def getHeight(self):
         return self.height
 
+    def getPossibleActions(self, position, direction):
+        """
+        Get the actions an agent at the given position that is moving in the given direction
+        can take.
+        This is the same as `pacai.core.actions.Actions.getPossibleActions` on this layout's walls,
+        but uses the precomputed table of legal moves.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        x, y = position
+        x_int, y_int = int(x + 0.5), int(y + 0.5)
+
+        # In between grid points, all agents must continue straight.
+        if (abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE):
+            return (direction,)
+
+        return self._legalActions[x_int * self.height + y_int]
+
+    def getLegalActionTable(self):
+        """
+        Get the table behind `Layout.getPossibleActions`:
+        the legal actions (including stopping) for every cell, indexed by x * height + y
+        (walls have no actions).
+
+        The table is shared and must not be modified.
+        """
+
+        return self._legalActions
+
     def getWidth(self):
         return self.width
 
@@ -72,6 +203,29 @@ class Layout(object):
         row, col = [int(x) for x in pacPos]
         return ghostPos in self.visibility[row][col][pacDirection]
 
+    def __getstate__(self):
+        # The move tables and caches are rebuilt when unpickling (see `Layout.__setstate__`).
+        state = self.__dict__.copy()
+        for name in ('_legalActions', '_ghostLegalActions', '_fingerprint', '_junctionGraph'):
+            state.pop(name, None)
+
+        return state
+
+    def __setstate__(self, state):
+        # Layouts pickled before the move tables existed (e.g. in old replays)
+        # are missing them, so always rebuild them.
+        self.__dict__.update(state)
+
+        # Old layouts also kept their walls and food in plain grids.
+        for name in ('walls', 'food'):
+            grid = getattr(self, name)
+            if (not isinstance(grid, BitGrid)):
+                setattr(self, name, BitGrid.fromGrid(grid))
+
+        self._fingerprint = None
+        self._junctionGraph = None
+        self._buildLegalActions()
+
     def __str__(self):
         return "\n".join(self.layoutText)
 
@@ -118,6 +272,52 @@ class Layout(object):
             self.agentPositions.append((int(layoutChar), (x, y)))
             self.numGhosts += 1
 
+    def _buildLegalActions(self):
+        """
+        Build the tables of legal moves for every cell, indexed by (x * height + y).
+        Moving off the board is never legal.
+        """
+
+        legalActions = []
+        ghostLegalActions = []
+
+        for x in range(self.width):
+            for y in range(self.height):
+                if (self.walls[x][y]):
+                    legalActions.append(())
+                    ghostLegalActions.append({})
+                    continue
+
+                possible = []
+                for direction, (dx, dy) in Actions._directionsAsList:
+                    nextX = x + dx
+                    nextY = y + dy
+
+                    if (nextX < 0 or nextX >= self.width or nextY < 0 or nextY >= self.height):
+                        continue
+
+                    if (not self.walls[nextX][nextY]):
+                        possible.append(direction)
+
+                legalActions.append(tuple(possible))
+
+                # Ghost variants depend on the direction the ghost is coming from.
+                moves = [direction for direction in possible if direction != Directions.STOP]
+                ghostActions = {}
+
+                for direction in Actions._directions:
+                    reverse = Actions.reverseDirection(direction)
+
+                    if (reverse in moves and len(moves) > 1):
+                        ghostActions[direction] = tuple(move for move in moves if move != reverse)
+                    else:
+                        ghostActions[direction] = tuple(moves)
+
+                ghostLegalActions.append(ghostActions)
+
+        self._legalActions = tuple(legalActions)
+        self._ghostLegalActions = tuple(ghostLegalActions)
+
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
     if (not name.endswith('.lay')):
         name += '.lay'
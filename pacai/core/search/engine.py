@@ -0,0 +1,919 @@
+"""
+A general graph search engine.
+
+Most of the searches here share `graphSearch`, and only differ in their `Frontier`
+(the order in which generated nodes are expanded).
+The bidirectional searches also search backwards from the goal, for problems with a single goal
+that implement `pacai.core.search.problem.SearchProblem.predecessorStates`.
+The search functions take the same arguments as the ones in `pacai.student.search`,
+so they can be used anywhere those are (e.g. as the `fn` of a
+`pacai.agents.search.base.SearchAgent`: `--agent-args fn=pacai.core.search.engine.bfs`).
+
+Every search records a `SearchStats` on its problem
+(see `pacai.core.search.problem.SearchProblem.getSearchStats`).
+"""
+
+import abc
+import collections
+import heapq
+import time
+
+from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.util.priorityQueue import IndexedPriorityQueue
+
+# The default number of nodes a memory-bounded search can keep.
+DEFAULT_MAX_NODES = 100000
+
+class SearchStats(object):
+    """
+    Counters from a single search.
+    """
+
+    def __init__(self):
+        # The number of nodes that were expanded (had their successors generated).
+        self.expanded = 0
+
+        # The number of successor nodes that were generated.
+        self.generated = 0
+
+        # The number of nodes that were expanded again after a cheaper path was found.
+        self.reopened = 0
+
+        # The most nodes that were on the frontier at once.
+        self.maxFrontierSize = 0
+
+        # The wall time of the search (in seconds).
+        self.time = 0.0
+
+    def __str__(self):
+        return ('expanded: %d, generated: %d, reopened: %d, max frontier: %d, time: %.3fs'
+                % (self.expanded, self.generated, self.reopened, self.maxFrontierSize, self.time))
+
+class Frontier(abc.ABC):
+    """
+    The nodes that have been generated, but not expanded.
+    A node is a tuple: (state, cost of the path to the state, parent state, action).
+    """
+
+    # Whether nodes come out in priority order.
+    # Only then can a later path to an expanded state be cheaper and worth expanding again.
+    PRIORITIZED = False
+
+    @abc.abstractmethod
+    def pop(self):
+        """
+        Remove and return the next node to expand.
+        """
+
+        pass
+
+    @abc.abstractmethod
+    def push(self, node, priority):
+        """
+        Add a node.
+        Frontiers that are not ordered by priority ignore it.
+        """
+
+        pass
+
+    def isEmpty(self):
+        return len(self) == 0
+
+    @abc.abstractmethod
+    def __len__(self):
+        pass
+
+class StackFrontier(Frontier):
+    """
+    Expand the most recently generated node first (depth first).
+    """
+
+    def __init__(self):
+        self._nodes = []
+
+    def pop(self):
+        return self._nodes.pop()
+
+    def push(self, node, priority):
+        self._nodes.append(node)
+
+    def __len__(self):
+        return len(self._nodes)
+
+class QueueFrontier(Frontier):
+    """
+    Expand the least recently generated node first (breadth first).
+    """
+
+    def __init__(self):
+        self._nodes = collections.deque()
+
+    def pop(self):
+        return self._nodes.popleft()
+
+    def push(self, node, priority):
+        self._nodes.append(node)
+
+    def __len__(self):
+        return len(self._nodes)
+
+class HeapFrontier(Frontier):
+    """
+    Expand the node with the lowest priority first.
+    Ties go to the node that was generated first (or last, if lifo is true).
+    """
+
+    PRIORITIZED = True
+
+    def __init__(self, lifo = False):
+        self._heap = []
+        self._count = 0
+        self._step = -1 if lifo else 1
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def push(self, node, priority):
+        self._count += self._step
+        heapq.heappush(self._heap, (priority, self._count, node))
+
+    def __len__(self):
+        return len(self._heap)
+
+class IndexedHeapFrontier(Frontier):
+    """
+    Expand the node with the lowest priority first (ties go to the node generated first),
+    keeping at most one node per state.
+    When a state on the frontier is reached by a better path, that node's priority is lowered
+    (a decrease-key) instead of adding another node,
+    so the frontier never holds more nodes than there are distinct states.
+    """
+
+    PRIORITIZED = True
+
+    def __init__(self):
+        self._queue = IndexedPriorityQueue()
+
+        # {state: node}
+        self._nodes = {}
+
+    def pop(self):
+        return self._nodes.pop(self._queue.pop())
+
+    def push(self, node, priority):
+        if (self._queue.push(node[0], priority)):
+            self._nodes[node[0]] = node
+
+    def __len__(self):
+        return len(self._queue)
+
+def graphSearch(problem, frontier, heuristic = None):
+    """
+    Search for a path to a goal, expanding nodes in the order given by the frontier.
+    Nodes are prioritized by the cost of their path (plus the heuristic, if there is one).
+
+    States are closed (with a pointer to their parent) when they are expanded.
+    With a prioritized frontier, they are expanded again if they are reached by a cheaper path
+    (a reopening, which only happens with inconsistent heuristics).
+    Goals are checked when a node is expanded, so with a heap frontier the path is optimal
+    (given an admissible heuristic).
+
+    Returns the list of actions to the goal, or None if no goal can be reached.
+    """
+
+    stats = SearchStats()
+    problem.setSearchStats(stats)
+    startTime = time.time()
+
+    # {state: (cost, parent state, action)}
+    closed = {}
+
+    start = problem.startingState()
+    frontier.push((start, 0, None, None), _getPriority(start, 0, problem, heuristic))
+    stats.maxFrontierSize = 1
+
+    reopen = frontier.PRIORITIZED
+    goal = None
+
+    while (not frontier.isEmpty()):
+        state, cost, parent, action = frontier.pop()
+
+        if (state in closed):
+            if (not reopen or cost >= closed[state][0]):
+                continue
+
+            stats.reopened += 1
+
+        closed[state] = (cost, parent, action)
+
+        if (problem.isGoal(state)):
+            goal = state
+            break
+
+        stats.expanded += 1
+
+        for (successor, successorAction, stepCost) in problem.successorStates(state):
+            stats.generated += 1
+
+            successorCost = cost + stepCost
+            if (successor in closed
+                    and (not reopen or successorCost >= closed[successor][0])):
+                continue
+
+            frontier.push((successor, successorCost, state, successorAction),
+                    _getPriority(successor, successorCost, problem, heuristic))
+
+        if (len(frontier) > stats.maxFrontierSize):
+            stats.maxFrontierSize = len(frontier)
+
+    stats.time = time.time() - startTime
+
+    if (goal is None):
+        return None
+
+    return _buildPath(closed, goal)
+
+def depthFirstSearch(problem):
+    """
+    Search the deepest nodes in the search tree first.
+    """
+
+    return graphSearch(problem, StackFrontier())
+
+def breadthFirstSearch(problem):
+    """
+    Search the shallowest nodes in the search tree first.
+    """
+
+    return graphSearch(problem, QueueFrontier())
+
+def uniformCostSearch(problem):
+    """
+    Search the node of least total cost first.
+    """
+
+    return graphSearch(problem, IndexedHeapFrontier())
+
+def aStarSearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    """
+
+    return graphSearch(problem, IndexedHeapFrontier(), heuristic)
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    Search the shallowest nodes first, from both the start and the goal
+    (through `pacai.core.search.problem.SearchProblem.predecessorStates`),
+    until the two searches meet.
+    Like `breadthFirstSearch`, step costs are ignored.
+
+    The problem must have a single goal state, `problem.goal`
+    (like `pacai.core.search.position.PositionSearchProblem`).
+    Each pass expands a whole level of the side with the smaller frontier,
+    so the first state reached by both sides is on a shortest path.
+    """
+
+    stats = SearchStats()
+    problem.setSearchStats(stats)
+    startTime = time.time()
+
+    start = problem.startingState()
+    goal = problem.goal
+
+    # {state: (parent state, action)}, where the backward parent is the next state to the goal.
+    forwardParents = {start: None}
+    backwardParents = {goal: None}
+
+    forwardLevel = [start]
+    backwardLevel = [goal]
+    stats.maxFrontierSize = 2
+
+    meeting = start if (start == goal) else None
+
+    while (meeting is None and len(forwardLevel) > 0 and len(backwardLevel) > 0):
+        forward = (len(forwardLevel) <= len(backwardLevel))
+        if (forward):
+            level, parents, otherParents = forwardLevel, forwardParents, backwardParents
+            expand = problem.successorStates
+        else:
+            level, parents, otherParents = backwardLevel, backwardParents, forwardParents
+            expand = problem.predecessorStates
+
+        nextLevel = []
+        for state in level:
+            stats.expanded += 1
+
+            for (neighbor, action, stepCost) in expand(state):
+                stats.generated += 1
+
+                if (neighbor in parents):
+                    continue
+
+                parents[neighbor] = (state, action)
+                nextLevel.append(neighbor)
+
+                if (neighbor in otherParents):
+                    meeting = neighbor
+                    break
+
+            if (meeting is not None):
+                break
+
+        if (forward):
+            forwardLevel = nextLevel
+        else:
+            backwardLevel = nextLevel
+
+        frontierSize = len(forwardLevel) + len(backwardLevel)
+        if (frontierSize > stats.maxFrontierSize):
+            stats.maxFrontierSize = frontierSize
+
+    stats.time = time.time() - startTime
+
+    if (meeting is None):
+        return None
+
+    return _joinPaths(forwardParents, backwardParents, meeting)
+
+def bidirectionalAStarSearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node that has the lowest combined cost and heuristic first,
+    from both the start and the goal
+    (through `pacai.core.search.problem.SearchProblem.predecessorStates`).
+
+    The problem must have a single goal state, `problem.goal`
+    (like `pacai.core.search.position.PositionSearchProblem`).
+    The backward search estimates the cost from the start with the same heuristic,
+    but with `problem.goal` swapped for the start state.
+    Each side is a plain A* towards the other end (front-to-end),
+    and the search stops once either side can no longer beat the best path through a state
+    reached by both sides.
+    With a consistent heuristic, that path is optimal.
+    """
+
+    stats = SearchStats()
+    problem.setSearchStats(stats)
+    startTime = time.time()
+
+    start = problem.startingState()
+    goal = problem.goal
+
+    if (start == goal):
+        stats.time = time.time() - startTime
+        return []
+
+    forwardSide = _AStarSide(start, problem, heuristic, problem.successorStates)
+    backwardSide = _AStarSide(goal, _ReversedProblem(problem, start), heuristic,
+            problem.predecessorStates)
+    stats.maxFrontierSize = 2
+
+    bestCost = float('inf')
+    meeting = None
+
+    while (len(forwardSide.queue) > 0 and len(backwardSide.queue) > 0):
+        if (max(forwardSide.peekPriority(), backwardSide.peekPriority()) >= bestCost):
+            break
+
+        if (len(forwardSide.queue) <= len(backwardSide.queue)):
+            side, otherSide = forwardSide, backwardSide
+        else:
+            side, otherSide = backwardSide, forwardSide
+
+        stats.expanded += 1
+        for neighbor in side.expand():
+            stats.generated += 1
+
+            if (neighbor in otherSide.costs):
+                cost = side.costs[neighbor] + otherSide.costs[neighbor]
+                if (cost < bestCost):
+                    bestCost = cost
+                    meeting = neighbor
+
+        frontierSize = len(forwardSide.queue) + len(backwardSide.queue)
+        if (frontierSize > stats.maxFrontierSize):
+            stats.maxFrontierSize = frontierSize
+
+    stats.time = time.time() - startTime
+
+    if (meeting is None):
+        return None
+
+    return _joinPaths(forwardSide.parents, backwardSide.parents, meeting)
+
+def iterativeDeepeningAStarSearch(problem, heuristic = nullHeuristic):
+    """
+    Search depth first, cutting off paths whose combined cost and heuristic is over a bound,
+    and raising the bound to the smallest cut off value until a goal is found (IDA*).
+
+    Only the current path (and the successors of the states on it) are kept in memory,
+    but states that are reached by more than one path are searched again each time.
+    States already on the current path are skipped.
+    With an admissible heuristic, the path is optimal.
+
+    The max frontier size in the `SearchStats` is the most states that were on the path at once.
+    """
+
+    stats = SearchStats()
+    problem.setSearchStats(stats)
+    startTime = time.time()
+
+    start = problem.startingState()
+    bound = heuristic(start, problem)
+
+    path = None
+    if (problem.isGoal(start)):
+        path = []
+
+    while (path is None and bound != float('inf')):
+        path, bound = _boundedDepthFirstSearch(problem, heuristic, start, bound, stats)
+
+    stats.time = time.time() - startTime
+    return path
+
+def memoryBoundedAStarSearch(problem, heuristic = nullHeuristic, maxNodes = DEFAULT_MAX_NODES):
+    """
+    Search the node that has the lowest combined cost and heuristic first,
+    keeping at most maxNodes nodes in memory (simplified memory-bounded A*, SMA*).
+
+    Nodes generate their successors one at a time.
+    When memory is full, the leaf with the highest cost (the shallowest, on ties) is forgotten,
+    and its parent remembers its cost so that it can be generated again when it is the best option.
+    Paths that can not fit in memory are cut off.
+    A state is not added if it is already in memory with a path that is no more expensive.
+
+    With an admissible heuristic, the path is optimal if the optimal path fits in memory
+    (is less than maxNodes states long).
+    Otherwise, a worse path (or None) may be returned.
+    The tighter the budget, the more often nodes are forgotten and generated again,
+    so a budget far below what `aStarSearch` needs can take a very long time
+    (especially in open areas, where many paths reach the same states).
+
+    The max frontier size in the `SearchStats` is the most nodes that were in memory at once,
+    and reopened counts the nodes that had their successors generated again after being forgotten.
+    """
+
+    if (maxNodes < 1):
+        raise ValueError('The node budget must be positive, got %d.' % (maxNodes))
+
+    stats = SearchStats()
+    problem.setSearchStats(stats)
+    startTime = time.time()
+
+    path = _MemoryBoundedSearch(problem, heuristic, maxNodes, stats).run()
+
+    stats.time = time.time() - startTime
+    return path
+
+def _boundedDepthFirstSearch(problem, heuristic, start, bound, stats):
+    """
+    One iteration of IDA*.
+    Returns (actions to a goal, bound) if a goal was found under the bound,
+    or (None, the smallest value that was over the bound) if not.
+    """
+
+    nextBound = float('inf')
+
+    states = [start]
+    costs = [0]
+    actions = []
+    onPath = {start}
+
+    stats.expanded += 1
+    successors = [iter(problem.successorStates(start))]
+
+    while (len(successors) > 0):
+        try:
+            successor, action, stepCost = next(successors[-1])
+        except StopIteration:
+            successors.pop()
+            onPath.remove(states.pop())
+            costs.pop()
+
+            if (len(actions) > 0):
+                actions.pop()
+
+            continue
+
+        stats.generated += 1
+
+        if (successor in onPath):
+            continue
+
+        cost = costs[-1] + stepCost
+        priority = cost + heuristic(successor, problem)
+        if (priority > bound):
+            nextBound = min(nextBound, priority)
+            continue
+
+        actions.append(action)
+        if (problem.isGoal(successor)):
+            return (actions, bound)
+
+        states.append(successor)
+        costs.append(cost)
+        onPath.add(successor)
+
+        stats.expanded += 1
+        successors.append(iter(problem.successorStates(successor)))
+
+        if (len(states) > stats.maxFrontierSize):
+            stats.maxFrontierSize = len(states)
+
+    return (None, nextBound)
+
+class _AStarSide(object):
+    """
+    One direction of a bidirectional A*.
+    """
+
+    def __init__(self, root, problem, heuristic, expand):
+        self.problem = problem
+        self.heuristic = heuristic
+        self._expand = expand
+
+        self.queue = IndexedPriorityQueue()
+        self.queue.push(root, heuristic(root, problem))
+
+        # {state: cost of the best path from the root}
+        self.costs = {root: 0}
+
+        # {state: (parent state, action)}
+        self.parents = {root: None}
+
+        self.closed = set()
+
+    def expand(self):
+        """
+        Expand the best state on the queue,
+        and return the neighbors that were generated.
+        """
+
+        state = self.queue.pop()
+        self.closed.add(state)
+        cost = self.costs[state]
+
+        neighbors = []
+        for (neighbor, action, stepCost) in self._expand(state):
+            neighbors.append(neighbor)
+
+            # With a consistent heuristic, closed states already have their best path.
+            neighborCost = cost + stepCost
+            if (neighbor in self.closed
+                    or (neighbor in self.costs and neighborCost >= self.costs[neighbor])):
+                continue
+
+            self.costs[neighbor] = neighborCost
+            self.parents[neighbor] = (state, action)
+            self.queue.push(neighbor, neighborCost + self.heuristic(neighbor, self.problem))
+
+        return neighbors
+
+    def peekPriority(self):
+        return self.queue.peekPriority()
+
+class _ReversedProblem(object):
+    """
+    A view of a problem with its goal swapped for another state (the start),
+    so heuristics that look at `problem.goal` estimate the cost from the start instead.
+    """
+
+    def __init__(self, problem, goal):
+        self._problem = problem
+        self.goal = goal
+
+    def __getattr__(self, name):
+        return getattr(self._problem, name)
+
+class _BoundedNode(object):
+    """
+    A node in the tree of a memory-bounded A*.
+    """
+
+    __slots__ = ('state', 'parent', 'index', 'action', 'cost', 'depth', 'priority',
+            'successors', 'nextIndex', 'children', 'forgotten', 'reopened',
+            'queued', 'version', 'inMemory')
+
+    def __init__(self, state, parent, index, action, cost, priority, reopened = False):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.priority = priority
+        self.reopened = reopened
+
+        # The index of this node in its parent's successors.
+        self.index = index
+        self.depth = 0 if (parent is None) else parent.depth + 1
+
+        # The successors of the state (once it is expanded),
+        # and the index of the next one that has never been generated.
+        self.successors = None
+        self.nextIndex = 0
+
+        # {successor index: node} for the successors that are in memory.
+        self.children = {}
+
+        # {successor index: priority} for the successors that were forgotten.
+        self.forgotten = {}
+
+        self.queued = False
+        self.version = 0
+        self.inMemory = True
+
+    def canGenerate(self):
+        """
+        Whether this node has successors to (re)generate.
+        """
+
+        return (self.successors is None or self.nextIndex < len(self.successors)
+                or len(self.forgotten) > 0)
+
+    def isFullyGenerated(self):
+        return self.successors is not None and self.nextIndex == len(self.successors)
+
+class _MemoryBoundedSearch(object):
+    """
+    The state of a single memory-bounded A* (see `memoryBoundedAStarSearch`).
+    The queue is kept as two heaps (best first and worst leaf first) with stale entries,
+    which are skipped when they reach the top and dropped when the heaps get too large.
+    """
+
+    def __init__(self, problem, heuristic, maxNodes, stats):
+        self._problem = problem
+        self._heuristic = heuristic
+        self._maxNodes = maxNodes
+        self._stats = stats
+
+        # Entries: (priority, -depth, count, version, node).
+        self._best = []
+
+        # Entries: (-priority, depth, count, version, node), only for leaves.
+        self._worst = []
+
+        self._count = 0
+        self._numNodes = 0
+
+        # {state: the cheapest node in memory for the state}
+        self._nodes = {}
+
+    def run(self):
+        start = self._problem.startingState()
+        root = _BoundedNode(start, None, None, None, 0, self._heuristic(start, self._problem))
+        self._add(root)
+
+        while (True):
+            node = self._peekBest()
+            if (node is None or node.priority == float('inf')):
+                return None
+
+            if (self._problem.isGoal(node.state)):
+                return self._getPath(node)
+
+            if (node.successors is None):
+                node.successors = self._problem.successorStates(node.state)
+                self._stats.expanded += 1
+
+                if (node.reopened):
+                    self._stats.reopened += 1
+
+            if (node.canGenerate()):
+                child = self._generate(node)
+                if (child is not None and (self._numNodes < self._maxNodes
+                        or self._forgetWorst(node))):
+                    node.children[child.index] = child
+                    self._add(child)
+
+            if (not node.canGenerate()):
+                node.queued = False
+
+            self._backup(node)
+
+    def _add(self, node):
+        self._numNodes += 1
+        if (self._numNodes > self._stats.maxFrontierSize):
+            self._stats.maxFrontierSize = self._numNodes
+
+        self._nodes[node.state] = node
+        self._enqueue(node)
+
+    def _backup(self, node):
+        """
+        Once all the successors of a node have been generated,
+        its priority is the best priority of its successors (in memory or forgotten).
+        Pass any change up to its ancestors.
+        Nodes with no successors left are dead ends, and are removed.
+        """
+
+        while (node is not None and node.isFullyGenerated()):
+            priorities = [child.priority for child in node.children.values()]
+            priorities += node.forgotten.values()
+
+            parent = node.parent
+
+            if (len(priorities) == 0):
+                if (parent is None):
+                    node.priority = float('inf')
+                    self._enqueue(node)
+                    return
+
+                self._remove(node)
+                self._updateQueue(parent)
+
+                node = parent
+                continue
+
+            priority = min(priorities)
+            if (priority <= node.priority):
+                return
+
+            node.priority = priority
+            self._updateQueue(node)
+
+            node = parent
+
+    def _enqueue(self, node):
+        node.queued = True
+        node.version += 1
+        self._count += 1
+
+        heapq.heappush(self._best,
+                (node.priority, -node.depth, self._count, node.version, node))
+
+        if (len(node.children) == 0 and node.parent is not None):
+            heapq.heappush(self._worst,
+                    (-node.priority, node.depth, self._count, node.version, node))
+
+        # Drop stale entries, so the heaps stay within a constant factor of the budget.
+        if (len(self._best) > 4 * self._maxNodes):
+            self._best = [entry for entry in self._best if self._isCurrent(entry)]
+            heapq.heapify(self._best)
+
+        if (len(self._worst) > 4 * self._maxNodes):
+            self._worst = [entry for entry in self._worst if self._isCurrent(entry)]
+            heapq.heapify(self._worst)
+
+    def _forgetWorst(self, exclude):
+        """
+        Forget the worst leaf (other than the given node),
+        and have its parent remember its priority.
+        Returns False if there is no leaf to forget.
+        """
+
+        forgot = False
+        skipped = None
+
+        while (len(self._worst) > 0):
+            entry = heapq.heappop(self._worst)
+            node = entry[4]
+
+            if (not self._isCurrent(entry) or len(node.children) > 0):
+                continue
+
+            if (node is exclude):
+                skipped = entry
+                continue
+
+            parent = node.parent
+            parent.forgotten[node.index] = node.priority
+            self._remove(node)
+            self._updateQueue(parent)
+
+            forgot = True
+            break
+
+        if (skipped is not None):
+            heapq.heappush(self._worst, skipped)
+
+        return forgot
+
+    def _generate(self, node):
+        """
+        Generate the next successor of a node: one that has never been generated,
+        or the best one that was forgotten.
+        Returns None if the successor is not worth keeping.
+        """
+
+        if (node.nextIndex < len(node.successors)):
+            index = node.nextIndex
+            node.nextIndex += 1
+            priority = node.priority
+            reopened = False
+        else:
+            index = min(node.forgotten, key = node.forgotten.get)
+            priority = node.forgotten.pop(index)
+            reopened = True
+
+        self._stats.generated += 1
+
+        state, action, stepCost = node.successors[index]
+        cost = node.cost + stepCost
+
+        existing = self._nodes.get(state)
+        if (existing is not None and existing.cost <= cost):
+            return None
+
+        # A path can not be longer than the budget,
+        # and a path that uses the whole budget can not go on (unless it is already at a goal).
+        length = node.depth + 2
+        if (length > self._maxNodes
+                or (length == self._maxNodes and not self._problem.isGoal(state))):
+            return None
+
+        priority = max(priority, cost + self._heuristic(state, self._problem))
+        return _BoundedNode(state, node, index, action, cost, priority, reopened)
+
+    def _getPath(self, node):
+        actions = []
+        while (node.parent is not None):
+            actions.append(node.action)
+            node = node.parent
+
+        actions.reverse()
+        return actions
+
+    def _isCurrent(self, entry):
+        node = entry[4]
+        return node.inMemory and node.queued and node.version == entry[3]
+
+    def _peekBest(self):
+        while (len(self._best) > 0):
+            if (self._isCurrent(self._best[0])):
+                return self._best[0][4]
+
+            heapq.heappop(self._best)
+
+        return None
+
+    def _remove(self, node):
+        del node.parent.children[node.index]
+
+        node.inMemory = False
+        node.queued = False
+        self._numNodes -= 1
+
+        if (self._nodes.get(node.state) is node):
+            del self._nodes[node.state]
+
+    def _updateQueue(self, node):
+        if (node.canGenerate()):
+            self._enqueue(node)
+        else:
+            node.queued = False
+
+def _buildPath(closed, goal):
+    """
+    Follow the parent pointers back from a goal, and get the actions along the way.
+    """
+
+    actions = []
+
+    state = goal
+    while (True):
+        cost, parent, action = closed[state]
+        if (parent is None):
+            break
+
+        actions.append(action)
+        state = parent
+
+    actions.reverse()
+    return actions
+
+def _joinPaths(forwardParents, backwardParents, meeting):
+    """
+    Join the path from the start to the meeting state with the path from there to the goal.
+    """
+
+    actions = []
+
+    state = meeting
+    while (forwardParents[state] is not None):
+        state, action = forwardParents[state]
+        actions.append(action)
+
+    actions.reverse()
+
+    state = meeting
+    while (backwardParents[state] is not None):
+        state, action = backwardParents[state]
+        actions.append(action)
+
+    return actions
+
+def _getPriority(state, cost, problem, heuristic):
+    if (heuristic is None):
+        return cost
+
+    return cost + heuristic(state, problem)
+
+# Abbreviations
+
+dfs = depthFirstSearch
+bfs = breadthFirstSearch
+ucs = uniformCostSearch
+astar = aStarSearch
+bibfs = bidirectionalBreadthFirstSearch
+biastar = bidirectionalAStarSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = memoryBoundedAStarSearch
@@ -1,5 +1,6 @@
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
+from pacai.core.grid import BitGrid
 from pacai.core.search.problem import SearchProblem
 
 class FoodSearchProblem(SearchProblem):
@@ -62,3 +63,104 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+class BitmaskFoodSearchProblem(SearchProblem):
+    """
+    The same problem as `FoodSearchProblem` (with the same successors, in the same order),
+    but with a compact state: a tuple (cellIndex, foodBits) of plain ints.
+    The cell index is (x * height + y) and the food bits are a bitmask with the same indexing
+    (see `pacai.core.grid.BitGrid`), so states are cheap to build, hash, and compare.
+
+    Use `BitmaskFoodSearchProblem.toFoodSearchState` (or `BitmaskFoodSearchProblem.wrapHeuristic`)
+    to reuse heuristics written for `FoodSearchProblem` states.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__()
+
+        self.walls = startingGameState.getWalls()
+        self.startingGameState = startingGameState
+        self.heuristicInfo = {}  # A dictionary for the heuristic to store information
+
+        self._width = self.walls.getWidth()
+        self._height = self.walls.getHeight()
+
+        food = startingGameState.getFood()
+        if (not isinstance(food, BitGrid)):
+            food = BitGrid.fromGrid(food)
+
+        self.start = (self.toCellIndex(startingGameState.getPacmanPosition()), food.getBits())
+
+        # For each cell: the (next cell index, action, mask that clears the next cell) moves.
+        self._moves = [()] * (self._width * self._height)
+        for (x, y) in self.walls.asList(False):
+            moves = []
+
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(direction)
+                nextx, nexty = int(x + dx), int(y + dy)
+
+                if (not self.walls[nextx][nexty]):
+                    nextIndex = nextx * self._height + nexty
+                    moves.append((nextIndex, direction, ~(1 << nextIndex)))
+
+            self._moves[x * self._height + y] = tuple(moves)
+
+    def startingState(self):
+        return self.start
+
+    def isGoal(self, state):
+        return state[1] == 0
+
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        self._numExpanded += 1
+
+        food = state[1]
+        return [((nextIndex, food & clearMask), direction, 1)
+                for (nextIndex, direction, clearMask) in self._moves[state[0]]]
+
+    def actionsCost(self, actions):
+        """
+        Returns the cost of a particular sequence of actions.
+        If those actions include an illegal move, return 999999.
+        """
+
+        cellIndex = self.startingState()[0]
+        for action in actions:
+            for (nextIndex, direction, clearMask) in self._moves[cellIndex]:
+                if (direction == action):
+                    cellIndex = nextIndex
+                    break
+            else:
+                return 999999
+
+        return len(actions)
+
+    def toCellIndex(self, position):
+        x, y = position
+        return int(x) * self._height + int(y)
+
+    def toFoodGrid(self, foodBits):
+        return BitGrid.fromBits(self._width, self._height, foodBits)
+
+    def toFoodSearchState(self, state):
+        """
+        Convert a state of this problem into a `FoodSearchProblem` state: (position, foodGrid).
+        """
+
+        return (self.toPosition(state[0]), self.toFoodGrid(state[1]))
+
+    def toPosition(self, cellIndex):
+        return (cellIndex // self._height, cellIndex % self._height)
+
+    def wrapHeuristic(self, heuristic):
+        """
+        Adapt a heuristic for `FoodSearchProblem` states, e.g.
+        `pacai.student.searchAgents.foodHeuristic`, to the states of this problem.
+        """
+
+        return lambda state, problem: heuristic(self.toFoodSearchState(state), problem)
@@ -0,0 +1,141 @@
+from pacai.core.actions import Actions
+from pacai.core.search.position import DEFAULT_GOAL_POSITION
+from pacai.core.search.problem import SearchProblem
+
+class JunctionSearchProblem(SearchProblem):
+    """
+    A `pacai.core.search.problem.SearchProblem` for finding a specific location on the board
+    (like `pacai.core.search.position.PositionSearchProblem`),
+    that moves a whole corridor at a time (see `pacai.core.junctionGraph.JunctionGraph`).
+
+    The state space consists of (x, y) positions: the junctions, the start, and the goal.
+    Each action is the tuple of moves that walks a corridor (or part of one),
+    and costs the number of moves.
+    Use `JunctionSearchProblem.toActions` to get the moves of a whole path.
+    """
+
+    def __init__(self, gameState, goal = DEFAULT_GOAL_POSITION, start = None):
+        """
+        Args:
+            gameState: A `pacai.core.gamestate.AbstractGameState`.
+            goal: The target position.
+        """
+
+        super().__init__()
+
+        self.walls = gameState.getWalls()
+        self.goal = goal
+        self.graph = gameState.getInitialLayout().getJunctionGraph()
+
+        self.startState = start
+        if (self.startState is None):
+            self.startState = gameState.getAgentPosition(0)
+
+        if (self.startState is None):
+            raise ValueError("Could not find starting location.")
+
+        # The goal can be part way along a corridor, (corridor, offset).
+        self._goalCorridor, self._goalOffset = self.graph.getCorridor(goal)
+
+    def actionsCost(self, actions):
+        """
+        Returns the number of moves in a path (a list of corridor actions).
+        If those actions include an illegal move, return 999999.
+        """
+
+        if (actions is None):
+            return 999999
+
+        x, y = self.startingState()
+        cost = 0
+
+        for action in JunctionSearchProblem.toActions(actions):
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if (self.walls[x][y]):
+                return 999999
+
+            cost += 1
+
+        return cost
+
+    def isGoal(self, state):
+        if (state != self.goal):
+            return False
+
+        # Register the locations we have visited.
+        # This allows the GUI to highlight them.
+        self._visitedLocations.add(state)
+        self._visitHistory.append(state)
+
+        return True
+
+    def startingState(self):
+        return self.startState
+
+    def successorStates(self, state):
+        """
+        Returns the junctions (or goal) at the other end of each corridor leaving the state,
+        the moves along the corridor, and the number of moves.
+        """
+
+        successors = []
+
+        if (self.graph.isJunction(state)):
+            for (corridor, fromStart) in self.graph.getExits(state):
+                self._addCorridor(successors, corridor, 0 if fromStart else corridor.getLength(),
+                        fromStart)
+        else:
+            corridor, offset = self.graph.getCorridor(state)
+            if (corridor is None):
+                raise ValueError('Position is not an open cell: ' + str(state))
+
+            self._addCorridor(successors, corridor, offset, True)
+            self._addCorridor(successors, corridor, offset, False)
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        if (state not in self._visitedLocations):
+            self._visitedLocations.add(state)
+            self._visitHistory.append(state)
+
+        return successors
+
+    def _addCorridor(self, successors, corridor, offset, forward):
+        """
+        Add the successor from an offset along a corridor, walking forward (towards its end)
+        or backward (towards its start).
+        If the goal is on the way, it is the successor instead.
+        """
+
+        length = corridor.getLength()
+
+        if (forward):
+            stop = length
+            target = corridor.getEnd()
+
+            if (corridor is self._goalCorridor and self._goalOffset > offset):
+                stop = self._goalOffset
+                target = self.goal
+
+            actions = corridor.getActions()[offset:stop]
+        else:
+            stop = 0
+            target = corridor.getStart()
+
+            if (corridor is self._goalCorridor and self._goalOffset < offset):
+                stop = self._goalOffset
+                target = self.goal
+
+            actions = corridor.getActions(False)[(length - offset):(length - stop)]
+
+        if (len(actions) > 0):
+            successors.append((target, actions, len(actions)))
+
+    @staticmethod
+    def toActions(path):
+        """
+        Get the moves of a path (a list of corridor actions).
+        """
+
+        return [action for corridorActions in path for action in corridorActions]
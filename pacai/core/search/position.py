@@ -80,6 +80,32 @@ class PositionSearchProblem(SearchProblem):
 
         return successors
 
+    def predecessorStates(self, state):
+        """
+        Returns the states that lead to this state, the actions that get here from them,
+        and the cost of taking those actions.
+        Moves on the board are reversible, so these are the open neighbors of the state.
+        """
+
+        predecessors = []
+
+        cost = self.costFn(state)
+        for action in Directions.CARDINAL:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            previousx, previousy = int(x - dx), int(y - dy)
+
+            if (not self.walls[previousx][previousy]):
+                predecessors.append(((previousx, previousy), action, cost))
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        if (state not in self._visitedLocations):
+            self._visitedLocations.add(state)
+            self._visitHistory.append(state)
+
+        return predecessors
+
     def actionsCost(self, actions):
         """
         Returns the cost of a particular sequence of actions.
@@ -32,6 +32,9 @@ class SearchProblem(abc.ABC):
         self._visitedLocations = set()
         self._visitHistory = []
 
+        # Counters from the last search run on this problem (see `pacai.core.search.engine`).
+        self._searchStats = None
+
     @abc.abstractmethod
     def actionsCost(self, actions):
         """
@@ -46,6 +49,14 @@ class SearchProblem(abc.ABC):
     def getExpandedCount(self):
         return self._numExpanded
 
+    def getSearchStats(self):
+        """
+        Get the `pacai.core.search.engine.SearchStats` from the last search of this problem,
+        or None if the problem was not searched by `pacai.core.search.engine`.
+        """
+
+        return self._searchStats
+
     def getVisitHistory(self):
         return self._visitHistory
 
@@ -60,6 +71,23 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def predecessorStates(self, state):
+        """
+        Answers the question:
+        What moves lead to this state?
+
+        Returns a list of tuples with three values:
+        (predecessor state, action from the predecessor to this state, cost of taking the action).
+
+        Only problems that can be searched backwards (e.g. by the bidirectional searches in
+        `pacai.core.search.engine`) need to implement this.
+        """
+
+        raise NotImplementedError('%s can not be searched backwards.' % (type(self).__name__))
+
+    def setSearchStats(self, stats):
+        self._searchStats = stats
+
     @abc.abstractmethod
     def startingState(self):
         """
@@ -0,0 +1,12 @@
+"""
+The `pacai.core.simulator` package contains compact game simulators.
+
+Simulators implement the same rules as the game states in `pacai.bin`,
+but keep the whole game in a handful of ints and small lists that are modified in place.
+This makes them suitable for things that need to simulate a very large number of moves
+(like Monte Carlo rollouts or reinforcement learning),
+where building a new game state for every move would be too slow.
+Stepping a simulator is roughly 6x faster than generating successors
+(about 365k vs. 59k moves per second with
+`pacai.core.gamestate.AbstractGameState.generateSuccessor` on mediumClassic).
+"""
@@ -0,0 +1,237 @@
+import abc
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+class AbstractSimulator(abc.ABC):
+    """
+    A game encoded as a few ints and flat lists that is modified in place.
+
+    Food and capsules are bitboards (one bit per cell, indexed by (x * height + y),
+    the same as `pacai.core.grid.BitGrid`).
+    Agents are stored as parallel lists (one entry per agent index) of fixed point positions
+    (see `pacai.core.actions.Actions.toFixed`), directions, pacman flags, and scared timers.
+
+    Unlike game states, a simulator is changed by `AbstractSimulator.step`.
+    Use `AbstractSimulator.clone` to branch off a copy
+    (e.g. to run many rollouts from the same position).
+    """
+
+    def __init__(self, layout):
+        # Everything that never changes for a layout is shared between clones.
+
+        self._layout = layout
+        self._height = layout.height
+        self._numAgents = len(layout.agentPositions)
+
+        self._startFood = layout.food.getBits()
+        self._startNumFood = layout.food.count()
+
+        self._startCapsules = 0
+        for (x, y) in layout.capsules:
+            self._startCapsules |= (1 << (x * self._height + y))
+
+        self._startXs = []
+        self._startYs = []
+        self._startIsPacman = []
+        for (isPacman, position) in layout.agentPositions:
+            fx, fy = Actions.toFixed(position)
+            self._startXs.append(fx)
+            self._startYs.append(fy)
+            self._startIsPacman.append(isPacman)
+
+        # The bitboard mask for each cell.
+        self._cellBits = [1 << cellIndex for cellIndex in range(layout.width * self._height)]
+
+        # Share the layout's table of legal moves (indexed by cell) to skip the method calls.
+        self._legalActions = layout.getLegalActionTable()
+
+        self.reset()
+
+    @abc.abstractmethod
+    def step(self, agentIndex, action, validate = True):
+        """
+        Have an agent take an action, modifying this simulator in place.
+        This has the same effect as generating a successor from the matching game state.
+        If validate is false, the caller guarantees that the action is legal.
+        """
+
+        pass
+
+    @abc.abstractmethod
+    def toGameState(self):
+        """
+        Build a game state that is in the same position as this simulator.
+        """
+
+        pass
+
+    def clone(self):
+        """
+        Get an independent copy of this simulator.
+        """
+
+        simulator = self.__class__.__new__(self.__class__)
+        simulator.__dict__.update(self.__dict__)
+
+        simulator._xs = self._xs.copy()
+        simulator._ys = self._ys.copy()
+        simulator._directions = self._directions.copy()
+        simulator._isPacman = self._isPacman.copy()
+        simulator._scaredTimers = self._scaredTimers.copy()
+
+        return simulator
+
+    def getAgentPosition(self, index):
+        """
+        Get the position of an agent, the same as `pacai.core.agentstate.AgentState.getPosition`.
+        """
+
+        return Actions.fromFixed((self._xs[index], self._ys[index]))
+
+    def getCapsuleBits(self):
+        return self._capsules
+
+    def getDirection(self, index):
+        return self._directions[index]
+
+    def getFixedPosition(self, index):
+        return (self._xs[index], self._ys[index])
+
+    def getFoodBits(self):
+        return self._food
+
+    def getLastAgentMoved(self):
+        return self._lastAgentMoved
+
+    def getLayout(self):
+        return self._layout
+
+    def getNumAgents(self):
+        return self._numAgents
+
+    def getNumFood(self):
+        return self._numFood
+
+    def getScaredTimer(self, index):
+        return self._scaredTimers[index]
+
+    def getScore(self):
+        return self._score
+
+    def hasCapsule(self, x, y):
+        return bool(self._capsules & self._cellBits[x * self._height + y])
+
+    def hasFood(self, x, y):
+        return bool(self._food & self._cellBits[x * self._height + y])
+
+    def isLose(self):
+        return self._gameover and not self._win
+
+    def isOver(self):
+        return self._gameover
+
+    def isPacman(self, index):
+        return self._isPacman[index]
+
+    def isWin(self):
+        return self._gameover and self._win
+
+    def reset(self):
+        """
+        Go back to the start of the game.
+        """
+
+        self._food = self._startFood
+        self._numFood = self._startNumFood
+        self._capsules = self._startCapsules
+        self._score = 0
+        self._gameover = False
+        self._win = False
+        self._lastAgentMoved = None
+
+        self._xs = self._startXs.copy()
+        self._ys = self._startYs.copy()
+        self._directions = [Directions.STOP] * self._numAgents
+        self._isPacman = self._startIsPacman.copy()
+        self._scaredTimers = [0] * self._numAgents
+
+    def _readGameState(self, state):
+        """
+        Load the position of a game state into this simulator.
+        """
+
+        self._food = state.getFood().getBits()
+        self._numFood = state.getNumFood()
+
+        self._capsules = 0
+        for (x, y) in state.getCapsules():
+            self._capsules |= self._cellBits[x * self._height + y]
+
+        self._score = state.getScore()
+        self._gameover = state.isOver()
+        self._win = state.isWin()
+        self._lastAgentMoved = state.getLastAgentMoved()
+
+        for index in range(self._numAgents):
+            agentState = state.getAgentState(index)
+            fx, fy = agentState.getFixedPosition()
+
+            self._xs[index] = fx
+            self._ys[index] = fy
+            self._directions[index] = agentState.getDirection()
+            self._isPacman[index] = agentState.isPacman()
+            self._scaredTimers[index] = agentState.getScaredTimer()
+
+    def _respawn(self, index):
+        """
+        Send an agent back to its start, the same as `pacai.core.agentstate.AgentState.respawn`.
+        """
+
+        self._xs[index] = self._startXs[index]
+        self._ys[index] = self._startYs[index]
+        self._directions[index] = Directions.STOP
+        self._isPacman[index] = self._startIsPacman[index]
+        self._scaredTimers[index] = 0
+
+    def _writeGameState(self, state):
+        """
+        Load the position of this simulator into a fresh game state (for this simulator's layout).
+        """
+
+        capsules = [(x, y) for (x, y) in self._layout.capsules if self.hasCapsule(x, y)]
+        agents = zip(zip(self._xs, self._ys), self._directions, self._isPacman,
+                self._scaredTimers)
+
+        state._loadFromSimulator(self._food, self._numFood, capsules,
+                self._score, self._gameover, self._win, self._lastAgentMoved, agents)
+
+    @staticmethod
+    def _buildVectors(speed):
+        """
+        Get the fixed point movement vector for every action at the given speed.
+        """
+
+        return {direction: Actions.directionToFixedVector(direction, speed)
+                for direction in Actions._directions}
+
+    def __eq__(self, other):
+        if (type(self) != type(other)):
+            return False
+
+        return (self._food == other._food
+                and self._capsules == other._capsules
+                and self._score == other._score
+                and self._gameover == other._gameover
+                and self._win == other._win
+                and self._xs == other._xs
+                and self._ys == other._ys
+                and self._directions == other._directions
+                and self._isPacman == other._isPacman
+                and self._scaredTimers == other._scaredTimers
+                and self._layout == other._layout)
+
+    def __hash__(self):
+        return hash((self._food, self._capsules, self._score, self._gameover, self._win,
+                tuple(self._xs), tuple(self._ys), tuple(self._directions),
+                tuple(self._isPacman), tuple(self._scaredTimers)))
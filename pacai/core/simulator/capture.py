@@ -0,0 +1,275 @@
+"""
+A fast simulator for capture games.
+"""
+
+from pacai.bin.capture import FIXED_COLLISION_TOLERANCE
+from pacai.bin.capture import FIXED_CONSUME_TOLERANCE
+from pacai.bin.capture import FOOD_POINTS
+from pacai.bin.capture import KILL_POINTS
+from pacai.bin.capture import MIN_FOOD
+from pacai.bin.capture import SCARED_TIME
+from pacai.bin.capture import AgentRules
+from pacai.bin.capture import CaptureGameState
+from pacai.core.directions import Directions
+from pacai.core.simulator.base import AbstractSimulator
+
+class CaptureSimulator(AbstractSimulator):
+    """
+    A capture game that follows the same rules as `pacai.bin.capture.AgentRules`
+    (and `pacai.bin.capture.CaptureRules.process` via `CaptureSimulator.process`).
+
+    To drive existing agents from a simulator,
+    give them the state from `CaptureSimulator.toGameState`.
+    """
+
+    def __init__(self, layout, timeleft):
+        height = layout.height
+
+        # The red side (the left half of the board) is just the low bits of a bitboard.
+        self._redWidth = int(layout.width / 2)
+        self._redSideMask = (1 << (self._redWidth * height)) - 1
+
+        startFood = layout.food.getBits()
+        self._startNumRedFood = bin(startFood & self._redSideMask).count('1')
+        self._startNumBlueFood = bin(startFood & ~self._redSideMask).count('1')
+        self._startTimeleft = timeleft
+
+        super().__init__(layout)
+
+        # Agents are on the team of the side they start on.
+        self._teams = [(x >> 1) < self._redWidth for x in self._startXs]
+        self._redTeam = [index for index in range(self._numAgents) if self._teams[index]]
+        self._blueTeam = [index for index in range(self._numAgents) if not self._teams[index]]
+
+        self._vectors = self._buildVectors(AgentRules.AGENT_SPEED)
+
+    def getBlueTeamIndices(self):
+        return self._blueTeam
+
+    def getLegalActions(self, agentIndex = 0):
+        """
+        Get the legal actions for an agent.
+        The returned tuple is shared and must not be modified.
+        """
+
+        if (self._gameover):
+            return ()
+
+        x = self._xs[agentIndex]
+        y = self._ys[agentIndex]
+
+        # In between grid points, all agents must continue straight.
+        if ((x | y) & 1):
+            return (self._directions[agentIndex],)
+
+        return self._legalActions[(x >> 1) * self._height + (y >> 1)]
+
+    def getNumBlueFood(self):
+        return self._numBlueFood
+
+    def getNumRedFood(self):
+        return self._numRedFood
+
+    def getRedTeamIndices(self):
+        return self._redTeam
+
+    def getTimeleft(self):
+        return self._timeleft
+
+    def isOnRedTeam(self, agentIndex):
+        return self._teams[agentIndex]
+
+    def process(self):
+        """
+        Check to see whether it is time to end the game,
+        the same as `pacai.bin.capture.CaptureRules.process`.
+        Returns True if the game is over.
+
+        A full game alternates `CaptureSimulator.step` and this method, just like
+        `pacai.core.game.Game` does with the game state and rules.
+        """
+
+        if (not self._gameover and self._timeleft > 0):
+            return False
+
+        redWin = False
+        blueWin = False
+
+        if (self._numRedFood <= MIN_FOOD):
+            blueWin = True
+        elif (self._numBlueFood <= MIN_FOOD):
+            redWin = True
+        elif (self._score < 0):
+            blueWin = True
+        elif (self._score > 0):
+            redWin = True
+
+        self._gameover = True
+        self._win = (redWin or blueWin)
+
+        return True
+
+    # Override
+    def reset(self):
+        super().reset()
+
+        self._numRedFood = self._startNumRedFood
+        self._numBlueFood = self._startNumBlueFood
+        self._timeleft = self._startTimeleft
+
+    # Override
+    def step(self, agentIndex, action, validate = True):
+        """
+        This has the same effect as `pacai.bin.capture.CaptureGameState.generateSuccessor`.
+        """
+
+        if (self._gameover):
+            raise RuntimeError("Can't step a finished game.")
+
+        if (validate and action not in self.getLegalActions(agentIndex)):
+            raise ValueError('Illegal action: ' + str(action))
+
+        xs = self._xs
+        ys = self._ys
+        isRed = self._teams[agentIndex]
+
+        # Update position.
+        dx, dy = self._vectors[action]
+        x = xs[agentIndex] + dx
+        y = ys[agentIndex] + dy
+        xs[agentIndex] = x
+        ys[agentIndex] = y
+
+        if (action != Directions.STOP):
+            self._directions[agentIndex] = action
+
+        # Eat.
+        nearestX = (x + 1) >> 1
+        nearestY = (y + 1) >> 1
+        if (self._isPacman[agentIndex]
+                and abs(x - 2 * nearestX) + abs(y - 2 * nearestY) <= FIXED_CONSUME_TOLERANCE):
+            self._consume(nearestX, nearestY, isRed)
+
+        # Potentially change agent type.
+        if (not ((x | y) & 1)):
+            # Agents are pacmen when they are not on their own side.
+            self._isPacman[agentIndex] = (isRed != (nearestX < self._redWidth))
+
+        self._checkDeath(agentIndex)
+
+        scaredTimers = self._scaredTimers
+        if (scaredTimers[agentIndex] > 0):
+            scaredTimers[agentIndex] -= 1
+
+            if (scaredTimers[agentIndex] == 0):
+                # If the ghost is done being scared, snap it to the closest point.
+                xs[agentIndex] = ((xs[agentIndex] + 1) >> 1) << 1
+                ys[agentIndex] = ((ys[agentIndex] + 1) >> 1) << 1
+
+        # Book keeping.
+        self._lastAgentMoved = agentIndex
+        self._timeleft -= 1
+
+    # Override
+    def toGameState(self):
+        state = CaptureGameState(self._layout, self._timeleft)
+        self._writeGameState(state)
+
+        return state
+
+    def _checkDeath(self, agentIndex):
+        xs = self._xs
+        ys = self._ys
+        isPacman = self._isPacman
+        scaredTimers = self._scaredTimers
+
+        if (self._teams[agentIndex]):
+            teamPointModifier = 1
+            otherTeam = self._blueTeam
+        else:
+            teamPointModifier = -1
+            otherTeam = self._redTeam
+
+        for otherAgentIndex in otherTeam:
+            # Ignore agents with a matching type (e.g. two ghosts).
+            if (isPacman[agentIndex] == isPacman[otherAgentIndex]):
+                continue
+
+            # Ignore other agents that are too far away.
+            distance = (abs(xs[otherAgentIndex] - xs[agentIndex])
+                    + abs(ys[otherAgentIndex] - ys[agentIndex]))
+            if (distance > FIXED_COLLISION_TOLERANCE):
+                continue
+
+            # If we are a brave ghost or they are a scared ghost, then we will eat them.
+            # Otherwise, we are being eatten.
+            if ((not isPacman[agentIndex] and scaredTimers[agentIndex] == 0)
+                    or (not isPacman[otherAgentIndex] and scaredTimers[otherAgentIndex] > 0)):
+                self._score += teamPointModifier * KILL_POINTS
+                self._respawn(otherAgentIndex)
+            else:
+                self._score += teamPointModifier * -KILL_POINTS
+                self._respawn(agentIndex)
+
+    def _consume(self, x, y, isRed):
+        """
+        There is an agent of the specified team on the given position.
+        If there is anything they can eat, do it.
+        """
+
+        bit = self._cellBits[x * self._height + y]
+
+        # Eat food.
+        if (self._food & bit):
+            self._food ^= bit
+            self._numFood -= 1
+
+            if (x < self._redWidth):
+                self._numRedFood -= 1
+            else:
+                self._numBlueFood -= 1
+
+            if (isRed):
+                self._score += FOOD_POINTS
+            else:
+                self._score -= FOOD_POINTS
+
+            if ((isRed and self._numBlueFood <= MIN_FOOD)
+                    or (not isRed and self._numRedFood <= MIN_FOOD)):
+                self._gameover = True
+                self._win = True
+
+            return
+
+        # Eat a capsule (only the ones on the other team's side).
+        if ((self._capsules & bit) and (isRed != (x < self._redWidth))):
+            self._capsules ^= bit
+
+            # Reset ghosts' scared timers.
+            if (isRed):
+                otherTeam = self._blueTeam
+            else:
+                otherTeam = self._redTeam
+
+            for agentIndex in otherTeam:
+                self._scaredTimers[agentIndex] = SCARED_TIME
+
+    @staticmethod
+    def fromGameState(state):
+        """
+        Build a simulator that is in the same position as a `pacai.bin.capture.CaptureGameState`.
+        """
+
+        simulator = CaptureSimulator(state.getInitialLayout(), state.getTimeleft())
+        simulator._readGameState(state)
+
+        simulator._numRedFood = state.getNumRedFood()
+        simulator._numBlueFood = state.getNumBlueFood()
+
+        return simulator
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self._timeleft == other._timeleft
+
+    def __hash__(self):
+        return hash((super().__hash__(), self._timeleft))
@@ -0,0 +1,181 @@
+"""
+A fast simulator for classic pacman games.
+"""
+
+from pacai.bin.pacman import BOARD_CLEAR_POINTS
+from pacai.bin.pacman import FIXED_COLLISION_TOLERANCE
+from pacai.bin.pacman import FIXED_CONSUME_TOLERANCE
+from pacai.bin.pacman import FOOD_POINTS
+from pacai.bin.pacman import GHOST_POINTS
+from pacai.bin.pacman import LOSE_POINTS
+from pacai.bin.pacman import PACMAN_AGENT_INDEX
+from pacai.bin.pacman import SCARED_TIME
+from pacai.bin.pacman import TIME_PENALTY
+from pacai.bin.pacman import GhostRules
+from pacai.bin.pacman import PacmanGameState
+from pacai.bin.pacman import PacmanRules
+from pacai.core.directions import Directions
+from pacai.core.simulator.base import AbstractSimulator
+
+class PacmanSimulator(AbstractSimulator):
+    """
+    A classic pacman game that follows the same rules as
+    `pacai.bin.pacman.PacmanRules` and `pacai.bin.pacman.GhostRules`.
+    """
+
+    def __init__(self, layout):
+        super().__init__(layout)
+
+        self._ghostLegalActions = layout.getGhostLegalActionTable()
+
+        # Fixed point movement vectors for each kind of move.
+        self._pacmanVectors = self._buildVectors(PacmanRules.PACMAN_SPEED)
+        self._ghostVectors = self._buildVectors(GhostRules.GHOST_SPEED)
+        self._scaredGhostVectors = self._buildVectors(GhostRules.GHOST_SPEED / 2.0)
+
+    def getLegalActions(self, agentIndex = PACMAN_AGENT_INDEX):
+        """
+        Get the legal actions for an agent.
+        The returned tuple is shared and must not be modified.
+        """
+
+        if (self._gameover):
+            return ()
+
+        x = self._xs[agentIndex]
+        y = self._ys[agentIndex]
+
+        # In between grid points, all agents must continue straight.
+        if ((x | y) & 1):
+            direction = self._directions[agentIndex]
+            if (agentIndex != PACMAN_AGENT_INDEX and direction == Directions.STOP):
+                return ()
+
+            return (direction,)
+
+        cellIndex = (x >> 1) * self._height + (y >> 1)
+
+        if (agentIndex == PACMAN_AGENT_INDEX):
+            return self._legalActions[cellIndex]
+
+        return self._ghostLegalActions[cellIndex][self._directions[agentIndex]]
+
+    # Override
+    def step(self, agentIndex, action, validate = True):
+        """
+        This has the same effect as `pacai.bin.pacman.PacmanGameState.generateSuccessor`.
+        """
+
+        if (self._gameover):
+            raise RuntimeError("Can't step a finished game.")
+
+        if (validate and action not in self.getLegalActions(agentIndex)):
+            if (agentIndex == PACMAN_AGENT_INDEX):
+                raise ValueError('Illegal pacman action: ' + str(action))
+
+            raise ValueError('Illegal ghost action: ' + str(action))
+
+        xs = self._xs
+        ys = self._ys
+
+        if (agentIndex == PACMAN_AGENT_INDEX):
+            dx, dy = self._pacmanVectors[action]
+            x = xs[PACMAN_AGENT_INDEX] + dx
+            y = ys[PACMAN_AGENT_INDEX] + dy
+            xs[PACMAN_AGENT_INDEX] = x
+            ys[PACMAN_AGENT_INDEX] = y
+
+            if (action != Directions.STOP):
+                self._directions[PACMAN_AGENT_INDEX] = action
+
+            # Eat.
+            nearestX = (x + 1) >> 1
+            nearestY = (y + 1) >> 1
+            if (abs(x - 2 * nearestX) + abs(y - 2 * nearestY) <= FIXED_CONSUME_TOLERANCE):
+                bit = self._cellBits[nearestX * self._height + nearestY]
+                if ((self._food & bit) or (self._capsules & bit)):
+                    self._consume(bit)
+
+            # Penalty for waiting around.
+            self._score -= TIME_PENALTY
+
+            # See if a ghost can kill pacman.
+            for index in range(1, self._numAgents):
+                if (abs(xs[index] - x) + abs(ys[index] - y) <= FIXED_COLLISION_TOLERANCE):
+                    self._collide(index)
+        else:
+            scaredTimers = self._scaredTimers
+
+            if (scaredTimers[agentIndex] > 0):
+                dx, dy = self._scaredGhostVectors[action]
+            else:
+                dx, dy = self._ghostVectors[action]
+
+            x = xs[agentIndex] + dx
+            y = ys[agentIndex] + dy
+
+            if (action != Directions.STOP):
+                self._directions[agentIndex] = action
+
+            if (scaredTimers[agentIndex] > 0):
+                scaredTimers[agentIndex] -= 1
+
+                if (scaredTimers[agentIndex] == 0):
+                    # If the ghost is done being scared, snap it to the closest point.
+                    x = ((x + 1) >> 1) << 1
+                    y = ((y + 1) >> 1) << 1
+
+            xs[agentIndex] = x
+            ys[agentIndex] = y
+
+            if (abs(xs[PACMAN_AGENT_INDEX] - x) + abs(ys[PACMAN_AGENT_INDEX] - y)
+                    <= FIXED_COLLISION_TOLERANCE):
+                self._collide(agentIndex)
+
+        self._lastAgentMoved = agentIndex
+
+    # Override
+    def toGameState(self):
+        state = PacmanGameState(self._layout)
+        self._writeGameState(state)
+
+        return state
+
+    def _collide(self, ghostIndex):
+        if (self._scaredTimers[ghostIndex] > 0):
+            # Pacman ate a ghost.
+            self._score += GHOST_POINTS
+            self._respawn(ghostIndex)
+        elif (not self._gameover):
+            # A ghost ate pacman.
+            self._score += LOSE_POINTS
+            self._gameover = True
+            self._win = False
+
+    def _consume(self, bit):
+        if (self._food & bit):
+            self._food ^= bit
+            self._numFood -= 1
+            self._score += FOOD_POINTS
+
+            if (self._numFood == 0 and not self.isLose()):
+                self._score += BOARD_CLEAR_POINTS
+                self._gameover = True
+                self._win = True
+        elif (self._capsules & bit):
+            self._capsules ^= bit
+
+            # Reset all ghosts' scared timers.
+            for index in range(1, self._numAgents):
+                self._scaredTimers[index] = SCARED_TIME
+
+    @staticmethod
+    def fromGameState(state):
+        """
+        Build a simulator that is in the same position as a `pacai.bin.pacman.PacmanGameState`.
+        """
+
+        simulator = PacmanSimulator(state.getInitialLayout())
+        simulator._readGameState(state)
+
+        return simulator
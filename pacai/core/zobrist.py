@@ -0,0 +1,80 @@
+"""
+Zobrist keys for hashing game states incrementally.
+
+A state's key is the XOR of a key for every component of that state
+(each remaining food, each remaining capsule, each agent, the score, and the game over flags).
+Because XOR is its own inverse, a change to one component can be applied to a running key by
+XORing out the component's old key and XORing in its new one.
+"""
+
+import random
+
+KEY_BITS = 64
+KEY_MASK = (1 << KEY_BITS) - 1
+
+# Keys are drawn from a private generator so that hashing never disturbs the global random state.
+SEED = 0x5EED2B15
+
+# Salts to keep the different kinds of hashed components apart.
+AGENT_SALT = 0x0A6E17
+SCORE_SALT = 0x5C03E
+
+_tables = {}
+
+class ZobristTable(object):
+    """
+    Random keys for every cell of a board of a specific size.
+    Keys are indexed by (x * height + y), the same as `pacai.core.grid.BitGrid` bits.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+        rng = random.Random(SEED + width * 1000003 + height)
+        numCells = width * height
+
+        self.food = [rng.getrandbits(KEY_BITS) for i in range(numCells)]
+        self.capsules = [rng.getrandbits(KEY_BITS) for i in range(numCells)]
+
+        self.gameover = rng.getrandbits(KEY_BITS)
+        self.win = rng.getrandbits(KEY_BITS)
+
+    def capsuleKey(self, x, y):
+        return self.capsules[x * self.height + y]
+
+    def flagsKey(self, gameover, win):
+        key = 0
+
+        if (gameover):
+            key ^= self.gameover
+
+        if (win):
+            key ^= self.win
+
+        return key
+
+    def foodKey(self, x, y):
+        return self.food[x * self.height + y]
+
+def getTable(width, height):
+    """
+    Get the (shared) table of keys for a board of the given size.
+    """
+
+    key = (width, height)
+    if (key not in _tables):
+        _tables[key] = ZobristTable(width, height)
+
+    return _tables[key]
+
+def agentKey(index, agentState):
+    """
+    Get the key for an agent (as identified by its index) in its current state.
+    """
+
+    return hash((AGENT_SALT, index, agentState.getFixedPosition(), agentState.getDirection(),
+            agentState.isPacman(), agentState.getScaredTimer())) & KEY_MASK
+
+def scoreKey(score):
+    return hash((SCORE_SALT, score)) & KEY_MASK
@@ -97,8 +97,7 @@ class BetterOffensiveReflexAgent(ReflexCaptureAgent):
         # This should always be True, but better safe than sorry.
         # prioritize states close to food
         if (len(foodList) > 0):
-            minDistance = min([self.getMazeDistance(myNextPos, food)
-                              for food in foodList])
+            _, minDistance = self.getNearest(myNextPos, foodList)
             minDistanceNormalized = float(
                 minDistance) / (walls.getWidth() * walls.getHeight())
             features['distanceToFood'] = minDistanceNormalized
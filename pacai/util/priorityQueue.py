@@ -56,3 +56,142 @@ class PriorityQueueWithFunction(PriorityQueue):
 
     def __len__(self):
         return len(self.heap)
+
+class IndexedPriorityQueue(PriorityQueue):
+    """
+    A priority queue that holds each (hashable) item at most once,
+    and can lower the priority of an item that is already in the queue.
+
+    This has the same push/pop API as `PriorityQueue`, except that pushing an item that is
+    already in the queue only ever lowers its priority (see `IndexedPriorityQueue.push`).
+    Items with the same priority are popped in the order they were (last) given that priority.
+
+    `IndexedPriorityQueue.push`, `IndexedPriorityQueue.pop`,
+    and `IndexedPriorityQueue.decreaseKey` are O(log n).
+    `IndexedPriorityQueue.contains`, `IndexedPriorityQueue.peekPriority`,
+    and `IndexedPriorityQueue.priorityOf` are O(1).
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        # The heap holds (priority, count, item), the count breaks ties between priorities.
+        self._count = 0
+
+        # {item: index in the heap}
+        self._indexes = {}
+
+    def contains(self, item):
+        return item in self._indexes
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item in the queue.
+        Raises a KeyError if the item is not in the queue,
+        and a ValueError if the new priority is higher than the current one.
+        """
+
+        index = self._indexes[item]
+        if (priority > self.heap[index][0]):
+            raise ValueError('New priority (%s) is higher than the current priority (%s).'
+                    % (priority, self.heap[index][0]))
+
+        self._count += 1
+        self.heap[index] = (priority, self._count, item)
+        self._siftUp(index)
+
+    def pop(self):
+        heap = self.heap
+
+        (priority, count, item) = heap[0]
+        del self._indexes[item]
+
+        last = heap.pop()
+        if (len(heap) > 0):
+            heap[0] = last
+            self._indexes[last[2]] = 0
+            self._siftDown(0)
+
+        return item
+
+    def peekPriority(self):
+        """
+        Get the priority of the item that would be popped next
+        (an IndexError if the queue is empty).
+        """
+
+        return self.heap[0][0]
+
+    def priorityOf(self, item):
+        """
+        Get the priority of an item in the queue (a KeyError if it is not in the queue).
+        """
+
+        return self.heap[self._indexes[item]][0]
+
+    def push(self, item, priority):
+        """
+        Add an item to the queue.
+        If the item is already in the queue, its priority is lowered to the given priority
+        (a higher priority is ignored).
+        Returns True if the queue changed.
+        """
+
+        index = self._indexes.get(item)
+        if (index is not None):
+            if (priority >= self.heap[index][0]):
+                return False
+
+            self.decreaseKey(item, priority)
+            return True
+
+        self._count += 1
+        self.heap.append((priority, self._count, item))
+        self._indexes[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+        return True
+
+    def _siftDown(self, index):
+        heap = self.heap
+        indexes = self._indexes
+        size = len(heap)
+
+        entry = heap[index]
+        while (True):
+            child = 2 * index + 1
+            if (child >= size):
+                break
+
+            if (child + 1 < size and heap[child + 1] < heap[child]):
+                child += 1
+
+            if (not (heap[child] < entry)):
+                break
+
+            heap[index] = heap[child]
+            indexes[heap[index][2]] = index
+            index = child
+
+        heap[index] = entry
+        indexes[entry[2]] = index
+
+    def _siftUp(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        entry = heap[index]
+        while (index > 0):
+            parent = (index - 1) // 2
+            if (not (entry < heap[parent])):
+                break
+
+            heap[index] = heap[parent]
+            indexes[heap[index][2]] = index
+            index = parent
+
+        heap[index] = entry
+        indexes[entry[2]] = index
+
+    def __contains__(self, item):
+        return self.contains(item)
@@ -3,6 +3,7 @@
 import os
 import re
 import sys
+import tempfile
 import unittest
 
 TEST_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'tests')
@@ -41,7 +42,12 @@ def main(pattern = None):
         else:
             print("Skipping %s because of match pattern." % (testCase.id()))
 
-    if (not runner.run(tests).wasSuccessful() or fail):
+    # Keep the on-disk distance cache from the tests out of the user's cache.
+    with tempfile.TemporaryDirectory() as cacheDir:
+        os.environ['PACAI_DISTANCE_CACHE_DIR'] = cacheDir
+        success = runner.run(tests).wasSuccessful()
+
+    if (not success or fail):
         sys.exit(1)
 
 def _load_args(args):
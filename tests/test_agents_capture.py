@@ -0,0 +1,35 @@
+import unittest
+
+from pacai.agents.capture.dummy import DummyAgent
+from pacai.bin.capture import CaptureGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+"""
+Test the helpers that capture agents get from `pacai.agents.capture.capture.CaptureAgent`.
+"""
+class CaptureAgentTest(unittest.TestCase):
+    def test_junction_graph(self):
+        layout = getLayout('defaultCapture')
+        state = CaptureGameState(layout, 100)
+
+        agent = DummyAgent(0)
+        agent.registerInitialState(state)
+
+        self.assertIs(layout.getJunctionGraph(), agent.getJunctionGraph())
+
+        numDecisionPoints = 0
+        for position in layout.walls.asList(False):
+            moves = [action for action in layout.getPossibleActions(position, Directions.STOP)
+                    if action != Directions.STOP]
+
+            self.assertEqual(len(moves) > 2, agent.isDecisionPoint(position))
+            numDecisionPoints += int(len(moves) > 2)
+
+        self.assertGreater(numDecisionPoints, 0)
+
+        # Walls are never decision points.
+        self.assertFalse(agent.isDecisionPoint((0, 0)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,30 @@
+import os
+import tempfile
 import unittest
 
 from pacai.bin import capture
 from pacai.bin import gridworld
 from pacai.bin import pacman
+from pacai.core import distanceCalculator
+
+_tempCacheDir = None
+_oldCacheDir = None
+
+def setUpModule():
+    # Keep the distances that the games' agents may write to disk out of the user's own cache.
+    global _tempCacheDir, _oldCacheDir
+
+    _tempCacheDir = tempfile.TemporaryDirectory()
+    _oldCacheDir = os.environ.get(distanceCalculator.CACHE_DIR_ENV)
+    os.environ[distanceCalculator.CACHE_DIR_ENV] = _tempCacheDir.name
+
+def tearDownModule():
+    if (_oldCacheDir is None):
+        os.environ.pop(distanceCalculator.CACHE_DIR_ENV, None)
+    else:
+        os.environ[distanceCalculator.CACHE_DIR_ENV] = _oldCacheDir
+
+    _tempCacheDir.cleanup()
 
 """
 This is a test class to assess the executables of this project.
@@ -0,0 +1,576 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core import distanceCalculator
+from pacai.core.distance import manhattan
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+# A layout with a pocket (bottom right) that can not be reached from the rest of the board.
+POCKET_LAYOUT = [
+    '%%%%%%',
+    '%P  .%',
+    '% %%%%',
+    '%  %.%',
+    '%%%%%%',
+]
+
+_tempCacheDir = None
+_oldCacheDir = None
+
+def setUpModule():
+    # Keep any distances these tests write to disk out of the user's own cache.
+    global _tempCacheDir, _oldCacheDir
+
+    _tempCacheDir = tempfile.TemporaryDirectory()
+    _oldCacheDir = os.environ.get(distanceCalculator.CACHE_DIR_ENV)
+    os.environ[distanceCalculator.CACHE_DIR_ENV] = _tempCacheDir.name
+
+def tearDownModule():
+    if (_oldCacheDir is None):
+        os.environ.pop(distanceCalculator.CACHE_DIR_ENV, None)
+    else:
+        os.environ[distanceCalculator.CACHE_DIR_ENV] = _oldCacheDir
+
+    _tempCacheDir.cleanup()
+    distanceCalculator.clearCache()
+
+"""
+Test the maze distances computed for layouts.
+"""
+class DistancerTest(unittest.TestCase):
+    def _checkShortestPaths(self, layout):
+        """
+        Check that the distances are exactly the shortest path lengths,
+        by checking that every distance is one more than the best distance through a neighbor.
+        """
+
+        distances = distanceCalculator.computeDistances(layout)
+        cells = layout.walls.asList(False)
+
+        self.assertEqual(len(cells) ** 2, len(distances))
+
+        for source in cells:
+            for target in cells:
+                distance = distances.getDistance(source, target)
+                self.assertEqual(distance, distances.getDistance(target, source))
+                self.assertEqual(distance, distances[(source, target)])
+
+                if (source == target):
+                    self.assertEqual(0, distance)
+                    continue
+
+                (x, y) = target
+                neighbors = [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]
+                best = min([distances.getDistance(source, neighbor)
+                        for neighbor in neighbors if distances.getIndex(neighbor) is not None]
+                        + [sys.maxsize - 1])
+
+                self.assertEqual(min(best + 1, sys.maxsize), distance)
+
+    def test_shortest_paths(self):
+        for name in ['mediumClassic', 'defaultCapture']:
+            with self.subTest(layout = name):
+                self._checkShortestPaths(getLayout(name))
+
+    def test_unreachable(self):
+        layout = Layout(POCKET_LAYOUT)
+        self._checkShortestPaths(layout)
+
+        distancer = distanceCalculator.Distancer(layout)
+        distancer.getMazeDistances()
+
+        self.assertEqual(3, distancer.getDistance((1, 3), (2, 1)))
+        self.assertEqual(sys.maxsize, distancer.getDistance((1, 3), (4, 1)))
+
+    def test_distance_on_grid(self):
+        layout = Layout(POCKET_LAYOUT)
+
+        distancers = {
+            'dense': distanceCalculator.Distancer(layout),
+            'lazy': distanceCalculator.Distancer(layout, lazy = True),
+            'junctions': distanceCalculator.Distancer(layout, junctions = True),
+        }
+
+        for (mode, distancer) in distancers.items():
+            with self.subTest(mode = mode):
+                distanceCalculator.clearCache()
+                distancer.getMazeDistances()
+
+                self.assertEqual(3, distancer.getDistanceOnGrid((1, 3), (4, 3)))
+
+                # Open cells that can not reach each other.
+                self.assertEqual(sys.maxsize, distancer.getDistanceOnGrid((1, 3), (4, 1)))
+
+                # Walls (and positions off the board) are not in the grid.
+                for (pos1, pos2) in [((0, 0), (1, 3)), ((1, 3), (2, 2)), ((1, 3), (9, 9))]:
+                    with self.assertRaisesRegex(Exception, 'Position not in grid'):
+                        distancer.getDistanceOnGrid(pos1, pos2)
+
+        distanceCalculator.clearCache()
+
+    def test_distancer(self):
+        distancer = distanceCalculator.Distancer(getLayout('mediumClassic'))
+
+        # Before the maze distances are computed, fall back to manhattan distances.
+        self.assertFalse(distancer.isReadyForMazeDistance())
+        self.assertEqual(2, distancer.getDistance((1, 1), (2, 2)))
+
+        distancer.getMazeDistances()
+        self.assertTrue(distancer.isReadyForMazeDistance())
+
+        self.assertEqual(0, distancer.getDistance((1, 1), (1, 1)))
+        self.assertEqual(1, distancer.getDistance((1, 1), (1, 2)))
+        self.assertEqual(distancer.getDistance((1, 1), (1, 2)),
+                distancer.getDistance((1.0, 1.0), (1, 2.0)))
+
+        # Positions between cells go through the closest cells.
+        self.assertEqual(1.5, distancer.getDistance((1, 1), (1, 2.5)))
+
+        # Walls are not in the grid.
+        self.assertRaises(Exception, distancer.getDistance, (0, 0), (1, 1))
+
+    def test_shared_cache(self):
+        distanceCalculator.clearCache()
+
+        distancer1 = distanceCalculator.Distancer(getLayout('mediumClassic'))
+        distancer1.getMazeDistances()
+
+        # A separately loaded copy of the same layout shares the distances.
+        distancer2 = distanceCalculator.Distancer(getLayout('mediumClassic'))
+        distancer2.getMazeDistances()
+        self.assertIs(distancer1._distances, distancer2._distances)
+
+        oldSize = distanceCalculator.MAX_CACHED_LAYOUTS
+        distanceCalculator.MAX_CACHED_LAYOUTS = 1
+
+        try:
+            # Loading another layout evicts the first one.
+            distanceCalculator.getDistances(getLayout('smallClassic'))
+            self.assertIsNot(distancer1._distances,
+                    distanceCalculator.getDistances(getLayout('mediumClassic')))
+        finally:
+            distanceCalculator.MAX_CACHED_LAYOUTS = oldSize
+            distanceCalculator.clearCache()
+
+    def test_disk_cache(self):
+        oldCacheDir = os.environ.get(distanceCalculator.CACHE_DIR_ENV)
+
+        try:
+            with tempfile.TemporaryDirectory() as tempDir:
+                # The cache directory is created (private to this user) when it is first used.
+                cacheDir = os.path.join(tempDir, 'distances')
+                os.environ[distanceCalculator.CACHE_DIR_ENV] = cacheDir
+                self._checkDiskCache(cacheDir)
+                self.assertEqual(0, os.stat(cacheDir).st_mode & 0o077)
+
+                self._checkDiskCacheLimit(cacheDir)
+
+            # The disk cache is off unless a directory is given.
+            os.environ.pop(distanceCalculator.CACHE_DIR_ENV, None)
+            self.assertIsNone(distanceCalculator.getCacheDir())
+
+            os.environ[distanceCalculator.CACHE_DIR_ENV] = ''
+            self.assertIsNone(distanceCalculator.getCacheDir())
+
+            distanceCalculator.clearCache()
+            distanceCalculator.getDistances(getLayout('mediumClassic'))
+        finally:
+            if (oldCacheDir is None):
+                os.environ.pop(distanceCalculator.CACHE_DIR_ENV, None)
+            else:
+                os.environ[distanceCalculator.CACHE_DIR_ENV] = oldCacheDir
+
+            distanceCalculator.clearCache()
+
+    def _checkDiskCache(self, cacheDir):
+        layout = getLayout('mediumClassic')
+        path = os.path.join(cacheDir, layout.getFingerprint() + '.dist')
+
+        distanceCalculator.clearCache()
+        computed = distanceCalculator.getDistances(layout)
+        self.assertTrue(os.path.isfile(path))
+
+        # Another process (simulated by clearing the in-memory cache) loads the file.
+        distanceCalculator.clearCache()
+        loaded = distanceCalculator.getDistances(layout)
+        self.assertIsNot(computed, loaded)
+        self.assertIsInstance(loaded._matrix, memoryview)
+
+        for source in computed.getCells():
+            for target in computed.getCells():
+                self.assertEqual(computed.getDistance(source, target),
+                        loaded.getDistance(source, target))
+
+        # Corrupt files are ignored (and replaced).
+        with open(path, 'wb') as file:
+            file.write(b'garbage')
+
+        distanceCalculator.clearCache()
+        recomputed = distanceCalculator.getDistances(layout)
+        self.assertNotIsInstance(recomputed._matrix, memoryview)
+        self.assertEqual(os.path.getsize(path),
+                distanceCalculator.CACHE_FILE_HEADER.size + 2 * (computed.getNumCells() ** 2))
+
+    def _checkDiskCacheLimit(self, cacheDir):
+        oldMaxFiles = distanceCalculator.MAX_CACHE_FILES
+        distanceCalculator.MAX_CACHE_FILES = 2
+
+        try:
+            names = ['smallClassic', 'mediumClassic', 'testClassic']
+            for name in names:
+                distanceCalculator.clearCache()
+                distanceCalculator.getDistances(getLayout(name))
+
+                # Make sure the files were used in order (whatever the clock resolution).
+                path = os.path.join(cacheDir, getLayout(name).getFingerprint() + '.dist')
+                usedTime = time.time() - 100 + names.index(name)
+                os.utime(path, (usedTime, usedTime))
+
+            # The least recently used file was removed.
+            files = sorted(os.listdir(cacheDir))
+            expected = sorted([getLayout(name).getFingerprint() + '.dist' for name in names[1:]])
+            self.assertEqual(expected, files)
+        finally:
+            distanceCalculator.MAX_CACHE_FILES = oldMaxFiles
+
+    def test_lazy(self):
+        for name in ['mediumClassic', 'defaultCapture']:
+            with self.subTest(layout = name):
+                layout = getLayout(name)
+                dense = distanceCalculator.computeDistances(layout)
+
+                # Only room for a few rows.
+                rowBytes = 2 * dense.getNumCells()
+                lazy = distanceCalculator.LazyMazeDistances(layout, maxBytes = 3 * rowBytes)
+
+                for source in dense.getCells():
+                    for target in dense.getCells():
+                        self.assertEqual(dense.getDistance(source, target),
+                                lazy.getDistance(source, target))
+
+                    self.assertLessEqual(lazy.getNumCachedRows(), 3)
+
+                self.assertEqual(len(dense), len(lazy))
+                self.assertEqual(3, lazy.getNumCachedRows())
+
+    def test_lazy_unreachable(self):
+        lazy = distanceCalculator.LazyMazeDistances(Layout(POCKET_LAYOUT))
+
+        self.assertEqual(3, lazy.getDistance((1, 3), (2, 1)))
+        self.assertEqual(sys.maxsize, lazy.getDistance((1, 3), (4, 1)))
+        self.assertRaises(Exception, lazy.getDistance, (0, 0), (1, 1))
+
+    def test_lazy_background(self):
+        layout = getLayout('mediumClassic')
+        numCells = layout.walls.count(False)
+
+        lazy = distanceCalculator.LazyMazeDistances(layout, maxBytes = 10 * 2 * numCells,
+                background = True)
+        lazy._thread.join()
+
+        # The background thread stops once the cache is full.
+        self.assertEqual(10, lazy.getNumCachedRows())
+        self.assertEqual(distanceCalculator.computeDistances(layout).getDistance((1, 1), (9, 1)),
+                lazy.getDistance((1, 1), (9, 1)))
+
+        lazy.stopBackground()
+
+    def test_lazy_distancer(self):
+        layout = getLayout('mediumClassic')
+
+        distancer = distanceCalculator.Distancer(layout, lazy = True)
+        distancer.getMazeDistances()
+        self.assertIsInstance(distancer._distances, distanceCalculator.LazyMazeDistances)
+
+        self.assertEqual(1, distancer.getDistance((1, 1), (1, 2)))
+        self.assertEqual(1.5, distancer.getDistance((1, 1), (1, 2.5)))
+
+        # Boards with a matrix over the limit are lazy by default.
+        oldLimit = distanceCalculator.MAX_MATRIX_BYTES
+        distanceCalculator.MAX_MATRIX_BYTES = 0
+
+        try:
+            distancer = distanceCalculator.Distancer(layout)
+            distancer.getMazeDistances()
+            self.assertIsInstance(distancer._distances, distanceCalculator.LazyMazeDistances)
+        finally:
+            distanceCalculator.MAX_MATRIX_BYTES = oldLimit
+
+    def test_incremental(self):
+        layout = getLayout('mediumClassic')
+        dense = distanceCalculator.computeDistances(layout)
+
+        incremental = distanceCalculator.IncrementalMazeDistances(layout)
+
+        # Every call does at least one row.
+        self.assertFalse(incremental.compute(0))
+        self.assertEqual(1, incremental.getNumFinished())
+
+        # The first cell is done, so distances from (or to) it are exact.
+        source = incremental.getCells()[0]
+        for target in dense.getCells():
+            self.assertEqual(dense.getDistance(source, target),
+                    incremental.getDistance(source, target))
+            self.assertEqual(dense.getDistance(source, target),
+                    incremental.getDistance(target, source))
+
+        # Unfinished sources fall back to manhattan distances (the maze distance here is 11).
+        cells = incremental.getCells()
+        self.assertEqual(manhattan(cells[-1], cells[-43]),
+                incremental.getDistance(cells[-1], cells[-43]))
+        self.assertRaises(ValueError, incremental.toMazeDistances)
+
+        while (not incremental.compute(0.01)):
+            pass
+
+        full = incremental.toMazeDistances()
+        for source in dense.getCells():
+            for target in dense.getCells():
+                self.assertEqual(dense.getDistance(source, target),
+                        full.getDistance(source, target))
+
+    def test_incremental_distancer(self):
+        distanceCalculator.clearCache()
+        oldCacheDir = os.environ.get(distanceCalculator.CACHE_DIR_ENV)
+        os.environ[distanceCalculator.CACHE_DIR_ENV] = ''
+
+        try:
+            layout = getLayout('mediumClassic')
+
+            distancer = distanceCalculator.Distancer(layout)
+            self.assertFalse(distancer.getMazeDistances(0))
+            self.assertFalse(distancer.isReadyForMazeDistance())
+
+            # Not done, but the distances are usable.
+            cells = layout.walls.asList(False)
+            self.assertEqual(manhattan(cells[-1], cells[-43]),
+                    distancer.getDistance(cells[-1], cells[-43]))
+
+            while (not distancer.getMazeDistances(0.01)):
+                pass
+
+            self.assertIsInstance(distancer._distances, distanceCalculator.MazeDistances)
+
+            # The finished distances are shared.
+            other = distanceCalculator.Distancer(getLayout('mediumClassic'))
+            self.assertTrue(other.getMazeDistances(0))
+            self.assertIs(distancer._distances, other._distances)
+        finally:
+            if (oldCacheDir is None):
+                os.environ.pop(distanceCalculator.CACHE_DIR_ENV, None)
+            else:
+                os.environ[distanceCalculator.CACHE_DIR_ENV] = oldCacheDir
+
+            distanceCalculator.clearCache()
+
+    def test_incremental_shared(self):
+        distanceCalculator.clearCache()
+        oldCacheDir = os.environ.get(distanceCalculator.CACHE_DIR_ENV)
+        os.environ[distanceCalculator.CACHE_DIR_ENV] = ''
+
+        try:
+            # Two teammates on the same layout (loaded separately).
+            distancers = [distanceCalculator.Distancer(getLayout('mediumClassic'))
+                    for i in range(2)]
+
+            for distancer in distancers:
+                self.assertFalse(distancer.getMazeDistances(0))
+
+            # They resume the same computation.
+            self.assertIs(distancers[0]._distances, distancers[1]._distances)
+            self.assertEqual(2, distancers[0]._distances.getNumFinished())
+
+            # With no time to spare, each call computes one row,
+            # so splitting the work takes about one call per row (not two).
+            numCells = distancers[0]._distances.getNumCells()
+            numCalls = 2
+
+            while (not all([distancer.isReadyForMazeDistance() for distancer in distancers])):
+                for distancer in distancers:
+                    if (not distancer.isReadyForMazeDistance()):
+                        distancer.getMazeDistances(0)
+                        numCalls += 1
+
+            self.assertLessEqual(numCalls, numCells + 1)
+            self.assertIs(distancers[0]._distances, distancers[1]._distances)
+            self.assertEqual(0, len(distanceCalculator._incrementalCache))
+        finally:
+            if (oldCacheDir is None):
+                os.environ.pop(distanceCalculator.CACHE_DIR_ENV, None)
+            else:
+                os.environ[distanceCalculator.CACHE_DIR_ENV] = oldCacheDir
+
+            distanceCalculator.clearCache()
+
+    def test_bulk_queries(self):
+        layout = Layout(POCKET_LAYOUT)
+        cells = layout.walls.asList(False)
+
+        distancer = distanceCalculator.Distancer(layout)
+
+        # Without distances, bulk queries fall back to manhattan distances too.
+        self.assertEqual([manhattan((1, 3), cell) for cell in cells],
+                distancer.getDistancesFrom((1, 3), cells))
+
+        distancer.getMazeDistances()
+
+        expected = [[distancer.getDistance(source, target) for target in cells]
+                for source in cells]
+        self.assertEqual(expected, distancer.getDistanceMatrix(cells, cells))
+
+        for (source, row) in zip(cells, expected):
+            self.assertEqual(row, distancer.getDistancesFrom(source, cells))
+
+        # Positions between cells go through the per pair distances.
+        self.assertEqual([distancer.getDistance((1, 1.5), cell) for cell in cells],
+                distancer.getDistancesFrom((1, 1.5), cells))
+        self.assertEqual([[distancer.getDistance((1, 3), (1.5, 1))]],
+                distancer.getDistanceMatrix([(1, 3)], [(1.5, 1)]))
+
+        self.assertEqual(((3, 3), 2), distancer.getNearest((1, 3), [(4, 1), (2, 1), (3, 3)]))
+        self.assertEqual(((4, 1), sys.maxsize), distancer.getNearest((1, 3), [(4, 1)]))
+        self.assertEqual((None, None), distancer.getNearest((1, 3), []))
+        self.assertEqual([], distancer.getDistancesFrom((1, 3), []))
+
+    def test_bulk_queries_numpy(self):
+        if (distanceCalculator.numpy is None):
+            print("Skipping test, could not find NumPy.")
+            return
+
+        numpy = distanceCalculator.numpy
+
+        for layout in [Layout(POCKET_LAYOUT), getLayout('mediumClassic')]:
+            cells = layout.walls.asList(False)
+            sources = cells[::3]
+
+            distancer = distanceCalculator.Distancer(layout)
+            distancer.getMazeDistances()
+
+            withNumpy = distancer.getDistanceMatrix(sources, cells)
+
+            # The plain array path has to give the same distances.
+            try:
+                distanceCalculator.numpy = None
+                withoutNumpy = distancer.getDistanceMatrix(sources, cells)
+            finally:
+                distanceCalculator.numpy = numpy
+
+            self.assertEqual(withoutNumpy, withNumpy)
+            for row in withNumpy:
+                for distance in row:
+                    self.assertIs(int, type(distance))
+
+    def test_junctions(self):
+        for layout in [Layout(POCKET_LAYOUT), getLayout('mediumClassic'), getLayout('bigMaze')]:
+            dense = distanceCalculator.computeDistances(layout)
+            cells = dense.getCells()
+
+            distancer = distanceCalculator.Distancer(layout, junctions = True)
+            self.assertTrue(distancer.getMazeDistances())
+            self.assertIsInstance(distancer._distances, distanceCalculator.JunctionMazeDistances)
+
+            # Rows (and so bulk queries and paths) match the full matrix.
+            for source in cells[::7]:
+                index = dense.getIndex(source)
+                self.assertEqual(list(dense.getRow(index)),
+                        list(distancer._distances.getRow(index)))
+                self.assertEqual(dense.getPath(source, cells[-1]),
+                        distancer.getPath(source, cells[-1]))
+
+                for target in cells[::5]:
+                    self.assertEqual(dense.getDistance(source, target),
+                            distancer.getDistance(source, target))
+
+    def test_maze(self):
+        distanceCalculator.clearCache()
+        state = PacmanGameState(getLayout('mediumClassic'))
+        dense = distanceCalculator.computeDistances(state.getInitialLayout())
+
+        for target in [(1, 1), (1, 2), (9, 1), (18, 9)]:
+            self.assertEqual(dense.getDistance((1, 1), target),
+                    distance.maze((1, 1), target, state))
+
+        # Later calls (even from another copy of the layout) share the same distances,
+        # which only needed the row for (1, 1).
+        lazy = distanceCalculator.getLazyDistances(getLayout('mediumClassic'))
+        self.assertEqual(1, lazy.getNumCachedRows())
+
+        self.assertRaises(ValueError, distance.maze, (0, 0), (1, 1), state)
+
+        distanceCalculator.clearCache()
+
+    def test_next_action(self):
+        layout = getLayout('mediumClassic')
+        cells = layout.walls.asList(False)
+
+        distancer = distanceCalculator.Distancer(layout)
+        self.assertRaises(RuntimeError, distancer.getNextAction, (1, 1), (1, 2))
+
+        distancer.getMazeDistances()
+        lazy = distanceCalculator.LazyMazeDistances(layout)
+
+        self.assertEqual(Directions.STOP, distancer.getNextAction((1, 1), (1, 1)))
+        self.assertEqual(Directions.NORTH, distancer.getNextAction((1, 1), (1, 2)))
+        self.assertEqual([], distancer.getPath((1, 1), (1, 1)))
+
+        for source in cells[::7]:
+            for target in cells[::5]:
+                path = distancer.getPath(source, target)
+                self.assertEqual(path, lazy.getPath(source, target))
+                self.assertEqual(distancer.getDistance(source, target), len(path))
+
+                # Following the path (by the game's rules) ends up at the target.
+                position = source
+                for action in path:
+                    self.assertIn(action, Actions.getPossibleActions(position,
+                            Directions.STOP, layout.walls))
+                    position = Actions.getSuccessor(position, action)
+
+                self.assertEqual(target, position)
+
+                if (source != target):
+                    self.assertEqual(path[0], distancer.getNextAction(source, target))
+
+    def test_next_action_unreachable(self):
+        distancer = distanceCalculator.Distancer(Layout(POCKET_LAYOUT))
+        distancer.getMazeDistances()
+
+        self.assertIsNone(distancer.getNextAction((1, 3), (4, 1)))
+        self.assertIsNone(distancer.getPath((1, 3), (4, 1)))
+        self.assertEqual([Directions.EAST], distancer.getPath((1, 1), (2, 1)))
+
+    def test_fractional(self):
+        layout = getLayout('defaultCapture')
+        cells = layout.walls.asList(False)
+
+        distancer = distanceCalculator.Distancer(layout)
+        distancer.getMazeDistances()
+
+        # Half (and quarter) steps between open neighbors.
+        positions = list(cells[::11])
+        for (x, y) in cells[::3]:
+            if ((x + 1, y) in cells):
+                positions.append((x + 0.5, y))
+
+            if ((x, y + 1) in cells):
+                positions.append((x, y + 0.25))
+
+        for pos1 in positions:
+            for pos2 in positions[::4]:
+                # Check against trying every combination of the surrounding cells.
+                self.assertEqual(distancer._getGridsDistance(pos1, pos2),
+                        distancer.getDistance(pos1, pos2))
+
+        self.assertEqual(((1, 2), 0.5, (2, 2), 0.5), distanceCalculator.getSnaps((1.5, 2)))
+        self.assertIsNone(distanceCalculator.getSnaps((1.5, 1.5)))
+
+if __name__ == '__main__':
+    unittest.main()
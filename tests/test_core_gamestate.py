@@ -0,0 +1,301 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.distance import manhattan
+from pacai.core.layout import getLayout
+from pacai.util.util import nearestPoint
+
+NUM_GAMES = 5
+MAX_MOVES = 300
+
+"""
+Test the bookkeeping game states do as they generate successors.
+"""
+class GameStateTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(4)
+
+        pacmanLayout = getLayout('mediumClassic')
+        captureLayout = getLayout('defaultCapture')
+
+        self.createStates = [
+            ('pacman', lambda: PacmanGameState(pacmanLayout)),
+            ('capture', lambda: CaptureGameState(captureLayout, MAX_MOVES)),
+        ]
+
+    def _checkGames(self, check):
+        """
+        Run a check (that takes a function to create a fresh state) on each kind of game.
+        """
+
+        for (game, createState) in self.createStates:
+            with self.subTest(game = game):
+                check(createState)
+
+    def _randomGames(self, createState):
+        """
+        Play some random games and yield every (parent, action, successor) along the way.
+        """
+
+        for i in range(NUM_GAMES):
+            state = createState()
+            agentIndex = 0
+
+            for move in range(MAX_MOVES):
+                if (state.isOver()):
+                    break
+
+                action = self.rng.choice(state.getLegalActions(agentIndex))
+                successor = state.generateSuccessor(agentIndex, action)
+
+                yield (state, agentIndex, action, successor)
+
+                state = successor
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def _checkIncrementalHash(self, createState):
+        for (state, agentIndex, action, successor) in self._randomGames(createState):
+            self.assertEqual(successor._computeHash(), successor.__hash__())
+
+            other = state.generateSuccessor(agentIndex, action)
+            self.assertEqual(successor, other)
+            self.assertEqual(hash(successor), hash(other))
+
+    def _checkApplyAndUndo(self, state, agentIndex, depth):
+        """
+        Recursively apply and undo every legal action in place,
+        comparing against the successors that generateSuccessor() builds.
+        """
+
+        if (depth == 0 or state.isOver()):
+            return
+
+        before = state._initSuccessor()
+        nextAgentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        for action in state.getLegalActions(agentIndex):
+            successor = state.generateSuccessor(agentIndex, action)
+
+            record = state.applyAction(agentIndex, action)
+            self.assertEqual(successor, state)
+            self.assertEqual(hash(successor), hash(state))
+            self.assertEqual(successor.getLastFoodEaten(), state.getLastFoodEaten())
+
+            self._checkApplyAndUndo(state, nextAgentIndex, depth - 1)
+
+            state.undoAction(record)
+            self.assertEqual(before, state)
+            self.assertEqual(hash(before), hash(state))
+            self.assertEqual(before.getLastAgentMoved(), state.getLastAgentMoved())
+
+    def _checkInPlaceActions(self, createState):
+        for (state, agentIndex, action, successor) in self._randomGames(createState):
+            if (self.rng.random() < 0.1):
+                self._checkApplyAndUndo(successor, (agentIndex + 1) % state.getNumAgents(), 3)
+
+    def _agentSnapshot(self, state):
+        return [(agentState.getPosition(), agentState.getDirection(), agentState.isPacman(),
+                agentState.getScaredTimer()) for agentState in state.getAgentStates()]
+
+    def _checkCopyOnWrite(self, createState):
+        numShared = 0
+
+        for (state, agentIndex, action, successor) in self._randomGames(createState):
+            before = self._agentSnapshot(state)
+
+            # Generate another successor, since the one we were given has already been created.
+            other = state.generateSuccessor(agentIndex, action)
+            self.assertEqual(before, self._agentSnapshot(state))
+            self.assertEqual(self._agentSnapshot(successor), self._agentSnapshot(other))
+
+            for index in range(state.getNumAgents()):
+                if (other.getAgentState(index) is state.getAgentState(index)):
+                    numShared += 1
+
+        self.assertTrue(numShared > 0)
+
+    def _checkBatchedSuccessors(self, createState):
+        for (state, agentIndex, action, successor) in self._randomGames(createState):
+            successors = state.generateSuccessors(agentIndex)
+            self.assertEqual(state.getLegalActions(agentIndex), [pair[0] for pair in successors])
+
+            for (action, batchedSuccessor) in successors:
+                expected = state.generateSuccessor(agentIndex, action)
+                self.assertEqual(expected, batchedSuccessor)
+                self.assertEqual(hash(expected), hash(batchedSuccessor))
+
+    def test_incremental_hash(self):
+        self._checkGames(self._checkIncrementalHash)
+
+    def test_apply_and_undo(self):
+        self._checkGames(self._checkInPlaceActions)
+
+    def test_copy_on_write(self):
+        self._checkGames(self._checkCopyOnWrite)
+
+    def test_batched_successors(self):
+        self._checkGames(self._checkBatchedSuccessors)
+
+    def test_capture_undo_food(self):
+        state = CaptureGameState(getLayout('defaultCapture'), MAX_MOVES)
+        redIndex = state.getRedTeamIndices()[0]
+
+        # Put a red pacman next to some of blue's food, as far from blue's agents as possible.
+        food, position, action = self._findMove(state, lambda target: state.hasFood(*target))
+        self._placeAgent(state, redIndex, position, True)
+
+        before = state._initSuccessor()
+        blueFood = state.getBlueFood()
+        numBlueFood = state.getNumBlueFood()
+        numRedFood = state.getNumRedFood()
+
+        successor = state.generateSuccessor(redIndex, action)
+
+        record = state.applyAction(redIndex, action)
+        self.assertEqual(successor, state)
+        self.assertEqual(numBlueFood - 1, state.getNumBlueFood())
+        self.assertEqual(numRedFood, state.getNumRedFood())
+        self.assertFalse(state.getBlueFood()[food[0]][food[1]])
+        self.assertEqual(before.getScore() + 1, state.getScore())
+        self.assertEqual(state._computeHash(), state.__hash__())
+
+        state.undoAction(record)
+        self.assertEqual(before, state)
+        self.assertEqual(hash(before), hash(state))
+        self.assertEqual(numBlueFood, state.getNumBlueFood())
+        self.assertEqual(numRedFood, state.getNumRedFood())
+        self.assertEqual(blueFood, state.getBlueFood())
+        self.assertTrue(state.getBlueFood()[food[0]][food[1]])
+        self.assertEqual(state.getNumFood(), state.getFood().count())
+
+    def test_capture_respawn_hash(self):
+        layout = getLayout('defaultCapture')
+        state = CaptureGameState(layout, MAX_MOVES)
+        redIndex = state.getRedTeamIndices()[0]
+        blueIndex = state.getBlueTeamIndices()[0]
+
+        # A red pacman walks into a blue ghost (on a cell without food) and gets eaten.
+        def isEmpty(target):
+            return not state.hasFood(*target) and target not in state.getCapsules()
+
+        ghostPosition, position, action = self._findMove(state, isEmpty)
+        self._placeAgent(state, blueIndex, ghostPosition, False)
+        self._placeAgent(state, redIndex, position, True)
+
+        # The same board, but the red agent never left the start.
+        expected = CaptureGameState(layout, MAX_MOVES)
+        self._placeAgent(expected, blueIndex, ghostPosition, False)
+
+        for inPlace in (False, True):
+            with self.subTest(inPlace = inPlace):
+                if (inPlace):
+                    successor = state._initSuccessor()
+                    successor.applyAction(redIndex, action)
+                else:
+                    successor = state.generateSuccessor(redIndex, action)
+
+                self.assertEqual(layout.agentPositions[redIndex][1],
+                        successor.getAgentPosition(redIndex))
+                self.assertEqual(expected, successor)
+                self.assertEqual(hash(expected), hash(successor))
+                self.assertEqual(successor._computeHash(), successor.__hash__())
+
+    def _findMove(self, state, isTarget):
+        """
+        Find a target cell on blue's side (that passes the given check),
+        and a move onto it from a neighboring cell that is also on blue's side:
+        (target, neighbor, action).
+        Prefer cells that are far away from where the blue agents start.
+        """
+
+        blueStarts = [state.getInitialAgentPosition(index)
+                for index in state.getBlueTeamIndices()]
+
+        cells = [cell for cell in state.getWalls().asList(False) if state.isOnBlueSide(cell)]
+        cells.sort(key = lambda cell: -min(manhattan(cell, start) for start in blueStarts))
+
+        for target in cells:
+            if (not isTarget(target)):
+                continue
+
+            for neighbor in cells:
+                if (manhattan(neighbor, target) == 1):
+                    vector = (target[0] - neighbor[0], target[1] - neighbor[1])
+                    return (target, neighbor, Actions.vectorToDirection(vector))
+
+        self.fail('Could not find a move onto a target cell.')
+
+    def _placeAgent(self, state, index, position, isPacman):
+        agentState = state.getMutableAgentState(index)
+        agentState.setFixedPosition(Actions.toFixed(position))
+        agentState.setIsPacman(isPacman)
+
+    def test_read_only_agent_states(self):
+        for (game, createState) in self.createStates:
+            with self.subTest(game = game):
+                state = createState()
+                successor = state.generateSuccessor(0, state.getLegalActions(0)[0])
+                state.checkHash()
+                successor.checkHash()
+
+                # Agent states are shared with successors, so they must not be modified.
+                successor.getAgentState(1).setScaredTimer(10)
+                self.assertRaises(RuntimeError, state.checkHash)
+                self.assertRaises(RuntimeError, successor.checkHash)
+
+    def test_food_counts(self):
+        layout = getLayout('mediumClassic')
+        for (state, agentIndex, action, successor) in self._randomGames(
+                lambda: PacmanGameState(layout)):
+            self.assertEqual(successor.getFood().count(), successor.getNumFood())
+
+        layout = getLayout('defaultCapture')
+        for (state, agentIndex, action, successor) in self._randomGames(
+                lambda: CaptureGameState(layout, MAX_MOVES)):
+            redFood = successor.getRedFood()
+            blueFood = successor.getBlueFood()
+
+            self.assertEqual(redFood.count(), successor.getNumRedFood())
+            self.assertEqual(blueFood.count(), successor.getNumBlueFood())
+            self.assertEqual(successor.getFood().count(), successor.getNumFood())
+            self.assertEqual(successor.getNumFood(),
+                    successor.getNumRedFood() + successor.getNumBlueFood())
+
+            for (x, y) in successor.getFood().asList():
+                self.assertEqual(successor.isOnRedSide((x, y)), redFood[x][y])
+                self.assertEqual(successor.isOnBlueSide((x, y)), blueFood[x][y])
+
+    def test_fixed_positions(self):
+        layout = getLayout('mediumClassic')
+        sawHalfStep = False
+
+        def createState():
+            # Start with scared ghosts, so they move at half speed.
+            state = PacmanGameState(layout)
+            for index in state.getGhostIndexes():
+                state.getMutableAgentState(index).setScaredTimer(MAX_MOVES)
+
+            return state
+
+        for (state, agentIndex, action, successor) in self._randomGames(createState):
+            for index in range(successor.getNumAgents()):
+                agentState = successor.getAgentState(index)
+                position = agentState.getPosition()
+                fixedPosition = agentState.getFixedPosition()
+
+                self.assertEqual(Actions.toFixed(position), fixedPosition)
+                self.assertEqual(Actions.fromFixed(fixedPosition), position)
+                self.assertEqual(nearestPoint(position), agentState.getNearestPosition())
+                self.assertEqual(tuple(int(pos) for pos in position),
+                        successor.getAgentPosition(index))
+                self.assertEqual(position == nearestPoint(position), agentState.isOnGridPoint())
+
+                sawHalfStep |= not agentState.isOnGridPoint()
+
+        self.assertTrue(sawHalfStep)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import pickle
+import unittest
+
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+
+"""
+Test the bitmask-backed grid against the list-backed one.
+"""
+class BitGridTest(unittest.TestCase):
+    def setUp(self):
+        self.positions = [(0, 0), (1, 2), (3, 1), (4, 3)]
+
+        self.grid = Grid(5, 4)
+        self.bitGrid = BitGrid(5, 4)
+
+        for (x, y) in self.positions:
+            self.grid[x][y] = True
+            self.bitGrid[x][y] = True
+
+    def test_read(self):
+        for x in range(5):
+            for y in range(4):
+                self.assertEqual(self.grid[x][y], self.bitGrid[x][y])
+
+        self.assertIs(self.bitGrid[1][2], True)
+        self.assertIs(self.bitGrid[1][1], False)
+
+    def test_aggregates(self):
+        self.assertEqual(self.grid.count(), self.bitGrid.count())
+        self.assertEqual(self.grid.count(False), self.bitGrid.count(False))
+        self.assertEqual(self.grid.asList(), self.bitGrid.asList())
+        self.assertEqual(self.grid.asList(False), self.bitGrid.asList(False))
+        self.assertEqual(str(self.grid), str(self.bitGrid))
+
+    def test_equality(self):
+        self.assertEqual(self.bitGrid, BitGrid.fromGrid(self.grid))
+        self.assertEqual(self.bitGrid, self.grid)
+        self.assertEqual(hash(self.bitGrid), hash(self.grid))
+
+    def test_copy(self):
+        other = self.bitGrid.copy()
+        other[1][2] = False
+
+        self.assertTrue(self.bitGrid[1][2])
+        self.assertFalse(other[1][2])
+        self.assertEqual(len(self.positions) - 1, other.count())
+        self.assertNotEqual(self.bitGrid, other)
+
+    def test_bits(self):
+        other = BitGrid.fromBits(5, 4, self.bitGrid.getBits())
+        self.assertEqual(self.bitGrid, other)
+
+        other.setBits(0)
+        self.assertFalse(other[1][2])
+        self.assertEqual(0, other.count())
+
+    def test_slice_assignment(self):
+        for grid in [self.grid, self.bitGrid]:
+            grid[2][1:3] = [True, True]
+            grid[3][::2] = [True, True]
+            grid[4][-2:] = (False, False)
+
+        self.assertEqual(self.grid.asList(), self.bitGrid.asList())
+        self.assertEqual(self.grid.count(), self.bitGrid.count())
+        self.assertEqual([False, True, True, False], self.bitGrid[2][:])
+
+        # Columns can not change size.
+        self.assertRaises(ValueError, self.bitGrid[2].__setitem__, slice(0, 2), [True])
+        self.assertEqual(4, len(self.bitGrid[2]))
+
+    def test_pickle(self):
+        self.bitGrid[0][1]
+        other = pickle.loads(pickle.dumps(self.bitGrid))
+
+        self.assertEqual(self.bitGrid, other)
+        self.assertEqual(self.bitGrid.asList(), other.asList())
+
+if __name__ == '__main__':
+    unittest.main()
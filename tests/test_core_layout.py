@@ -0,0 +1,177 @@
+import base64
+import os
+import pickle
+import sys
+import unittest
+
+from pacai.core import distanceCalculator
+from pacai.core import layout
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.grid import BitGrid
+
+# A layout pickled before move tables were added to layouts (as in old replays):
+# %%%%%%%
+# %P  o.%
+# % %%% %
+# %.  G %
+# %%%%%%%
+LEGACY_LAYOUT_TEXT = ['%%%%%%%', '%P  o.%', '% %%% %', '%.  G %', '%%%%%%%']
+LEGACY_LAYOUT_PICKLE = base64.b64decode(
+        'gASVrAEAAAAAAACMEXBhY2FpLmNvcmUubGF5b3V0lIwGTGF5b3V0lJOUKYGUfZQojAV3aWR0aJRLB4wGaGVp'
+        'Z2h0lEsFjAV3YWxsc5SMD3BhY2FpLmNvcmUuZ3JpZJSMBEdyaWSUk5QpgZR9lCiMBl93aWR0aJRLB4wHX2hl'
+        'aWdodJRLBYwFX2RhdGGUXZQoXZQoiIiIiIhlXZQoiImJiYhlXZQoiImIiYhlXZQoiImIiYhlXZQoiImIiYhl'
+        'XZQoiImJiYhlXZQoiIiIiIhlZXVijARmb29klGgKKYGUfZQoaA1LB2gOSwVoD12UKF2UKImJiYmJZV2UKImI'
+        'iYmJZV2UKImJiYmJZV2UKImJiYmJZV2UKImJiYmJZV2UKImJiYiJZV2UKImJiYmJZWV1YowIY2Fwc3VsZXOU'
+        'XZRLBEsDhpRhjA5hZ2VudFBvc2l0aW9uc5RdlCiISwFLA4aUhpSJSwRLAYaUhpRljAludW1HaG9zdHOUSwGM'
+        'CmxheW91dFRleHSUXZQojAclJSUlJSUllIwHJVAgIG8uJZSMByUgJSUlICWUjAclLiAgRyAllGgvZXViLg==')
+
+"""
+Test the static information precomputed for layouts.
+"""
+class LayoutTest(unittest.TestCase):
+    def setUp(self):
+        self.layouts = []
+        for filename in sorted(os.listdir(layout.DEFAULT_LAYOUT_DIR)):
+            self.layouts.append(layout.getLayout(filename))
+
+    def test_legal_actions(self):
+        for board in self.layouts:
+            for (x, y) in board.walls.asList(False):
+                for direction in Actions._directions:
+                    expected = Actions.getPossibleActions((x, y), direction, board.walls)
+                    self.assertEqual(expected, list(board.getPossibleActions((x, y), direction)))
+
+                    expected = [action for action in expected if action != Directions.STOP]
+                    reverse = Actions.reverseDirection(direction)
+                    if (reverse in expected and len(expected) > 1):
+                        expected.remove(reverse)
+
+                    actual = board.getGhostPossibleActions((x, y), direction)
+                    self.assertEqual(expected, list(actual))
+
+                    # The raw tables give the same moves.
+                    cellIndex = x * board.getHeight() + y
+                    self.assertIs(actual, board.getGhostLegalActionTable()[cellIndex][direction])
+                    self.assertIs(board.getPossibleActions((x, y), direction),
+                            board.getLegalActionTable()[cellIndex])
+
+    def test_legal_actions_between_cells(self):
+        board = self.layouts[0]
+
+        self.assertEqual((Directions.EAST, ), board.getPossibleActions((1.5, 1), Directions.EAST))
+        self.assertEqual((Directions.NORTH, ),
+                board.getGhostPossibleActions((1, 1.5), Directions.NORTH))
+
+    def _checkSameMoves(self, expected, board):
+        for (x, y) in expected.walls.asList(False):
+            for direction in Actions._directions:
+                self.assertEqual(expected.getPossibleActions((x, y), direction),
+                        board.getPossibleActions((x, y), direction))
+                self.assertEqual(expected.getGhostPossibleActions((x, y), direction),
+                        board.getGhostPossibleActions((x, y), direction))
+
+    def test_pickle(self):
+        board = layout.getLayout('mediumClassic')
+        board.getFingerprint()
+        board.getJunctionGraph()
+
+        # The tables and caches are rebuilt, not pickled.
+        data = pickle.dumps(board)
+        self.assertNotIn(b'_legalActions', data)
+        self.assertNotIn(b'_junctionGraph', data)
+
+        loaded = pickle.loads(data)
+        self._checkSameMoves(board, loaded)
+        self.assertEqual(board.getFingerprint(), loaded.getFingerprint())
+
+    def test_legacy_pickle(self):
+        board = pickle.loads(LEGACY_LAYOUT_PICKLE)
+        expected = layout.Layout(LEGACY_LAYOUT_TEXT)
+
+        self._checkSameMoves(expected, board)
+        self.assertEqual(expected.getFixedPossibleActions((2, 6), Directions.STOP),
+                board.getFixedPossibleActions((2, 6), Directions.STOP))
+
+        # Old plain grids are converted.
+        self.assertIsInstance(board.walls, BitGrid)
+        self.assertIsInstance(board.food, BitGrid)
+        self.assertEqual(expected.walls, board.walls)
+        self.assertEqual(expected.food, board.food)
+        self.assertEqual(expected.getFingerprint(), board.getFingerprint())
+
+    def test_fingerprint(self):
+        fingerprints = set([board.getFingerprint() for board in self.layouts])
+        self.assertEqual(len(self.layouts), len(fingerprints))
+
+        # Only the walls matter.
+        text = ['%%%%%', '%P .%', '%%%%%']
+        fingerprint = layout.Layout(text).getFingerprint()
+        self.assertEqual(fingerprint, layout.Layout(['%%%%%', '%. P%', '%%%%%']).getFingerprint())
+        self.assertNotEqual(fingerprint,
+                layout.Layout(['%%%%%', '%P%.%', '%%%%%']).getFingerprint())
+
+    def test_junction_graph(self):
+        for board in self.layouts:
+            graph = board.getJunctionGraph()
+            self.assertIs(graph, board.getJunctionGraph())
+
+            # Every open cell is either a junction or on exactly one corridor.
+            corridorCells = [cell for corridor in graph.getCorridors()
+                    for cell in corridor.getCells()]
+            self.assertEqual(len(corridorCells), len(set(corridorCells)))
+            self.assertEqual(sorted(board.walls.asList(False)),
+                    sorted(corridorCells + graph.getJunctions()))
+
+            for corridor in graph.getCorridors():
+                # Walking a corridor (either way) goes through its cells, in order.
+                cells = [corridor.getStart()] + list(corridor.getCells()) + [corridor.getEnd()]
+                for (fromStart, path) in [(True, cells), (False, list(reversed(cells)))]:
+                    position = path[0]
+                    for (action, expected) in zip(corridor.getActions(fromStart), path[1:]):
+                        self.assertIn(action, board.getPossibleActions(position, action))
+                        position = Actions.getSuccessor(position, action)
+                        self.assertEqual(expected, position)
+
+                for (offset, cell) in enumerate(corridor.getCells()):
+                    self.assertEqual((corridor, offset + 1), graph.getCorridor(cell))
+
+    def test_junction_graph_distances(self):
+        board = layout.getLayout('bigMaze')
+        graph = board.getJunctionGraph()
+        distances = distanceCalculator.computeDistances(board)
+
+        # Corridors make up most of the maze.
+        self.assertLess(graph.getNumJunctions() * 3, distances.getNumCells())
+
+        cells = distances.getCells()
+        for source in cells[::17]:
+            for target in cells[::5]:
+                self.assertEqual(distances.getDistance(source, target),
+                        graph.getDistance(source, target))
+
+    def test_junction_graph_loop(self):
+        # A loop with no junctions, next to a single cell.
+        board = layout.Layout([
+            '%%%%%%',
+            '%   %%',
+            '% % %%',
+            '%   %.',
+            '%%%%%%',
+        ])
+        graph = board.getJunctionGraph()
+
+        self.assertEqual(2, graph.getNumJunctions())
+        self.assertEqual(1, graph.getNumCorridors())
+
+        loop = graph.getCorridors()[0]
+        self.assertEqual(loop.getStart(), loop.getEnd())
+        self.assertEqual(8, loop.getLength())
+
+        self.assertEqual(2, graph.getDistance((1, 1), (3, 1)))
+        self.assertEqual(4, graph.getDistance((1, 1), (3, 3)))
+        self.assertEqual(sys.maxsize, graph.getDistance((1, 1), (5, 1)))
+        self.assertEqual([], graph.getNeighbors((5, 1)))
+
+if __name__ == '__main__':
+    unittest.main()
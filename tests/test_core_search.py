@@ -0,0 +1,369 @@
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search import heuristic
+from pacai.core.search.food import BitmaskFoodSearchProblem
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.junction import JunctionSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+from pacai.student import search
+from pacai.student import searchAgents
+
+# A small weighted graph: {state: [(successor, action, cost), ...]}.
+GRAPH = {
+    'S': [('A', 'S->A', 1), ('B', 'S->B', 3)],
+    'A': [('B', 'A->B', 1), ('G', 'A->G', 12)],
+    'B': [('C', 'B->C', 1)],
+    'C': [('G', 'C->G', 1)],
+    'G': [],
+}
+
+# An admissible but inconsistent heuristic for GRAPH (A looks much worse than it is).
+INCONSISTENT_HEURISTIC = {'S': 0, 'A': 3, 'B': 0, 'C': 0, 'G': 0}
+
+class GraphSearchProblem(SearchProblem):
+    def __init__(self, graph, start, goal):
+        super().__init__()
+
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+
+    def actionsCost(self, actions):
+        return len(actions)
+
+    def isGoal(self, state):
+        return state == self.goal
+
+    def startingState(self):
+        return self.start
+
+    def predecessorStates(self, state):
+        self._numExpanded += 1
+        return [(predecessor, action, cost)
+                for (predecessor, successors) in self.graph.items()
+                for (successor, action, cost) in successors if successor == state]
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+        return self.graph[state]
+
+"""
+Test the search problems and search machinery.
+"""
+class FoodSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.state = PacmanGameState(getLayout('tinySearch'))
+
+    def test_bitmask_states(self):
+        problem = FoodSearchProblem(self.state)
+        bitmaskProblem = BitmaskFoodSearchProblem(self.state)
+
+        start = bitmaskProblem.startingState()
+        self.assertIsInstance(start[0], int)
+        self.assertIsInstance(start[1], int)
+        self.assertEqual(problem.startingState(), bitmaskProblem.toFoodSearchState(start))
+
+        # Walk a few levels, checking that both problems give the same successors.
+        states = [(problem.startingState(), start)]
+        for depth in range(6):
+            nextStates = []
+
+            for (state, bitmaskState) in states:
+                self.assertEqual(problem.isGoal(state), bitmaskProblem.isGoal(bitmaskState))
+
+                successors = problem.successorStates(state)
+                bitmaskSuccessors = bitmaskProblem.successorStates(bitmaskState)
+                self.assertEqual(len(successors), len(bitmaskSuccessors))
+
+                for (successor, bitmaskSuccessor) in zip(successors, bitmaskSuccessors):
+                    self.assertEqual(successor[1:], bitmaskSuccessor[1:])
+                    self.assertEqual(successor[0],
+                            bitmaskProblem.toFoodSearchState(bitmaskSuccessor[0]))
+
+                    nextStates.append((successor[0], bitmaskSuccessor[0]))
+
+            states = nextStates
+
+        self.assertEqual(problem.getExpandedCount(), bitmaskProblem.getExpandedCount())
+
+    def test_bitmask_search(self):
+        problem = FoodSearchProblem(self.state)
+        bitmaskProblem = BitmaskFoodSearchProblem(self.state)
+
+        path = search.aStarSearch(problem, searchAgents.foodHeuristic)
+        bitmaskPath = search.aStarSearch(bitmaskProblem,
+                bitmaskProblem.wrapHeuristic(searchAgents.foodHeuristic))
+
+        self.assertEqual(path, bitmaskPath)
+        self.assertEqual(problem.getExpandedCount(), bitmaskProblem.getExpandedCount())
+        self.assertEqual(len(path), bitmaskProblem.actionsCost(bitmaskPath))
+
+        # Going east for the width of the board has to run into a wall.
+        illegal = [Directions.EAST] * problem.walls.getWidth()
+        self.assertEqual(999999, bitmaskProblem.actionsCost(illegal))
+
+class SearchEngineTest(unittest.TestCase):
+    def _checkPath(self, problem, path):
+        position = problem.startingState()
+        for action in path:
+            successors = {action: state
+                    for (state, action, cost) in problem.successorStates(position)}
+            self.assertIn(action, successors)
+            position = successors[action]
+
+        self.assertTrue(problem.isGoal(position))
+
+    def test_positions(self):
+        for name in ['tinyMaze', 'mediumMaze', 'bigMaze', 'openMaze']:
+            state = PacmanGameState(getLayout(name))
+            expected = len(search.breadthFirstSearch(PositionSearchProblem(state)))
+
+            searches = [
+                engine.breadthFirstSearch,
+                engine.uniformCostSearch,
+                lambda problem: engine.aStarSearch(problem, heuristic.manhattan),
+            ]
+
+            for function in searches:
+                with self.subTest(layout = name, search = function):
+                    problem = PositionSearchProblem(state)
+                    path = function(problem)
+                    self.assertEqual(expected, len(path))
+
+                    stats = problem.getSearchStats()
+                    self.assertEqual(problem.getExpandedCount(), stats.expanded)
+                    self.assertGreaterEqual(stats.generated, stats.expanded)
+                    self.assertEqual(0, stats.reopened)
+                    self.assertGreater(stats.maxFrontierSize, 0)
+
+                    self._checkPath(PositionSearchProblem(state), path)
+
+            # DFS finds a path, but not necessarily the shortest one.
+            path = engine.depthFirstSearch(PositionSearchProblem(state))
+            self._checkPath(PositionSearchProblem(state), path)
+
+    def test_bidirectional(self):
+        # Cells get more expensive to enter going east.
+        costFn = lambda position: 1 + position[0] % 3
+
+        for name in ['mediumMaze', 'bigMaze', 'openSearch', 'mediumClassic']:
+            state = PacmanGameState(getLayout(name))
+            cells = state.getWalls().asList(False)
+
+            for (start, goal) in [(cells[0], cells[-1]), (cells[-1], cells[len(cells) // 2])]:
+                with self.subTest(layout = name, start = start, goal = goal):
+                    problem = PositionSearchProblem(state, goal = goal, start = start)
+                    expected = len(engine.breadthFirstSearch(problem))
+
+                    problem = PositionSearchProblem(state, goal = goal, start = start)
+                    path = engine.bidirectionalBreadthFirstSearch(problem)
+                    self.assertEqual(expected, len(path))
+                    self.assertEqual(problem.getExpandedCount(),
+                            problem.getSearchStats().expanded)
+                    self._checkPath(PositionSearchProblem(state, goal = goal, start = start),
+                            path)
+
+                    problem = PositionSearchProblem(state, costFn, goal, start)
+                    expected = problem.actionsCost(engine.uniformCostSearch(problem))
+
+                    problem = PositionSearchProblem(state, costFn, goal, start)
+                    path = engine.bidirectionalAStarSearch(problem, heuristic.manhattan)
+                    self.assertEqual(expected, problem.actionsCost(path))
+                    self.assertEqual(problem.getExpandedCount(),
+                            problem.getSearchStats().expanded)
+                    self._checkPath(PositionSearchProblem(state, goal = goal, start = start),
+                            path)
+
+        # In the open, searching from both ends expands far fewer nodes.
+        state = PacmanGameState(getLayout('openSearch'))
+        for (search, bidirectionalSearch) in [
+                (engine.breadthFirstSearch, engine.bidirectionalBreadthFirstSearch),
+                (engine.aStarSearch, engine.bidirectionalAStarSearch)]:
+            problem = PositionSearchProblem(state)
+            search(problem)
+
+            bidirectionalProblem = PositionSearchProblem(state)
+            bidirectionalSearch(bidirectionalProblem)
+
+            self.assertLess(bidirectionalProblem.getExpandedCount(),
+                    problem.getExpandedCount() / 2)
+
+    def test_bidirectional_graph(self):
+        for search in [engine.bidirectionalBreadthFirstSearch, engine.bidirectionalAStarSearch]:
+            with self.subTest(search = search):
+                self.assertIsNone(search(GraphSearchProblem(GRAPH, 'B', 'A')))
+                self.assertEqual([], search(GraphSearchProblem(GRAPH, 'G', 'G')))
+
+        # Breadth first takes the fewest steps, A* takes the cheapest path.
+        path = engine.bidirectionalBreadthFirstSearch(GraphSearchProblem(GRAPH, 'S', 'G'))
+        self.assertEqual(['S->A', 'A->G'], path)
+
+        path = engine.bidirectionalAStarSearch(GraphSearchProblem(GRAPH, 'S', 'G'))
+        self.assertEqual(['S->A', 'A->B', 'B->C', 'C->G'], path)
+
+        # Problems that can not be searched backwards say so.
+        problem = FoodSearchProblem(PacmanGameState(getLayout('tinySearch')))
+        self.assertRaises(NotImplementedError, problem.predecessorStates,
+                problem.startingState())
+
+    def test_iterative_deepening(self):
+        for name in ['tinyMaze', 'mediumMaze']:
+            state = PacmanGameState(getLayout(name))
+            expected = len(engine.breadthFirstSearch(PositionSearchProblem(state)))
+
+            problem = PositionSearchProblem(state)
+            path = engine.iterativeDeepeningAStarSearch(problem, heuristic.manhattan)
+            self.assertEqual(expected, len(path))
+            self._checkPath(PositionSearchProblem(state), path)
+
+            # Only the current path is kept.
+            stats = problem.getSearchStats()
+            self.assertEqual(problem.getExpandedCount(), stats.expanded)
+            self.assertLessEqual(stats.maxFrontierSize, expected + 1)
+
+        path = engine.iterativeDeepeningAStarSearch(GraphSearchProblem(GRAPH, 'S', 'G'),
+                lambda state, problem: INCONSISTENT_HEURISTIC[state])
+        self.assertEqual(['S->A', 'A->B', 'B->C', 'C->G'], path)
+
+        for (start, goal, expected) in [('B', 'A', None), ('G', 'G', [])]:
+            path = engine.iterativeDeepeningAStarSearch(GraphSearchProblem(GRAPH, start, goal))
+            self.assertEqual(expected, path)
+
+    def test_memory_bounded(self):
+        for name in ['tinyMaze', 'mediumMaze', 'smallClassic']:
+            state = PacmanGameState(getLayout(name))
+            expected = len(engine.breadthFirstSearch(PositionSearchProblem(state)))
+
+            for maxNodes in [engine.DEFAULT_MAX_NODES, 2 * expected, expected + 1]:
+                with self.subTest(layout = name, maxNodes = maxNodes):
+                    problem = PositionSearchProblem(state)
+                    path = engine.memoryBoundedAStarSearch(problem, heuristic.manhattan, maxNodes)
+                    self.assertEqual(expected, len(path))
+                    self._checkPath(PositionSearchProblem(state), path)
+
+                    stats = problem.getSearchStats()
+                    self.assertEqual(problem.getExpandedCount(), stats.expanded)
+                    self.assertLessEqual(stats.maxFrontierSize, maxNodes)
+
+        # The optimal path (through B and C) needs five nodes,
+        # a shorter (but worse) one needs three.
+        for (maxNodes, expected) in [
+                (5, ['S->A', 'A->B', 'B->C', 'C->G']),
+                (3, ['S->A', 'A->G']),
+                (2, None)]:
+            problem = GraphSearchProblem(GRAPH, 'S', 'G')
+            path = engine.memoryBoundedAStarSearch(problem, maxNodes = maxNodes)
+            self.assertEqual(expected, path)
+            self.assertLessEqual(problem.getSearchStats().maxFrontierSize, maxNodes)
+
+        self.assertIsNone(engine.memoryBoundedAStarSearch(GraphSearchProblem(GRAPH, 'B', 'A')))
+        self.assertRaises(ValueError, engine.memoryBoundedAStarSearch,
+                GraphSearchProblem(GRAPH, 'S', 'G'), maxNodes = 0)
+
+    def test_memory_bounded_food(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        problem = FoodSearchProblem(state)
+        expected = len(engine.aStarSearch(problem, searchAgents.foodHeuristic))
+
+        # Keep far fewer nodes than A* does, and still find an optimal path.
+        stats = problem.getSearchStats()
+        maxNodes = (stats.expanded + stats.maxFrontierSize) // 2
+
+        problem = FoodSearchProblem(state)
+        path = engine.memoryBoundedAStarSearch(problem, searchAgents.foodHeuristic, maxNodes)
+        self.assertEqual(expected, len(path))
+        self.assertLessEqual(problem.getSearchStats().maxFrontierSize, maxNodes)
+
+    def test_junctions(self):
+        for name in ['tinyMaze', 'mediumMaze', 'bigMaze', 'mediumClassic']:
+            state = PacmanGameState(getLayout(name))
+            cells = state.getWalls().asList(False)
+
+            # From the usual start, and between cells that may be part way along corridors.
+            for (start, goal) in [(None, (1, 1)), (cells[0], cells[-1]),
+                    (cells[len(cells) // 3], cells[len(cells) // 2])]:
+                with self.subTest(layout = name, start = start, goal = goal):
+                    problem = PositionSearchProblem(state, goal = goal, start = start)
+                    expected = len(engine.uniformCostSearch(problem))
+
+                    junctionProblem = JunctionSearchProblem(state, goal = goal, start = start)
+                    path = engine.aStarSearch(junctionProblem, heuristic.manhattan)
+                    self.assertEqual(expected, junctionProblem.actionsCost(path))
+
+                    # Moving a corridor at a time expands far fewer states.
+                    self.assertLessEqual(junctionProblem.getExpandedCount(),
+                            problem.getExpandedCount())
+
+                    self._checkPath(PositionSearchProblem(state, goal = goal, start = start),
+                            JunctionSearchProblem.toActions(path))
+
+        state = PacmanGameState(getLayout('bigMaze'))
+        problem = PositionSearchProblem(state)
+        engine.uniformCostSearch(problem)
+
+        junctionProblem = JunctionSearchProblem(state)
+        engine.uniformCostSearch(junctionProblem)
+        self.assertLess(junctionProblem.getExpandedCount(), problem.getExpandedCount() / 3)
+
+    def test_unreachable(self):
+        problem = GraphSearchProblem(GRAPH, 'B', 'A')
+
+        self.assertIsNone(engine.breadthFirstSearch(problem))
+        self.assertEqual(3, problem.getSearchStats().expanded)
+
+        # The start can be the goal.
+        self.assertEqual([], engine.aStarSearch(GraphSearchProblem(GRAPH, 'G', 'G')))
+
+    def test_reopening(self):
+        problem = GraphSearchProblem(GRAPH, 'S', 'G')
+        path = engine.aStarSearch(problem,
+                lambda state, problem: INCONSISTENT_HEURISTIC[state])
+
+        # B is first reached straight from S, and then through A for less.
+        self.assertEqual(['S->A', 'A->B', 'B->C', 'C->G'], path)
+        self.assertEqual(1, problem.getSearchStats().reopened)
+
+    def test_frontiers(self):
+        nodes = [('a', 0, None, None), ('b', 0, None, None), ('c', 0, None, None)]
+
+        for (frontier, expected) in [
+                (engine.StackFrontier(), ['c', 'b', 'a']),
+                (engine.QueueFrontier(), ['a', 'b', 'c']),
+                (engine.HeapFrontier(), ['a', 'b', 'c']),
+                (engine.HeapFrontier(lifo = True), ['c', 'b', 'a'])]:
+            for node in nodes:
+                frontier.push(node, 1)
+
+            self.assertEqual(3, len(frontier))
+            self.assertEqual(expected, [frontier.pop()[0] for i in range(3)])
+            self.assertTrue(frontier.isEmpty())
+
+        frontier = engine.HeapFrontier()
+        for (node, priority) in zip(nodes, [3, 1, 2]):
+            frontier.push(node, priority)
+
+        self.assertEqual(['b', 'c', 'a'], [frontier.pop()[0] for i in range(3)])
+
+    def test_indexed_frontier(self):
+        frontier = engine.IndexedHeapFrontier()
+
+        frontier.push(('a', 5, 'x', 'x->a'), 5)
+        frontier.push(('b', 3, 'x', 'x->b'), 3)
+
+        # A better path to a state on the frontier replaces its node, a worse one is dropped.
+        frontier.push(('a', 2, 'y', 'y->a'), 2)
+        frontier.push(('b', 4, 'y', 'y->b'), 4)
+
+        self.assertEqual(2, len(frontier))
+        self.assertEqual(('a', 2, 'y', 'y->a'), frontier.pop())
+        self.assertEqual(('b', 3, 'x', 'x->b'), frontier.pop())
+        self.assertTrue(frontier.isEmpty())
+
+if __name__ == '__main__':
+    unittest.main()
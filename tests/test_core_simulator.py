@@ -0,0 +1,219 @@
+import os
+import random
+import types
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.capture import CaptureRules
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import baselineTeam
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import getLayout
+from pacai.core.simulator.capture import CaptureSimulator
+from pacai.core.simulator.pacman import PacmanSimulator
+
+NUM_GAMES = 3
+MAX_MOVES = 300
+
+CLASSIC_LAYOUTS = sorted([os.path.splitext(filename)[0]
+        for filename in os.listdir(DEFAULT_LAYOUT_DIR) if filename.endswith('Classic.lay')])
+
+CAPTURE_LAYOUTS = ['defaultCapture', 'fastCapture', 'tinyCapture']
+
+"""
+Test that the simulators follow the same rules as the game states.
+"""
+class PacmanSimulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(4)
+
+    def _checkEquivalent(self, state, simulator):
+        self.assertEqual(PacmanSimulator.fromGameState(state), simulator)
+        self.assertEqual(state, simulator.toGameState())
+        self.assertEqual(state.getScore(), simulator.getScore())
+        self.assertEqual(state.getNumFood(), simulator.getNumFood())
+        self.assertEqual(state.isWin(), simulator.isWin())
+        self.assertEqual(state.isLose(), simulator.isLose())
+
+        for index in range(state.getNumAgents()):
+            self.assertEqual(state.getAgentState(index).getPosition(),
+                    simulator.getAgentPosition(index))
+            self.assertEqual(state.getLegalActions(index),
+                    list(simulator.getLegalActions(index)))
+
+    def _checkGames(self, layoutName, scaredGhosts):
+        layout = getLayout(layoutName)
+
+        for i in range(NUM_GAMES):
+            state = PacmanGameState(layout)
+
+            if (scaredGhosts):
+                # Start with scared ghosts, so they move at half speed (and can be eaten).
+                for index in state.getGhostIndexes():
+                    state.getMutableAgentState(index).setScaredTimer(MAX_MOVES // 4)
+
+            simulator = PacmanSimulator.fromGameState(state)
+            self._checkEquivalent(state, simulator)
+
+            agentIndex = 0
+            for move in range(MAX_MOVES):
+                if (state.isOver()):
+                    break
+
+                action = self.rng.choice(state.getLegalActions(agentIndex))
+
+                state = state.generateSuccessor(agentIndex, action)
+                simulator.step(agentIndex, action)
+                self._checkEquivalent(state, simulator)
+
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+            if (simulator.isOver()):
+                self.assertRaises(RuntimeError, simulator.step, 0, 'Stop')
+
+    def test_equivalence(self):
+        self.assertTrue(len(CLASSIC_LAYOUTS) > 0)
+
+        for layoutName in CLASSIC_LAYOUTS:
+            with self.subTest(layout = layoutName):
+                self._checkGames(layoutName, False)
+                self._checkGames(layoutName, True)
+
+    def test_clone_and_reset(self):
+        layout = getLayout('mediumClassic')
+        simulator = PacmanSimulator(layout)
+        start = simulator.clone()
+
+        self.assertEqual(PacmanSimulator.fromGameState(PacmanGameState(layout)), simulator)
+
+        for move in range(20):
+            agentIndex = move % simulator.getNumAgents()
+            if (simulator.isOver()):
+                break
+
+            simulator.step(agentIndex, self.rng.choice(simulator.getLegalActions(agentIndex)))
+
+        self.assertNotEqual(start, simulator)
+        self.assertEqual(PacmanSimulator(layout), start)
+
+        simulator.reset()
+        self.assertEqual(start, simulator)
+        self.assertEqual(hash(start), hash(simulator))
+
+    def test_illegal_action(self):
+        simulator = PacmanSimulator(getLayout('mediumClassic'))
+
+        # Pacman starts against the bottom wall.
+        self.assertNotIn('South', simulator.getLegalActions(0))
+        self.assertRaises(ValueError, simulator.step, 0, 'South')
+
+        # Ghosts can never stop.
+        self.assertRaises(ValueError, simulator.step, 1, 'Stop')
+
+class CaptureSimulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(4)
+
+    def _checkEquivalent(self, state, simulator):
+        self.assertEqual(CaptureSimulator.fromGameState(state), simulator)
+        self.assertEqual(state.getScore(), simulator.getScore())
+        self.assertEqual(state.getTimeleft(), simulator.getTimeleft())
+        self.assertEqual(state.getNumRedFood(), simulator.getNumRedFood())
+        self.assertEqual(state.getNumBlueFood(), simulator.getNumBlueFood())
+        self.assertEqual(state.isWin(), simulator.isWin())
+        self.assertEqual(state.isLose(), simulator.isLose())
+
+        # The converted state should have the same per-side food and capsules.
+        converted = simulator.toGameState()
+        self.assertEqual(state, converted)
+        self.assertEqual(state.getNumRedFood(), converted.getNumRedFood())
+        self.assertEqual(state.getNumBlueFood(), converted.getNumBlueFood())
+        self.assertEqual(state.getRedFood(), converted.getRedFood())
+        self.assertEqual(state.getBlueFood(), converted.getBlueFood())
+        self.assertEqual(state.getRedCapsules(), converted.getRedCapsules())
+        self.assertEqual(state.getBlueCapsules(), converted.getBlueCapsules())
+
+        for index in range(state.getNumAgents()):
+            agentState = state.getAgentState(index)
+
+            self.assertEqual(agentState.getPosition(), simulator.getAgentPosition(index))
+            self.assertEqual(agentState.isPacman(), simulator.isPacman(index))
+            self.assertEqual(state.isOnRedTeam(index), simulator.isOnRedTeam(index))
+            self.assertEqual(state.getLegalActions(index),
+                    list(simulator.getLegalActions(index)))
+
+    def _checkGames(self, layoutName, scaredAgents):
+        layout = getLayout(layoutName)
+        rules = CaptureRules()
+
+        for i in range(NUM_GAMES):
+            state = CaptureGameState(layout, MAX_MOVES)
+
+            if (scaredAgents):
+                # Start with a scared team, so its agents can be eaten.
+                for index in state.getRedTeamIndices():
+                    state.getMutableAgentState(index).setScaredTimer(MAX_MOVES // 4)
+
+            simulator = CaptureSimulator.fromGameState(state)
+            self._checkEquivalent(state, simulator)
+
+            game = types.SimpleNamespace(gameOver = False)
+            agentIndex = 0
+
+            while (not game.gameOver):
+                action = self.rng.choice(state.getLegalActions(agentIndex))
+
+                state = state.generateSuccessor(agentIndex, action)
+                simulator.step(agentIndex, action)
+                self._checkEquivalent(state, simulator)
+
+                rules.process(state, game)
+                self.assertEqual(game.gameOver, simulator.process())
+                self._checkEquivalent(state, simulator)
+
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_equivalence(self):
+        for layoutName in CAPTURE_LAYOUTS:
+            with self.subTest(layout = layoutName):
+                self._checkGames(layoutName, False)
+                self._checkGames(layoutName, True)
+
+    def test_clone_and_reset(self):
+        simulator = CaptureSimulator(getLayout('defaultCapture'), MAX_MOVES)
+        start = simulator.clone()
+
+        for move in range(20):
+            agentIndex = move % simulator.getNumAgents()
+            simulator.step(agentIndex, self.rng.choice(simulator.getLegalActions(agentIndex)))
+
+        self.assertNotEqual(start, simulator)
+        self.assertEqual(MAX_MOVES - 20, simulator.getTimeleft())
+
+        simulator.reset()
+        self.assertEqual(start, simulator)
+        self.assertEqual(hash(start), hash(simulator))
+
+    def test_drive_agents(self):
+        simulator = CaptureSimulator(getLayout('tinyCapture'), MAX_MOVES)
+
+        agents = (baselineTeam.createTeam(0, 2, True)
+                + baselineTeam.createTeam(1, 3, False))
+        agents.sort(key = lambda agent: agent.index)
+        agents = agents[:simulator.getNumAgents()]
+
+        for agent in agents:
+            agent.registerInitialState(simulator.toGameState())
+
+        agentIndex = 0
+        for move in range(40):
+            if (simulator.process()):
+                break
+
+            action = agents[agentIndex].getAction(simulator.toGameState())
+            simulator.step(agentIndex, action)
+
+            agentIndex = (agentIndex + 1) % simulator.getNumAgents()
+
+if __name__ == '__main__':
+    unittest.main()
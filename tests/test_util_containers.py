@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from pacai.util import priorityQueue
@@ -52,5 +53,53 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_indexed_priority_queue(self):
+        queue = priorityQueue.IndexedPriorityQueue()
+        self.assertTrue(queue.isEmpty())
+
+        rng = random.Random(4)
+        priorities = {}
+
+        for i in range(500):
+            item = rng.randrange(100)
+            priority = rng.randrange(1000)
+
+            changed = queue.push(item, priority)
+            self.assertEqual(item not in priorities or priority < priorities[item], changed)
+
+            priorities[item] = min(priority, priorities.get(item, priority))
+
+        # Each item is only held once, with its lowest priority.
+        self.assertEqual(len(priorities), len(queue))
+        for (item, priority) in priorities.items():
+            self.assertTrue(queue.contains(item))
+            self.assertIn(item, queue)
+            self.assertEqual(priority, queue.priorityOf(item))
+
+        self.assertNotIn(100, queue)
+        self.assertRaises(KeyError, queue.decreaseKey, 100, 0)
+
+        item = next(iter(priorities))
+        self.assertRaises(ValueError, queue.decreaseKey, item, priorities[item] + 1)
+
+        queue.decreaseKey(item, -1)
+        priorities[item] = -1
+
+        # Ties go to the item that got its priority first.
+        queue.push(1000, -1)
+        self.assertEqual(-1, queue.peekPriority())
+        self.assertEqual([item, 1000], [queue.pop(), queue.pop()])
+        del priorities[item]
+
+        popped = []
+        while (not queue.isEmpty()):
+            priority = queue.peekPriority()
+            popped.append(queue.pop())
+            self.assertEqual(priorities[popped[-1]], priority)
+
+        self.assertRaises(IndexError, queue.peekPriority)
+        self.assertEqual(sorted(priorities), sorted(popped))
+        self.assertEqual(sorted(priorities.values()), [priorities[item] for item in popped])
+
 if __name__ == '__main__':
     unittest.main()